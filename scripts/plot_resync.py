@@ -2,6 +2,11 @@ import csv
 import os
 from pathlib import Path
 
+try:
+    from src.fast_csv import load_columns
+except ImportError:  # run without the repository root on sys.path, or without numpy
+    load_columns = None
+
 plt = None
 try:
     import matplotlib.pyplot as mpl
@@ -18,6 +23,10 @@ S_MAX = -0.53
 
 
 def load_data(csv_path: str):
+    if load_columns is not None:
+        cols = load_columns(csv_path)
+        lam = cols["lambda"].tolist()
+        return list(range(len(lam))), lam, cols["S"].tolist(), [int(v) for v in cols["ResyncTrigger"]]
     t = []
     lam = []
     s = []
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""Fit Lorentzian resonances across many traces.
+
+Input is either a directory of resonance CSV files (read with
+``extract_quantum_metrics.load_csv``, fitted in natural file-name order) or a
+2D sweep of frequency × flux/power given as
+
+- ``.npz`` with ``freq`` (GHz, shape ``(n_f,)``), ``amp`` (``(n_sweep, n_f)``)
+  or ``I``/``Q`` arrays, and optionally ``sweep`` (``(n_sweep,)``), or
+- a long-format CSV with a ``freq`` column, a sweep column (``--sweep-column``,
+  default ``flux``) and ``abs`` or ``I``/``Q``.
+
+Each fit uses the analytic Jacobian of :func:`lorentzian`.  Traces are split
+into contiguous chunks that a process pool fits in parallel; inside a chunk
+every trace is warm-started from its neighbour's solution (the centre
+frequency is re-seeded from the trace minimum when it moved by more than a
+linewidth), and falls back to a cold start if the warm fit fails.
+
+Traces with I/Q data are kept complex.  With ``--method circle`` the
+closed-form :func:`~src.extract_quantum_metrics.circle_fit` is the result;
+otherwise it seeds the magnitude fit only when there is no warm start or the
+warm start fails (before the cold start).
+
+Example usage::
+
+    python src/batch_fit_resonance.py data/sweeps/ -o result/resonance_batch.json
+    python src/batch_fit_resonance.py data/flux_sweep.npz --workers 0 --csv result/resonance_batch.csv
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import glob
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.extract_quantum_metrics import (
+    CircleFit,
+    circle_fit,
+    circle_ok,
+    circle_seed,
+    estimate_qi_qe,
+    fit_lorentzian,
+    initial_guess,
+    load_csv,
+    load_iq,
+    lorentzian,
+)
+from src.fast_csv import load_columns
+
+OUT_PATH = "result/resonance_batch.json"
+CHUNK_TRACES = 32
+
+# (name, sweep value or None, freqs, amps — complex I + iQ when available)
+Trace = Tuple[str, Optional[float], np.ndarray, np.ndarray]
+
+
+def _natural_key(path: str) -> List:
+    return [int(t) if t.isdigit() else t for t in re.split(r"(\d+)", os.path.basename(path))]
+
+
+def load_directory(path: str, pattern: str = "*.csv") -> List[Trace]:
+    files = sorted(glob.glob(os.path.join(path, pattern)), key=_natural_key)
+    traces = []
+    for fname in files:
+        try:
+            freqs, amps = load_iq(fname)
+        except ValueError:
+            freqs, amps = load_csv(fname)
+        if len(freqs):
+            traces.append((os.path.basename(fname), None, freqs, amps))
+    return traces
+
+
+def _amplitude(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    if "amp" in columns:
+        return np.asarray(columns["amp"], dtype=float)
+    if "abs" in columns:
+        return np.asarray(columns["abs"], dtype=float)
+    if "I" in columns and "Q" in columns:
+        return np.asarray(columns["I"], dtype=float) + 1j * np.asarray(columns["Q"], dtype=float)
+    raise ValueError("sweep needs an amp/abs column or I and Q")
+
+
+def load_sweep(path: str, sweep_column: str = "flux") -> List[Trace]:
+    """Return one trace per sweep point of a 2D ``.npz`` or long-format CSV sweep."""
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            cols = {k: data[k] for k in data.files}
+        freqs = np.asarray(cols["freq"], dtype=float)
+        amps = np.atleast_2d(_amplitude(cols))
+        sweep = cols.get("sweep", np.arange(amps.shape[0]))
+        return [(f"{sweep_column}={v:g}", float(v), freqs, row) for v, row in zip(sweep, amps)]
+
+    cols = load_columns(path)
+    if sweep_column not in cols:
+        raise ValueError(f"{path}: no sweep column {sweep_column!r} (have {', '.join(cols)})")
+    amps = _amplitude(cols)
+    values, first = np.unique(cols[sweep_column], return_index=True)
+    traces = []
+    for v in values[np.argsort(first)]:
+        sel = np.flatnonzero(cols[sweep_column] == v)
+        order = np.argsort(cols["freq"][sel], kind="stable")
+        traces.append((f"{sweep_column}={v:g}", float(v), cols["freq"][sel][order], amps[sel][order]))
+    return traces
+
+
+def load_traces(path: str, pattern: str = "*.csv", sweep_column: str = "flux") -> List[Trace]:
+    if os.path.isdir(path):
+        return load_directory(path, pattern)
+    return load_sweep(path, sweep_column)
+
+
+def warm_guess(prev: Sequence[float], freqs: np.ndarray, amps: np.ndarray) -> List[float]:
+    """Return the neighbour's solution, re-centred if the dip moved by over a linewidth."""
+    fc, ql, depth, base = prev
+    guess = [fc, ql, depth, base]
+    fc_now = float(freqs[np.argmin(amps)])
+    if ql <= 0 or abs(fc_now - fc) > fc / ql:
+        guess[0] = fc_now
+    return guess
+
+
+def _circle_row(fit) -> Dict:
+    base = abs(fit.background)
+    return {
+        "fc_GHz": fit.fc,
+        "Q_loaded": fit.ql,
+        "Q_internal": fit.qi if np.isfinite(fit.qi) else None,
+        "Q_external": fit.qe if np.isfinite(fit.qe) else None,
+        "depth": base - abs(fit.s21_min),
+        "base": base,
+        "rms": fit.rms,
+        "warm_start": False,
+        "seed": "circle",
+        "ok": True,
+    }
+
+
+def _try_circle(freqs: np.ndarray, z: np.ndarray) -> Optional[CircleFit]:
+    """Return the circle fit of ``z``, or ``None`` when it fails or is implausible."""
+    try:
+        circle = circle_fit(freqs, z)
+    except (ValueError, np.linalg.LinAlgError):
+        return None
+    return circle if circle_ok(circle, freqs) else None
+
+
+def fit_trace(freqs: np.ndarray, amps: np.ndarray, prev: Optional[Sequence[float]] = None, method: str = "lorentzian") -> Dict:
+    """Fit one trace, warm-started from ``prev`` when given.
+
+    For ``method="circle"`` complex (I/Q) traces return the circle fit as is.
+    Otherwise the magnitude fit is seeded from the neighbour (``warm``), then
+    from the circle fit of an I/Q trace (``circle``), then from the
+    half-depth estimate (``cold``), taking the first that converges; the
+    circle fit is only computed when the warm start is missing or fails.
+    """
+    iq = amps if np.iscomplexobj(amps) else None
+    amps = np.abs(amps) if iq is not None else amps
+    if iq is not None and method == "circle":
+        circle = _try_circle(freqs, iq)
+        if circle is not None:
+            return _circle_row(circle)
+        iq = None  # already failed; fall back to the magnitude seeds
+
+    def seeds() -> Iterator[Tuple[str, List[float]]]:
+        if prev is not None:
+            yield "warm", warm_guess(prev, freqs, amps)
+        if iq is not None:
+            circle = _try_circle(freqs, iq)
+            if circle is not None:
+                yield "circle", circle_seed(circle)
+        yield "cold", initial_guess(freqs, amps)
+
+    error = None
+    for seed, p0 in seeds():
+        try:
+            fc, ql, depth, base = fit_lorentzian(freqs, amps, p0)
+        except (RuntimeError, ValueError) as exc:
+            error = str(exc)
+            continue
+        if not freqs.min() <= fc <= freqs.max():
+            error = f"fitted fc {fc:g} outside the sweep"
+            continue
+        resid = amps - lorentzian(freqs, fc, ql, depth, base)
+        row = {
+            "fc_GHz": fc,
+            "Q_loaded": ql,
+            "Q_internal": None,
+            "Q_external": None,
+            "depth": depth,
+            "base": base,
+            "rms": float(np.sqrt(np.mean(resid ** 2))),
+            "warm_start": seed == "warm",
+            "seed": seed,
+            "ok": True,
+        }
+        try:
+            row["Q_internal"], row["Q_external"] = estimate_qi_qe(ql, base - depth, base)
+        except ValueError:
+            pass
+        return row
+    return {"ok": False, "error": error}
+
+
+def fit_chunk(traces: Sequence[Trace], warm_start: bool = True, method: str = "lorentzian") -> List[Dict]:
+    rows = []
+    prev = None
+    for name, sweep, freqs, amps in traces:
+        row = fit_trace(freqs, amps, prev if warm_start else None, method)
+        prev = (row["fc_GHz"], row["Q_loaded"], row["depth"], row["base"]) if row["ok"] else None
+        rows.append({"trace": name, "sweep": sweep, **row})
+    return rows
+
+
+def batch_fit(
+    traces: Sequence[Trace],
+    workers: int = 1,
+    chunk: int = CHUNK_TRACES,
+    warm_start: bool = True,
+    method: str = "lorentzian",
+) -> List[Dict]:
+    """Fit ``traces`` in contiguous chunks, in parallel when ``workers > 1``."""
+    chunks = [traces[i : i + chunk] for i in range(0, len(traces), chunk)]
+    if workers <= 1 or len(chunks) <= 1:
+        results = [fit_chunk(part, warm_start, method) for part in chunks]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(fit_chunk, chunks, [warm_start] * len(chunks), [method] * len(chunks)))
+    return [row for part in results for row in part]
+
+
+CSV_FIELDS = ["trace", "sweep", "fc_GHz", "Q_loaded", "Q_internal", "Q_external", "depth", "base", "rms", "warm_start", "seed", "ok"]
+
+
+def write_csv(rows: Sequence[Dict], path: str, fields: Sequence[str] = CSV_FIELDS) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Batch Lorentzian fitting of resonance traces")
+    p.add_argument("input", help="directory of trace CSVs, or a 2D sweep (.npz or long-format CSV)")
+    p.add_argument("-o", "--output", default=OUT_PATH, help="output JSON")
+    p.add_argument("--csv", help="also write a per-trace CSV table")
+    p.add_argument("--pattern", default="*.csv", help="file pattern inside a directory")
+    p.add_argument("--sweep-column", default="flux", help="sweep column of a long-format CSV")
+    p.add_argument("--workers", type=int, default=1, help="worker processes (0 = all CPUs)")
+    p.add_argument("--chunk", type=int, default=CHUNK_TRACES, help="traces per warm-started chunk")
+    p.add_argument("--no-warm-start", action="store_true", help="cold-start every trace")
+    p.add_argument(
+        "--method",
+        choices=["lorentzian", "circle"],
+        default="lorentzian",
+        help="magnitude fit (circle-seeded for I/Q traces) or the circle fit alone for I/Q traces",
+    )
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    traces = load_traces(args.input, args.pattern, args.sweep_column)
+    if not traces:
+        raise SystemExit(f"No traces found in {args.input}")
+    workers = args.workers or os.cpu_count() or 1
+    t0 = time.perf_counter()
+    rows = batch_fit(traces, workers, max(1, args.chunk), not args.no_warm_start, args.method)
+    elapsed = time.perf_counter() - t0
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as fh:
+        json.dump({"unit_fc": "GHz", "fits": rows}, fh, indent=2)
+    if args.csv:
+        write_csv(rows, args.csv)
+    failed = sum(1 for r in rows if not r["ok"])
+    print(f"Fitted {len(rows)} traces in {elapsed:.2f} s ({len(rows) / max(elapsed, 1e-9):.0f} traces/s), {failed} failed")
+    print(f"Wrote {args.output}" + (f" and {args.csv}" if args.csv else ""))
+
+
+if __name__ == "__main__":
+    main()
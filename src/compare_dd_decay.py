@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-import csv
 import json
 import os
 from pathlib import Path
@@ -10,19 +9,15 @@ from pathlib import Path
 import numpy as np
 import matplotlib.pyplot as plt
 
+from src.fast_csv import load_columns
 from tools import dd_simulation
 
 
 def load_dd_csv(path: str) -> tuple[np.ndarray, np.ndarray]:
-    with open(path, "r", newline="") as fh:
-        reader = csv.DictReader(fh)
-        n_list = []
-        coh = []
-        for row in reader:
-            if "N" in row and "coherence" in row:
-                n_list.append(float(row["N"]))
-                coh.append(float(row["coherence"]))
-    return np.asarray(n_list), np.asarray(coh)
+    cols = load_columns(path)
+    if "N" not in cols or "coherence" not in cols:
+        return np.array([]), np.array([])
+    return np.asarray(cols["N"]), np.asarray(cols["coherence"])
 
 
 def theory_curve(N_vals: np.ndarray, gamma: float) -> np.ndarray:
@@ -3,17 +3,37 @@
 
 Frequency unit: Hz, Power Spectral Density (PSD) unit: V^2/Hz.
 
+The input is either a precomputed ``freq, psd`` CSV or, with ``--fs``, a raw
+time series (``.npy``, a raw binary of ``--dtype`` samples, or a column of a
+CSV).  A time series is turned into a PSD by :class:`WelchAccumulator`,
+which reads it in chunks and sums the windowed, overlapping segment
+periodograms, so memory stays constant however long the capture is; the
+result equals :func:`scipy.signal.welch`.  ``--log-bins`` averages the PSD
+into logarithmically spaced frequency bins before the fit.
+
+The model ``A/w + B`` (``+ C/w²`` with ``--with-c``) is linear in its
+coefficients and is fitted in closed form by :func:`fit_noise_batch`, which
+also fits a whole stack of spectra (``.npz`` with ``freq`` and a 2D ``psd``)
+in one vectorized call.
+
 CLI Usage:
-    python compute_noise_spectrum.py INPUT.csv OUTPUT.json [--res-threshold R]
+    python compute_noise_spectrum.py INPUT.csv OUTPUT.json [--res-threshold R] [--weighting log] [--with-c]
+    python compute_noise_spectrum.py spectra.npz OUTPUT.json
+    python compute_noise_spectrum.py capture.npy OUTPUT.json --fs 1e6 --nperseg 65536 --log-bins 20
 """
 
 import json
+import os
 import warnings
-from typing import Tuple
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Sequence, Tuple
 from pathlib import Path
 
 import numpy as np
-from scipy.optimize import curve_fit
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import fft as sp_fft
+from scipy.signal import get_window
+
+from src.fast_csv import load_columns
 
 # acceptable ratio of fit residual to PSD variance
 RESIDUAL_RATIO_THRESHOLD = 0.1
@@ -21,40 +41,295 @@ RESIDUAL_RATIO_THRESHOLD = 0.1
 
 def load_csv(path: str) -> Tuple[np.ndarray, np.ndarray]:
     """Load CSV containing frequency and PSD columns."""
-    data = np.genfromtxt(path, delimiter=",", names=True)
-    if data.size == 0 or not data.dtype.names or len(data.dtype.names) < 2:
+    cols = list(load_columns(path).values())
+    if len(cols) < 2 or cols[0].size == 0:
         raise ValueError("CSV must contain at least two columns")
-    freq = np.asarray(data[data.dtype.names[0]])
-    psd = np.asarray(data[data.dtype.names[1]])
+    freq = np.asarray(cols[0])
+    psd = np.asarray(cols[1])
     if freq.size == 0 or psd.size == 0:
         raise ValueError("CSV contains no valid data")
     return freq, psd
 
 
+CHUNK_SAMPLES = 1 << 22
+RAW_DTYPES = {"int16": np.int16, "float32": np.float32, "float64": np.float64}
+
+
+class WelchAccumulator:
+    """Streaming Welch (or, with ``window="boxcar"`` and no overlap, Bartlett) PSD.
+
+    Feed real samples with :meth:`update` in chunks of any size; segments of
+    ``nperseg`` samples start every ``nperseg - noverlap`` samples, have their
+    mean removed, are windowed and their one-sided periodograms are summed.
+    Only the unfinished tail of the last chunk is kept between calls.
+    ``single`` computes the FFTs in float32, about twice as fast.
+    """
+
+    def __init__(
+        self,
+        fs: float,
+        nperseg: int = 4096,
+        noverlap: Optional[int] = None,
+        window: str = "hann",
+        single: bool = False,
+    ) -> None:
+        self.fs = float(fs)
+        self.dtype = np.float32 if single else np.float64
+        self.nperseg = int(nperseg)
+        self.noverlap = self.nperseg // 2 if noverlap is None else int(noverlap)
+        if not 0 <= self.noverlap < self.nperseg:
+            raise ValueError("noverlap must be in [0, nperseg)")
+        self.step = self.nperseg - self.noverlap
+        self.window = get_window(window, self.nperseg)
+        self._window = self.window.astype(self.dtype)
+        self.segments = 0
+        self._sum = np.zeros(self.nperseg // 2 + 1)
+        self._tail = np.empty(0, dtype=self.dtype)
+
+    def update(self, chunk: np.ndarray) -> None:
+        x = np.asarray(chunk, dtype=self.dtype).ravel()
+        if self._tail.size:
+            x = np.concatenate([self._tail, x])
+        nseg = (x.size - self.nperseg) // self.step + 1 if x.size >= self.nperseg else 0
+        if nseg > 0:
+            segs = sliding_window_view(x, self.nperseg)[: nseg * self.step : self.step]
+            segs = segs - segs.mean(axis=1, keepdims=True)
+            segs *= self._window
+            spec = sp_fft.rfft(segs, axis=1)
+            self._sum += (spec.real ** 2 + spec.imag ** 2).sum(axis=0, dtype=np.float64)
+            self.segments += nseg
+        self._tail = x[nseg * self.step :].copy()
+
+    def result(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(freq, psd)`` as :func:`scipy.signal.welch` with ``scaling="density"``."""
+        if self.segments == 0:
+            raise ValueError(f"need at least nperseg={self.nperseg} samples")
+        psd = self._sum / (self.segments * self.fs * np.sum(self.window ** 2))
+        psd[1:] *= 2.0
+        if self.nperseg % 2 == 0:
+            psd[-1] /= 2.0
+        return np.fft.rfftfreq(self.nperseg, 1.0 / self.fs), psd
+
+
+def welch_stream(
+    chunks: Iterable[np.ndarray],
+    fs: float,
+    nperseg: int = 4096,
+    noverlap: Optional[int] = None,
+    window: str = "hann",
+    single: bool = False,
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Return ``(freq, psd, segments)`` for a time series given as chunks."""
+    acc = WelchAccumulator(fs, nperseg, noverlap, window, single)
+    for chunk in chunks:
+        acc.update(chunk)
+    freq, psd = acc.result()
+    return freq, psd, acc.segments
+
+
+def iter_time_series(
+    path: str,
+    column: Optional[str] = None,
+    dtype: str = "float32",
+    chunk: int = CHUNK_SAMPLES,
+) -> Iterator[np.ndarray]:
+    """Yield a time series from ``.npy`` (memory-mapped), CSV or raw binary in chunks.
+
+    ``column`` picks a CSV column by name (default: the last column) or a
+    column of a 2D ``.npy``.
+    """
+    if path.endswith(".npy"):
+        data = np.load(path, mmap_mode="r")
+        if data.ndim > 1:
+            data = data[:, int(column) if column is not None else -1]
+    elif path.endswith(".csv"):
+        cols = load_columns(path)
+        data = cols[column] if column is not None else list(cols.values())[-1]
+        data = data[np.isfinite(data)]
+    else:
+        data = np.memmap(path, dtype=RAW_DTYPES[dtype], mode="r")
+    for start in range(0, len(data), chunk):
+        yield data[start : start + chunk]
+
+
+def log_bin(freq: np.ndarray, psd: np.ndarray, bins_per_decade: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+    """Average ``psd`` (last axis, along ``freq``) over log-spaced frequency bins.
+
+    The DC bin is dropped; each non-empty bin is reported at the geometric
+    mean of its frequencies.
+    """
+    freq = np.asarray(freq, dtype=float)
+    order = np.argsort(freq, kind="stable")
+    order = order[freq[order] > 0]
+    freq, psd = freq[order], np.asarray(psd)[..., order]
+    if freq.size == 0:
+        return freq, psd
+    lo, hi = np.log10(freq[0]), np.log10(freq[-1])
+    nbins = max(1, int(np.ceil((hi - lo) * bins_per_decade)))
+    idx = np.minimum(((np.log10(freq) - lo) / (hi - lo + 1e-300) * nbins).astype(int), nbins - 1)
+    starts = np.flatnonzero(np.diff(idx, prepend=-1))
+    counts = np.diff(np.append(starts, idx.size))
+    f_bin = np.exp(np.add.reduceat(np.log(freq), starts) / counts)
+    p_bin = np.add.reduceat(psd, starts, axis=-1) / counts
+    return f_bin, p_bin
+
+
 def noise_model(w: np.ndarray, A: float, B: float) -> np.ndarray:
     return A / np.maximum(w, 1e-12) + B
 
 
+# basis functions of the linear noise model A/w + B (+ C/w², as in
+# ``simulate_noise_spectrum.noise_theory``)
+NOISE_TERMS = {
+    "A": lambda w: 1.0 / np.maximum(w, 1e-12),
+    "B": lambda w: np.ones_like(w, dtype=float),
+    "C": lambda w: 1.0 / np.maximum(w, 1e-12) ** 2,
+}
+
+
+class NoiseFit(NamedTuple):
+    terms: Tuple[str, ...]
+    coef: np.ndarray  # (n_spectra, n_terms), non-negative
+    residual: np.ndarray  # (n_spectra,) mean squared residual
+    poor: np.ndarray  # (n_spectra,) residual > var(psd) * res_threshold
+
+    def params(self, i: int = 0) -> Dict[str, float]:
+        return {t: float(c) for t, c in zip(self.terms, self.coef[i])}
+
+
+def fit_noise_batch(
+    freq: np.ndarray,
+    psd: np.ndarray,
+    terms: Sequence[str] = ("A", "B"),
+    weighting: str = "linear",
+    res_threshold: float = RESIDUAL_RATIO_THRESHOLD,
+) -> NoiseFit:
+    """Fit ``Σ_t c_t φ_t(w)`` with ``c ≥ 0`` to every row of ``psd`` at once.
+
+    The model is linear in its coefficients, so the non-negative least-squares
+    problem is solved exactly: the optimum is the unconstrained solution on
+    one subset of the terms, so every subset (at most 7 for three terms) is
+    solved for all spectra with batched normal equations and the best
+    non-negative one is kept.  ``weighting="log"`` minimises the relative
+    residuals ``(model - psd) / psd``, the linearisation of a fit in log
+    space, which lets the 1/f corner dominate instead of the largest PSD
+    values; non-positive PSD points get zero weight.
+
+    Non-finite points (blank CSV fields load as NaN) are left out of the fit
+    and of the residual; a spectrum without finite points is a ``ValueError``.
+    """
+    terms = tuple(terms)
+    w = np.asarray(freq, dtype=float)
+    y = np.atleast_2d(np.asarray(psd, dtype=float))
+    w_ok = np.isfinite(w)
+    finite = np.isfinite(y) & w_ok
+    nfinite = finite.sum(axis=1)
+    if np.any(nfinite == 0):
+        raise ValueError("no finite PSD points to fit")
+    y = np.where(finite, y, 0.0)
+    w = np.where(w_ok, w, 1.0)
+    basis = np.stack([NOISE_TERMS[t](w) for t in terms], axis=1)  # (F, k)
+    scale = np.sqrt(np.mean(basis[w_ok] ** 2, axis=0))
+    basis = basis / scale
+    if weighting == "log":
+        wt = np.where(y > 0, 1.0 / np.where(y > 0, y, 1.0), 0.0) ** 2
+    elif weighting == "linear":
+        wt = np.ones_like(y)
+    else:
+        raise ValueError(f"unknown weighting {weighting!r}")
+    wt = np.where(finite, wt, 0.0)
+    k = len(terms)
+    gram = (wt @ (basis[:, :, None] * basis[:, None, :]).reshape(-1, k * k)).reshape(-1, k, k)
+    rhs = (wt * y) @ basis  # (S, k)
+    yy = np.einsum("sf,sf->s", wt, y * y)
+
+    best = np.zeros((y.shape[0], k))
+    best_cost = yy.copy()  # all coefficients zero
+    for mask in range(1, 1 << k):
+        idx = [i for i in range(k) if mask >> i & 1]
+        g = gram[:, idx][:, :, idx]
+        r = rhs[:, idx]
+        with np.errstate(all="ignore"):
+            try:
+                c = np.linalg.solve(g, r[:, :, None])[:, :, 0]
+            except np.linalg.LinAlgError:
+                c = np.einsum("sij,sj->si", np.linalg.pinv(g), r)
+        cost = yy - np.einsum("si,si->s", c, r)  # y'Wy - c'r at the LS optimum
+        ok = np.all(c >= 0, axis=1) & np.isfinite(cost) & (cost < best_cost)
+        best[ok] = 0.0
+        best[np.ix_(ok, idx)] = c[ok]
+        best_cost = np.where(ok, cost, best_cost)
+
+    coef = best / scale
+    model = coef @ (basis * scale).T
+    residual = np.sum(np.where(finite, y - model, 0.0) ** 2, axis=1) / nfinite
+    mean = y.sum(axis=1, keepdims=True) / nfinite[:, None]
+    variance = np.sum(np.where(finite, y - mean, 0.0) ** 2, axis=1) / nfinite
+    poor = residual > variance * res_threshold
+    return NoiseFit(terms, coef, residual, poor)
+
+
 def fit_noise(freq: np.ndarray, psd: np.ndarray) -> Tuple[float, float, float]:
     """Fit noise model to data and return A, B, and mean squared residual."""
-    popt, _ = curve_fit(
-        noise_model,
-        freq,
-        psd,
-        p0=[1e-12, 1e-12],
-        bounds=([0, 0], [np.inf, np.inf]),
-        maxfev=10000,
-    )
-    residual = np.mean((psd - noise_model(freq, *popt)) ** 2)
-    return popt[0], popt[1], residual
-
-
-def main(path: str, out_json: str, res_threshold: float = RESIDUAL_RATIO_THRESHOLD) -> None:
-    freq, psd = load_csv(path)
-    A, B, res = fit_noise(freq, psd)
-    if res > np.var(psd) * res_threshold:
-        warnings.warn("Poor fit quality detected")
-    result = {"noise_model": {"A": A, "B": B}, "residual": res}
+    fit = fit_noise_batch(freq, psd)
+    return float(fit.coef[0, 0]), float(fit.coef[0, 1]), float(fit.residual[0])
+
+
+def load_spectra(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Load ``freq`` and stacked spectra ``psd`` (``(n_spectra, n_freq)``) from ``.npz``."""
+    with np.load(path) as data:
+        return np.asarray(data["freq"], dtype=float), np.atleast_2d(np.asarray(data["psd"], dtype=float))
+
+
+def main(
+    path: str,
+    out_json: str,
+    res_threshold: float = RESIDUAL_RATIO_THRESHOLD,
+    fs: Optional[float] = None,
+    nperseg: int = 4096,
+    overlap: float = 0.5,
+    window: str = "hann",
+    column: Optional[str] = None,
+    dtype: str = "float32",
+    log_bins: int = 0,
+    psd_out: Optional[str] = None,
+    single: bool = False,
+    terms: Sequence[str] = ("A", "B"),
+    weighting: str = "linear",
+) -> None:
+    info: Dict[str, object] = {}
+    batch = fs is None and path.endswith(".npz")
+    if batch:
+        freq, psd = load_spectra(path)
+    elif fs is None:
+        freq, psd = load_csv(path)
+    else:
+        noverlap = int(round(nperseg * overlap))
+        freq, psd, segments = welch_stream(iter_time_series(path, column, dtype), fs, nperseg, noverlap, window, single)
+        freq, psd = freq[1:], psd[1:]  # the DC bin has no 1/f meaning
+        info = {"method": "welch", "fs": fs, "nperseg": nperseg, "noverlap": noverlap, "window": window, "segments": segments}
+    if log_bins:
+        freq, psd = log_bin(freq, psd, log_bins)
+        info["log_bins_per_decade"] = log_bins
+    if psd_out and not batch:
+        os.makedirs(os.path.dirname(psd_out) or ".", exist_ok=True)
+        np.savetxt(psd_out, np.column_stack([freq, psd]), delimiter=",", header="freq,psd", comments="")
+    fit = fit_noise_batch(freq, psd, terms, weighting, res_threshold)
+    if fit.poor.any():
+        warnings.warn("Poor fit quality detected" + (f" in {int(fit.poor.sum())} of {fit.poor.size} spectra" if batch else ""))
+    if batch:
+        result: Dict[str, object] = {
+            "terms": list(fit.terms),
+            "weighting": weighting,
+            "fits": [
+                {"noise_model": fit.params(i), "residual": float(fit.residual[i]), "poor_fit": bool(fit.poor[i])}
+                for i in range(fit.coef.shape[0])
+            ],
+        }
+    else:
+        result = {"noise_model": fit.params(), "residual": float(fit.residual[0])}
+    if info:
+        result["psd"] = info
     with open(out_json, "w") as fh:
         json.dump(result, fh, indent=2)
 
@@ -63,9 +338,23 @@ if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Fit noise spectrum to 1/f + white noise model")
-    parser.add_argument("input", help="CSV file with frequency [Hz] and PSD [V^2/Hz]")
+    parser.add_argument("input", help="CSV file with frequency [Hz] and PSD [V^2/Hz], or a time series with --fs")
     parser.add_argument("output", help="Output JSON path")
     parser.add_argument("--res-threshold", type=float, default=RESIDUAL_RATIO_THRESHOLD,
                         help="Warn if residual exceeds variance * threshold (default: %(default)s)")
+    parser.add_argument("--fs", type=float, help="sample rate [Hz]: treat the input as a time series")
+    parser.add_argument("--nperseg", type=int, default=4096, help="Welch segment length")
+    parser.add_argument("--overlap", type=float, default=0.5, help="segment overlap fraction (0 with boxcar = Bartlett)")
+    parser.add_argument("--window", default="hann", help="segment window (scipy.signal.get_window name)")
+    parser.add_argument("--column", help="time-series column (CSV name or .npy index; default: last)")
+    parser.add_argument("--dtype", choices=sorted(RAW_DTYPES), default="float32", help="sample type of a raw binary input")
+    parser.add_argument("--log-bins", type=int, default=0, help="average the PSD into N bins per decade before fitting")
+    parser.add_argument("--psd-out", help="write the (binned) PSD as a freq,psd CSV")
+    parser.add_argument("--float32", action="store_true", help="compute the segment FFTs in single precision")
+    parser.add_argument("--with-c", action="store_true", help="add the C/w^2 term of simulate_noise_spectrum")
+    parser.add_argument("--weighting", choices=["linear", "log"], default="linear",
+                        help="least squares on the PSD, or on relative (log-space) residuals")
     args = parser.parse_args()
-    main(args.input, args.output, args.res_threshold)
+    main(args.input, args.output, args.res_threshold, args.fs, args.nperseg, args.overlap, args.window,
+         args.column, args.dtype, args.log_bins, args.psd_out, args.float32,
+         ("A", "B", "C") if args.with_c else ("A", "B"), args.weighting)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""Find and fit every resonance in a wide multiplexed sweep.
+
+A wide VNA sweep over several readout resonators is handled in three steps:
+
+1. **Baseline removal.**  The sweep is cut into blocks of ``--block`` points;
+   an upper percentile of each block (dips occupy only a small part of a
+   block) interpolated between block centres is the off-resonant baseline.
+   The detection signal is the fractional dip ``1 - |S21| / baseline``, or
+   with ``--detect iq`` the distance between consecutive I/Q points relative
+   to its blockwise median (S21 sweeps quickly around the circle near a
+   resonance, which also catches dips too shallow to see in magnitude).
+2. **Peak finding.**  :func:`scipy.signal.find_peaks` picks the peaks higher
+   than ``--nsigma`` robust standard deviations of the signal (and at least
+   ``--min-depth``), at least ``--min-separation`` points apart.
+3. **Windowed fits.**  Around each peak a window of ``--window`` half-depth
+   widths (clipped at the midpoint to the neighbouring resonances) is cut out
+   and all windows are fitted in parallel with
+   :func:`src.batch_fit_resonance.batch_fit` — circle-seeded when I/Q is
+   available, after the cable delay (the phase slope of the whole sweep) has
+   been divided out.
+
+Input is a resonance CSV (``freq`` + ``I``/``Q`` or ``abs``) or a ``.npz``
+with ``freq`` and ``amp`` or ``I``/``Q``.
+
+Example usage::
+
+    python src/detect_resonances.py data/wide_sweep.csv -o result/resonators.json --csv result/resonators.csv
+    python src/detect_resonances.py data/wide_sweep.npz --detect iq --workers 0
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+from scipy.signal import find_peaks, peak_widths
+
+from src.batch_fit_resonance import batch_fit, load_sweep, write_csv
+from src.extract_quantum_metrics import load_csv, load_iq
+
+OUT_PATH = "result/resonators.json"
+BLOCK_POINTS = 4096
+TABLE_FIELDS = [
+    "trace", "f_detect_GHz", "f_lo_GHz", "f_hi_GHz", "signal",
+    "fc_GHz", "Q_loaded", "Q_internal", "Q_external", "depth", "base", "rms", "seed", "ok",
+]
+
+
+class Detection(NamedTuple):
+    index: int  # sample index of the peak
+    lo: int  # window start (inclusive)
+    hi: int  # window end (exclusive)
+    signal: float  # peak height of the detection signal
+
+
+def load_wide_sweep(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Return frequencies and the complex (I/Q) or real (magnitude) sweep."""
+    if path.endswith(".npz"):
+        _, _, freqs, values = load_sweep(path)[0]
+        return freqs, values
+    try:
+        return load_iq(path)
+    except ValueError:
+        return load_csv(path)
+
+
+def remove_delay(freqs: np.ndarray, z: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Divide out the cable delay (linear phase) of a complex sweep.
+
+    The delay is the slope of the unwrapped phase over the whole sweep; the
+    resonances add only local, bounded phase excursions.  Returns the
+    corrected sweep and the delay in ns (for ``freqs`` in GHz).
+    """
+    slope = np.polyfit(freqs, np.unwrap(np.angle(z)), 1)[0]
+    return z * np.exp(-1j * slope * freqs), float(-slope / (2 * np.pi))
+
+
+def block_envelope(values: np.ndarray, block: int = BLOCK_POINTS, q: float = 90.0) -> np.ndarray:
+    """Return the ``q``-th percentile of each ``block``, interpolated between block centres."""
+    n = values.size
+    block = max(1, min(block, n))
+    starts = np.arange(0, n, block)
+    levels = np.array([np.percentile(values[s : s + block], q) for s in starts])
+    centres = np.minimum(starts + block / 2.0, (starts + n) / 2.0)
+    return np.interp(np.arange(n), centres, levels)
+
+
+def _boxcar(values: np.ndarray, width: int) -> np.ndarray:
+    """Centred moving average of ``width`` points (shrinking at the ends)."""
+    csum = np.concatenate([[0], np.cumsum(values)])
+    idx = np.arange(values.size)
+    lo = np.maximum(idx - width // 2, 0)
+    hi = np.minimum(idx + (width + 1) // 2, values.size)
+    return (csum[hi] - csum[lo]) / (hi - lo)
+
+
+def detection_signal(values: np.ndarray, mode: str = "magnitude", block: int = BLOCK_POINTS, lag: int = 16) -> np.ndarray:
+    """Return the baseline-removed signal whose peaks are resonances.
+
+    The sweep is first averaged over ``lag`` points, far fewer than a
+    linewidth, so single noisy samples do not pass as peaks.  For
+    ``mode="iq"`` the speed of S21 along its path is then measured as the
+    distance between points ``lag`` apart (itself averaged over ``lag``).
+    """
+    lag = max(1, min(lag, values.size - 1))
+    smooth = _boxcar(values, lag)
+    if mode == "iq":
+        if not np.iscomplexobj(values):
+            raise ValueError("I/Q detection needs complex I/Q data")
+        step = np.zeros(values.size)
+        step[lag // 2 : lag // 2 + values.size - lag] = np.abs(smooth[lag:] - smooth[:-lag])
+        # average again: the distances are Rayleigh-like with a long tail
+        step = _boxcar(step, lag)
+        return step / np.maximum(block_envelope(step, block, 50.0), 1e-300) - 1.0
+    mag = np.abs(smooth)
+    return 1.0 - mag / np.maximum(block_envelope(mag, block, 90.0), 1e-300)
+
+
+def detect(
+    signal: np.ndarray,
+    nsigma: float = 8.0,
+    min_depth: float = 0.0,
+    min_separation: int = 10,
+    window: float = 8.0,
+    min_window: int = 32,
+    merge: float = 2.0,
+) -> List[Detection]:
+    """Return the resonances in ``signal`` with their fit windows.
+
+    Of two peaks within ``merge`` half-depth widths of the higher one (noise
+    on a flat top, or the two lobes the cable delay can give the I/Q speed)
+    only the higher is kept.
+    """
+    level = float(np.median(signal))
+    sigma = 1.4826 * float(np.median(np.abs(signal - level)))
+    height = max(level + nsigma * sigma, min_depth)
+    peaks, props = find_peaks(signal, height=height, prominence=nsigma * sigma, distance=max(1, min_separation))
+    if not peaks.size:
+        return []
+    widths = peak_widths(signal, peaks, rel_height=0.5)[0]
+    keep = np.ones(peaks.size, dtype=bool)
+    for k in np.argsort(-props["peak_heights"], kind="stable"):
+        if keep[k]:
+            near = np.abs(peaks - peaks[k]) <= merge * widths[k]
+            near[k] = False
+            keep &= ~near
+    peaks, widths, heights = peaks[keep], widths[keep], props["peak_heights"][keep]
+    half = np.maximum(window * widths, min_window / 2.0)
+    bounds = np.concatenate([[0], (peaks[1:] + peaks[:-1] + 1) // 2, [signal.size]])
+    out = []
+    for k, p in enumerate(peaks):
+        lo = max(int(p - half[k]), int(bounds[k]))
+        hi = min(int(p + half[k]) + 1, int(bounds[k + 1]))
+        out.append(Detection(int(p), lo, hi, float(heights[k])))
+    return out
+
+
+def fit_resonators(
+    freqs: np.ndarray,
+    values: np.ndarray,
+    detections: List[Detection],
+    workers: int = 1,
+    method: str = "lorentzian",
+) -> List[Dict]:
+    """Fit each detection window in parallel and return one table row per resonator."""
+    traces = [(f"r{k:02d}", None, freqs[d.lo : d.hi], values[d.lo : d.hi]) for k, d in enumerate(detections)]
+    chunk = max(1, -(-len(traces) // max(1, workers)))
+    rows = batch_fit(traces, workers, chunk, warm_start=False, method=method)
+    for row, d in zip(rows, detections):
+        row.update(
+            f_detect_GHz=float(freqs[d.index]),
+            f_lo_GHz=float(freqs[d.lo]),
+            f_hi_GHz=float(freqs[d.hi - 1]),
+            signal=d.signal,
+        )
+        row.pop("sweep", None)
+        row.pop("warm_start", None)
+    return rows
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Detect and fit all resonances in a wide sweep")
+    p.add_argument("input", help="wide sweep CSV (freq + I/Q or abs) or .npz (freq + amp or I/Q)")
+    p.add_argument("-o", "--output", default=OUT_PATH, help="output JSON")
+    p.add_argument("--csv", help="also write the per-resonator table as CSV")
+    p.add_argument("--detect", choices=["magnitude", "iq"], default="magnitude", help="detection signal")
+    p.add_argument("--block", type=int, default=BLOCK_POINTS, help="baseline block length in points")
+    p.add_argument("--nsigma", type=float, default=8.0, help="detection threshold in robust standard deviations")
+    p.add_argument("--min-depth", type=float, default=0.0, help="minimum detection signal (fractional dip)")
+    p.add_argument("--min-separation", type=int, default=10, help="minimum distance between resonances in points")
+    p.add_argument("--window", type=float, default=8.0, help="fit window half-width in half-depth widths")
+    p.add_argument("--method", choices=["lorentzian", "circle"], default="lorentzian", help="fit method for I/Q windows")
+    p.add_argument("--keep-delay", action="store_true", help="do not remove the cable delay from I/Q data before fitting")
+    p.add_argument("--workers", type=int, default=1, help="worker processes (0 = all CPUs)")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    t0 = time.perf_counter()
+    freqs, values = load_wide_sweep(args.input)
+    if freqs.size == 0:
+        raise SystemExit(f"No data found in {args.input}")
+    t_load = time.perf_counter()
+    signal = detection_signal(values, args.detect, args.block)
+    detections = detect(signal, args.nsigma, args.min_depth, args.min_separation, args.window)
+    t_detect = time.perf_counter()
+    delay = None
+    if np.iscomplexobj(values) and not args.keep_delay:
+        values, delay = remove_delay(freqs, values)
+    workers = args.workers or os.cpu_count() or 1
+    rows = fit_resonators(freqs, values, detections, workers, args.method)
+    t_fit = time.perf_counter()
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as fh:
+        json.dump({"unit_fc": "GHz", "points": int(freqs.size), "delay_ns": delay, "resonators": rows}, fh, indent=2)
+    if args.csv:
+        write_csv(rows, args.csv, TABLE_FIELDS)
+    failed = sum(1 for r in rows if not r["ok"])
+    print(
+        f"{freqs.size} points: {len(rows)} resonances ({failed} failed); "
+        f"load {t_load - t0:.2f} s, detect {t_detect - t_load:.2f} s, fit {t_fit - t_detect:.2f} s"
+    )
+    print(f"Wrote {args.output}" + (f" and {args.csv}" if args.csv else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,63 +3,203 @@
 
 Frequency column must be specified in GHz. Output JSON will include units.
 
+When the CSV has ``I``/``Q`` columns, the complex S21 is first fitted in
+closed form (:func:`circle_fit`): a notch resonance
+``S21 = a (1 - (Ql/Qe) / (1 + 2i Ql (f - fc)/fc))`` is a bilinear function
+``(A + B f) / (1 + C f)`` of frequency, so ``A``, ``B``, ``C`` follow from a
+linear least-squares solve (re-weighted once, then polished by a few 3×3
+Gauss-Newton steps).  The pole of ``1 + C f`` gives ``fc`` and ``Ql``; the
+background ``B / C`` and the value at ``fc`` give ``Qe`` and ``Qi``.  The
+result seeds the magnitude fit, or with ``--method circle`` is used as the
+answer directly.
+
 CLI Usage:
-    python extract_quantum_metrics.py INPUT.csv OUTPUT.json
+    python extract_quantum_metrics.py INPUT.csv OUTPUT.json [--method circle]
 """
-import csv
 import json
 import math
-from typing import Tuple, List
+from typing import List, NamedTuple, Optional, Tuple
 
 import numpy as np
 from scipy.optimize import curve_fit
 
+from src.fast_csv import load_columns
+
+
+def _frequency_column(cols) -> Optional[np.ndarray]:
+    if "freq" in cols:
+        return cols["freq"]
+    return cols.get("timestamp")
+
 
 def load_csv(path: str) -> Tuple[np.ndarray, np.ndarray]:
-    with open(path, "r", newline="") as fh:
-        reader = csv.DictReader(fh)
-        freqs = []
-        amps = []
-        for row in reader:
-            if "freq" in row:
-                f = float(row["freq"])
-            elif "timestamp" in row:
-                f = float(row["timestamp"])
-            else:
-                continue
-            if "I" in row and "Q" in row:
-                i = float(row["I"])
-                q = float(row["Q"])
-                amp = math.hypot(i, q)
-            elif "abs" in row:
-                amp = float(row["abs"])
-            else:
-                continue
-            freqs.append(f)
-            amps.append(amp)
-    return np.array(freqs), np.array(amps)
+    cols = load_columns(path)
+    freqs = _frequency_column(cols)
+    if "I" in cols and "Q" in cols:
+        amps = np.hypot(cols["I"], cols["Q"])
+    elif "abs" in cols:
+        amps = cols["abs"]
+    else:
+        amps = None
+    if freqs is None or amps is None:
+        return np.array([]), np.array([])
+    keep = np.isfinite(freqs) & np.isfinite(amps)
+    return np.asarray(freqs[keep]), np.asarray(amps[keep])
+
+
+def load_iq(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Return frequencies and complex ``I + iQ``; ``ValueError`` without I/Q columns."""
+    cols = load_columns(path)
+    freqs = _frequency_column(cols)
+    if freqs is None or "I" not in cols or "Q" not in cols:
+        raise ValueError(f"{path}: no I/Q columns")
+    keep = np.isfinite(freqs) & np.isfinite(cols["I"]) & np.isfinite(cols["Q"])
+    return np.asarray(freqs[keep]), cols["I"][keep] + 1j * cols["Q"][keep]
 
 
 def lorentzian(f: np.ndarray, fc: float, ql: float, depth: float, base: float) -> np.ndarray:
     return base - depth / (1.0 + 4.0 * ql ** 2 * ((f - fc) / fc) ** 2)
 
 
-def fit_lorentzian(freqs: np.ndarray, amps: np.ndarray) -> Tuple[float, float, float, float]:
-    fc_guess = freqs[np.argmin(amps)]
-    q_guess = 1e4
-    depth_guess = max(amps) - min(amps)
-    base_guess = max(amps)
+def lorentzian_jacobian(f: np.ndarray, fc: float, ql: float, depth: float, base: float) -> np.ndarray:
+    """Return ``d lorentzian / d (fc, ql, depth, base)`` as an ``(len(f), 4)`` array."""
+    x = (f - fc) / fc
+    u = 4.0 * ql ** 2 * x ** 2
+    inv = 1.0 / (1.0 + u)
+    scale = depth * inv ** 2
+    jac = np.empty((np.size(f), 4))
+    jac[:, 0] = scale * (-8.0 * ql ** 2 * x * f / fc ** 2)
+    jac[:, 1] = scale * 8.0 * ql * x ** 2
+    jac[:, 2] = -inv
+    jac[:, 3] = 1.0
+    return jac
+
+
+def initial_guess(freqs: np.ndarray, amps: np.ndarray) -> List[float]:
+    """Return ``[fc, ql, depth, base]`` from the dip minimum and its half-depth width.
+
+    The width is that of the contiguous run below half depth around the
+    minimum, so isolated noisy points elsewhere in the sweep do not widen it.
+    """
+    i_min = int(np.argmin(amps))
+    fc = float(freqs[i_min])
+    base = float(np.max(amps))
+    depth = base - float(amps[i_min])
+    above = np.flatnonzero(amps >= base - depth / 2)
+    lo = above[above < i_min]
+    hi = above[above > i_min]
+    left = lo[-1] + 1 if lo.size else 0
+    right = hi[0] - 1 if hi.size else len(amps) - 1
+    width = float(abs(freqs[right] - freqs[left])) if right > left else 0.0
+    ql = fc / width if width > 0 and fc > 0 else 1e4
+    return [fc, ql, depth, base]
+
+
+def fit_lorentzian(freqs: np.ndarray, amps: np.ndarray, p0=None) -> Tuple[float, float, float, float]:
+    """Fit :func:`lorentzian` with its analytic Jacobian.
+
+    ``p0`` defaults to :func:`initial_guess`; pass a neighbouring trace's
+    solution to warm-start a sweep.
+    """
     popt, _ = curve_fit(
         lorentzian,
         freqs,
         amps,
-        p0=[fc_guess, q_guess, depth_guess, base_guess],
+        p0=initial_guess(freqs, amps) if p0 is None else p0,
+        jac=lorentzian_jacobian,
         bounds=([0, 0, 0, 0], [np.inf, np.inf, np.inf, np.inf]),
+        x_scale="jac",
         maxfev=10000,
     )
     return tuple(popt)
 
 
+class CircleFit(NamedTuple):
+    fc: float
+    ql: float
+    qi: float
+    qe: float
+    background: complex  # off-resonant S21 (the prefactor ``a``)
+    s21_min: complex  # S21 at ``fc``
+    rms: float
+
+
+def _solve_normal(M: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+    """Least-squares solution of ``M x = rhs`` via the (small) normal equations."""
+    MH = M.conj().T
+    return np.linalg.solve(MH @ M, MH @ rhs)
+
+
+def circle_fit(freqs: np.ndarray, z: np.ndarray, iterations: int = 2, refine: int = 10) -> CircleFit:
+    """Closed-form fit of complex S21 to a notch resonance (see module docstring).
+
+    ``z = (A + B u) / (1 + C u)`` with ``u`` the centred, scaled frequency is
+    linear in ``A``, ``B``, ``C`` after multiplying out.  ``iterations``
+    passes re-weight the rows by ``1 / |1 + C u|`` so that the residual
+    approximates the true one; up to ``refine`` Gauss-Newton steps on the
+    true residual (the model is holomorphic in ``A``, ``B``, ``C``, so each
+    step is again a 3×3 complex solve) remove the remaining noise bias.
+    """
+    f = np.asarray(freqs, dtype=float)
+    z = np.asarray(z, dtype=complex)
+    f0 = float(f.mean())
+    scale = float(np.ptp(f)) or 1.0
+    u = (f - f0) / scale
+    # z = A + B u - C u z
+    M = np.column_stack([np.ones_like(z), u, -u * z])
+    # start the weights from the pole of the magnitude guess, so that the
+    # noise of the far-off-resonance rows (which enters through ``u z``)
+    # does not dominate the first solve
+    fc0, ql0, _, _ = initial_guess(f, np.abs(z))
+    C = -scale / (fc0 - 0.5j * fc0 / ql0 - f0)
+    for _ in range(max(1, iterations)):
+        w = 1.0 / np.maximum(np.abs(1.0 + C * u), 1e-12)
+        A, B, C = _solve_normal(M * w[:, None], z * w)
+    p = np.array([A, B, C])
+    cost = np.inf
+    for _ in range(refine):
+        den = 1.0 + p[2] * u
+        model = (p[0] + p[1] * u) / den
+        resid = z - model
+        new_cost = float(np.vdot(resid, resid).real)
+        if new_cost >= cost:
+            p = prev  # the last step did not help
+            break
+        J = np.column_stack([1.0 / den, u / den, -model * u / den])
+        prev, cost = p, new_cost
+        p = p + _solve_normal(J, resid)
+    A, B, C = p
+    if C == 0:
+        raise ValueError("no resonance found in the S21 data")
+    pole = f0 + scale * (-1.0 / C)
+    fc = float(pole.real)
+    ql = float(fc / (2.0 * abs(pole.imag)))
+    background = complex(B / C)
+    uc = (fc - f0) / scale
+    s21_min = complex((A + B * uc) / (1.0 + C * uc))
+    k = 1.0 - s21_min / background  # Ql / Qe (complex for asymmetric lines)
+    qe = ql / k.real if k.real > 0 else math.inf
+    qi = ql / (1.0 - k.real) if k.real < 1 else math.inf
+    model = (A + B * u) / (1.0 + C * u)
+    rms = float(np.sqrt(np.mean(np.abs(z - model) ** 2)))
+    return CircleFit(fc, ql, qi, qe, background, s21_min, rms)
+
+
+def circle_seed(fit: CircleFit) -> List[float]:
+    """Return ``[fc, ql, depth, base]`` for :func:`fit_lorentzian` from a circle fit."""
+    base = abs(fit.background)
+    return [fit.fc, fit.ql, max(base - abs(fit.s21_min), 0.0), base]
+
+
+def circle_ok(fit: CircleFit, freqs: np.ndarray) -> bool:
+    """Whether a circle fit is usable: finite, positive ``Ql`` and ``fc`` inside the sweep."""
+    return (
+        np.isfinite([fit.fc, fit.ql, fit.rms]).all()
+        and fit.ql > 0
+        and float(np.min(freqs)) <= fit.fc <= float(np.max(freqs))
+    )
+
+
 def estimate_qi_qe(ql: float, amp_min: float, base: float) -> Tuple[float, float]:
     s_min = amp_min / base if base != 0 else 1.0
     if s_min >= 1.0:
@@ -71,13 +211,27 @@ def estimate_qi_qe(ql: float, amp_min: float, base: float) -> Tuple[float, float
     return qi, qe
 
 
-def main(path: str, out_json: str) -> None:
+def main(path: str, out_json: str, method: str = "lorentzian") -> None:
     freqs, amps = load_csv(path)
     if len(freqs) == 0:
         raise RuntimeError("No data found in CSV")
-    fc, ql, depth, base = fit_lorentzian(freqs, amps)
-    amp_min = lorentzian(fc, fc, ql, depth, base)
-    qi, qe = estimate_qi_qe(ql, amp_min, base)
+    circle: Optional[CircleFit] = None
+    try:
+        circle = circle_fit(*load_iq(path))
+    except (ValueError, np.linalg.LinAlgError):
+        if method == "circle":
+            raise
+    if circle is not None and not circle_ok(circle, freqs):
+        if method == "circle":
+            raise RuntimeError("circle fit failed: no resonance inside the sweep")
+        circle = None
+    if method == "circle":
+        fc, ql, qi, qe = circle.fc, circle.ql, circle.qi, circle.qe
+    else:
+        p0 = circle_seed(circle) if circle is not None else None
+        fc, ql, depth, base = fit_lorentzian(freqs, amps, p0)
+        amp_min = lorentzian(fc, fc, ql, depth, base)
+        qi, qe = estimate_qi_qe(ql, amp_min, base)
     result = {
         "fc_GHz": fc,
         "Q_loaded": ql,
@@ -95,5 +249,11 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Extract Q factors from resonance data")
     parser.add_argument("input", help="CSV file with freq [GHz] and amplitude")
     parser.add_argument("output", help="Output JSON path")
+    parser.add_argument(
+        "--method",
+        choices=["lorentzian", "circle"],
+        default="lorentzian",
+        help="magnitude fit (seeded by the circle fit when I/Q is available) or the circle fit alone",
+    )
     args = parser.parse_args()
-    main(args.input, args.output)
+    main(args.input, args.output, args.method)
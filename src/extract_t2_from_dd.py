@@ -13,14 +13,16 @@ from scipy.optimize import curve_fit
 import matplotlib.pyplot as plt
 import warnings
 
+from src.fast_csv import load_columns
+
 
 def load_csv(path: str, allow_negative: bool = False) -> Tuple[np.ndarray, np.ndarray]:
     """Load DD data. Columns: N and coherence signal."""
-    data = np.genfromtxt(path, delimiter=",", names=True)
-    if data.size == 0 or not data.dtype.names or len(data.dtype.names) < 2:
+    cols = list(load_columns(path).values())
+    if len(cols) < 2 or cols[0].size == 0:
         raise ValueError("CSV must contain at least two columns")
-    n = np.asarray(data[data.dtype.names[0]])
-    signal = np.asarray(data[data.dtype.names[1]])
+    n = np.asarray(cols[0])
+    signal = np.asarray(cols[1])
     mask = ~np.isnan(signal)
     n = n[mask]
     signal = signal[mask]
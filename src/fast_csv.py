@@ -0,0 +1,168 @@
+"""Fast loading of numeric CSV files with a binary sidecar cache.
+
+:func:`load_columns` parses a CSV with a header row into one float array per
+column.  The body is read ``chunk_rows`` lines at a time with
+:func:`numpy.loadtxt` (C parser); a chunk it rejects — empty fields or text —
+is re-parsed with :func:`numpy.genfromtxt`, which turns such fields into
+NaN exactly like the ``genfromtxt(..., names=True)`` calls it replaces.
+
+The parsed table is stored column-major next to the CSV as ``NAME.csv.npy``
+with a ``NAME.csv.npy.json`` key holding the column names, the file size, its
+modification time and a BLAKE2 hash of the first and last MiB.  When the key
+still matches, later calls memory-map the ``.npy`` instead of parsing the
+text again; a cache that cannot be written (read-only directory) is skipped.
+A stale sidecar is replaced, never overwritten in place, so arrays from
+earlier calls keep their values when the CSV grows.
+"""
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+import warnings
+from typing import Dict, List, Optional
+
+import numpy as np
+
+CHUNK_ROWS = 1 << 18
+HASH_BYTES = 1 << 20
+
+
+def cache_path(path: str, cache_dir: Optional[str] = None) -> str:
+    """Return the ``.npy`` sidecar path for ``path``."""
+    if cache_dir is None:
+        return path + ".npy"
+    return os.path.join(cache_dir, os.path.basename(path) + ".npy")
+
+
+def file_key(path: str) -> Dict[str, object]:
+    """Return the size, mtime and head/tail hash identifying the contents of ``path``."""
+    st = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        digest.update(fh.read(HASH_BYTES))
+        if st.st_size > HASH_BYTES:
+            fh.seek(max(HASH_BYTES, st.st_size - HASH_BYTES))
+            digest.update(fh.read(HASH_BYTES))
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digest.hexdigest()}
+
+
+def _parse_header(line: str) -> List[str]:
+    return [name.strip().strip('"').strip("'") for name in line.rstrip("\r\n").split(",")]
+
+
+def _parse_chunk(lines: List[str], ncols: int) -> np.ndarray:
+    """Return a ``(ncols, len(lines))`` array; unparsable fields become NaN."""
+    try:
+        block = np.loadtxt(lines, delimiter=",", dtype=np.float64, ndmin=2)
+    except ValueError:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            block = np.genfromtxt(lines, delimiter=",", dtype=np.float64, invalid_raise=False)
+        block = block.reshape(-1, ncols) if block.size % ncols == 0 else np.atleast_2d(block)
+    if block.shape[1] != ncols:
+        raise ValueError(f"expected {ncols} columns, got {block.shape[1]}")
+    return block.T
+
+
+def parse_csv(path: str, chunk_rows: int = CHUNK_ROWS) -> Dict[str, np.ndarray]:
+    """Parse ``path`` without touching the cache."""
+    with open(path, "r", encoding="utf-8", newline="") as fh:
+        header = fh.readline()
+        if not header.strip():
+            return {}
+        names = _parse_header(header)
+        parts = []
+        while True:
+            raw = list(itertools.islice(fh, chunk_rows))
+            if not raw:
+                break
+            lines = [ln for ln in raw if ln.strip()]
+            if lines:
+                parts.append(_parse_chunk(lines, len(names)))
+    table = np.concatenate(parts, axis=1) if parts else np.empty((len(names), 0))
+    return dict(zip(names, table))
+
+
+def _read_cache(path: str, npy: str) -> Optional[Dict[str, np.ndarray]]:
+    try:
+        with open(npy + ".json", "r", encoding="utf-8") as fh:
+            meta = json.load(fh)
+        if meta.get("key") != file_key(path):
+            return None
+        table = np.load(npy, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    return dict(zip(meta["names"], table))
+
+
+def _umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+def _write_cache(path: str, npy: str, columns: Dict[str, np.ndarray]) -> None:
+    """Write the sidecar to temporary files and move them into place.
+
+    Replacing (rather than rewriting) the ``.npy`` leaves the arrays returned
+    by an earlier call, which may still map the old file, untouched.  The
+    ``.npy`` is replaced before its key, so a stale key never describes it.
+    """
+    names = list(columns)
+    nrows = len(next(iter(columns.values()))) if columns else 0
+    key = file_key(path)
+    tmp_npy = tmp_json = None
+    try:
+        directory = os.path.dirname(npy) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_npy = tempfile.mkstemp(suffix=".npy", dir=directory)
+        os.close(fd)
+        table = np.lib.format.open_memmap(tmp_npy, mode="w+", dtype=np.float64, shape=(len(names), nrows))
+        for row, name in zip(table, names):
+            row[:] = columns[name]
+        table.flush()
+        del table
+        fd, tmp_json = tempfile.mkstemp(suffix=".json", dir=directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump({"names": names, "key": key}, fh)
+        # mkstemp creates 0600 files; give the sidecar the usual umask mode so
+        # other users of a shared directory can read it
+        mode = 0o666 & ~_umask()
+        os.chmod(tmp_npy, mode)
+        os.chmod(tmp_json, mode)
+        os.replace(tmp_npy, npy)
+        tmp_npy = None
+        os.replace(tmp_json, npy + ".json")
+        tmp_json = None
+    except OSError:
+        pass
+    finally:
+        for tmp in (tmp_npy, tmp_json):
+            if tmp is not None and os.path.exists(tmp):
+                os.remove(tmp)
+
+
+def load_columns(
+    path: str,
+    cache: bool = True,
+    cache_dir: Optional[str] = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> Dict[str, np.ndarray]:
+    """Return ``{column name: float array}`` for a numeric CSV with a header row.
+
+    Columns keep the header order.  With ``cache`` the arrays of a re-run are
+    read-only memory maps of the sidecar written by the first run.
+    """
+    if not cache:
+        return parse_csv(path, chunk_rows)
+    npy = cache_path(path, cache_dir)
+    cached = _read_cache(path, npy)
+    if cached is not None:
+        return cached
+    columns = parse_csv(path, chunk_rows)
+    if columns:
+        _write_cache(path, npy, columns)
+    return columns
@@ -15,6 +15,8 @@ from typing import Dict, Any
 
 import numpy as np
 
+from src.fast_csv import load_columns
+
 
 def load_json(path: str | Path) -> Dict[str, Any]:
     with open(path, "r") as fh:
@@ -23,11 +25,11 @@ def load_json(path: str | Path) -> Dict[str, Any]:
 
 def compute_temp_drift(path: str | Path) -> float:
     """Return temperature drift rate dT/dt from CSV."""
-    data = np.genfromtxt(path, delimiter=",", names=True)
-    if data.size == 0 or len(data.dtype.names) < 2:
+    cols = list(load_columns(str(path)).values())
+    if len(cols) < 2 or cols[0].size == 0:
         return 0.0
-    t = np.asarray(data[data.dtype.names[0]], dtype=float)
-    temp = np.asarray(data[data.dtype.names[1]], dtype=float)
+    t = np.asarray(cols[0], dtype=float)
+    temp = np.asarray(cols[1], dtype=float)
     if t.size < 2:
         return 0.0
     coeffs = np.polyfit(t, temp, 1)
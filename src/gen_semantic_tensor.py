@@ -1,14 +1,41 @@
 #!/usr/bin/env python3
-"""Generate semantic tensor (16x16) from weighted coupling map."""
+"""Generate the semantic tensor from the weighted coupling map.
+
+The tensor is built as a SciPy CSR matrix directly from the edge list and
+saved as an uncompressed ``.npz`` in the layout of
+:func:`scipy.sparse.save_npz`, so it loads with ``scipy.sparse.load_npz`` and
+can also be memory-mapped with :func:`load_npz_mmap`.  The dense CSV and JSON
+forms (the original output, useful for small layouts) are streamed a block of
+rows at a time and only written when requested.
+
+Example usage::
+
+    python src/gen_semantic_tensor.py                 # result/semantic_tensor.npz
+    python src/gen_semantic_tensor.py --csv --json    # also the dense text files
+"""
 from __future__ import annotations
 
+import argparse
 import csv
 import json
 import os
-from typing import Dict, List
+import zipfile
+from typing import Dict, List, TextIO
+
+import numpy as np
+from scipy import sparse
+
+from src.gen_semantic_weights import EdgeStore
 
 SUBSCRIPT_MAP = str.maketrans("₀₁₂₃₄₅₆₇₈₉", "0123456789")
 
+MAP_PATH = "result/logic_physical_map.json"
+EDGE_PATH = "result/semantic_coupling_map.json"
+NPZ_PATH = "result/semantic_tensor.npz"
+CSV_PATH = "result/semantic_tensor.csv"
+JSON_PATH = "result/semantic_tensor.json"
+CHUNK_ROWS = 1024
+
 
 def logical_index(label: str) -> int:
     digits = label.replace("ψ", "").translate(SUBSCRIPT_MAP)
@@ -46,6 +73,130 @@ def build_tensor(states: List[str], edges: List[Dict[str, object]]) -> List[List
     return tensor
 
 
+def build_sparse_tensor(states: List[str], edges: List[Dict[str, object]]) -> sparse.csr_matrix:
+    """Return the symmetric tensor of :func:`build_tensor` as a CSR matrix.
+
+    As in the dense version, a later edge for the same pair overrides an
+    earlier one; explicit zeros are dropped.
+    """
+    idx = {s: i for i, s in enumerate(states)}
+    q1, q2, w = [], [], []
+    for e in edges:
+        i = idx.get(e["q1"])
+        j = idx.get(e["q2"])
+        if i is None or j is None:
+            continue
+        q1.append(i)
+        q2.append(j)
+        w.append(float(e.get("semantic_weight", 0)))
+    return symmetric_csr(len(states), np.asarray(q1, dtype=np.int64), np.asarray(q2, dtype=np.int64), np.asarray(w, dtype=np.float64))
+
+
+def build_tensor_from_store(states: List[str], store_path: str) -> sparse.csr_matrix:
+    """Return the tensor from a ``gen_semantic_weights.py`` edge store directory."""
+    store = EdgeStore(store_path, mode="r")
+    idx = {s: i for i, s in enumerate(states)}
+    remap = np.array([idx.get(s, -1) for s in store.states], dtype=np.int64)
+    q1 = remap[store.q1]
+    q2 = remap[store.q2]
+    keep = (q1 >= 0) & (q2 >= 0)
+    return symmetric_csr(len(states), q1[keep], q2[keep], np.asarray(store.weight)[keep])
+
+
+def symmetric_csr(n: int, q1: np.ndarray, q2: np.ndarray, w: np.ndarray) -> sparse.csr_matrix:
+    """Return the symmetric CSR matrix with ``w`` at ``(q1, q2)`` and ``(q2, q1)``.
+
+    Entries are applied in order, so a later edge for a pair wins.
+    """
+    r = np.stack([q1, q2], axis=1).ravel()
+    c = np.stack([q2, q1], axis=1).ravel()
+    v = np.repeat(w, 2)
+    # keep the last write of every (row, col)
+    _, last = np.unique((r * n + c)[::-1], return_index=True)
+    keep = len(r) - 1 - last
+    mat = sparse.csr_matrix((v[keep], (r[keep], c[keep])), shape=(n, n))
+    mat.eliminate_zeros()
+    mat.sort_indices()
+    return mat
+
+
+def save_npz(matrix: sparse.spmatrix, path: str) -> None:
+    """Write ``matrix`` as an uncompressed (memory-mappable) ``.npz``."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    sparse.save_npz(path, sparse.csr_matrix(matrix), compressed=False)
+
+
+def _member_memmap(path: str, zf: zipfile.ZipFile, name: str) -> np.ndarray:
+    info = zf.getinfo(name)
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ValueError(f"{path}: {name} is compressed and cannot be memory-mapped")
+    with open(path, "rb") as fh:
+        fh.seek(info.header_offset + 26)
+        name_len, extra_len = np.frombuffer(fh.read(4), dtype="<u2")
+        start = info.header_offset + 30 + int(name_len) + int(extra_len)
+        fh.seek(start)
+        version = np.lib.format.read_magic(fh)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(fh)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(fh)
+        offset = fh.tell()
+    if dtype.hasobject:
+        raise ValueError(f"{path}: {name} holds Python objects")
+    if not shape or 0 in shape:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape, order="F" if fortran else "C")
+
+
+def load_npz_mmap(path: str) -> sparse.csr_matrix:
+    """Return the CSR matrix in ``path`` with its arrays memory-mapped."""
+    with zipfile.ZipFile(path) as zf:
+        with zf.open("format.npy") as fh:
+            fmt = np.lib.format.read_array(fh).item()
+        with zf.open("shape.npy") as fh:
+            shape = tuple(int(x) for x in np.lib.format.read_array(fh))
+        if (fmt.decode() if isinstance(fmt, bytes) else fmt) != "csr":
+            raise ValueError(f"{path}: expected a CSR matrix, got {fmt!r}")
+        data, indices, indptr = (_member_memmap(path, zf, f"{k}.npy") for k in ("data", "indices", "indptr"))
+    return sparse.csr_matrix((data, indices, indptr), shape=shape, copy=False)
+
+
+def _row_blocks(matrix: sparse.csr_matrix, chunk_rows: int):
+    for start in range(0, matrix.shape[0], chunk_rows):
+        yield matrix[start : start + chunk_rows].toarray().tolist()
+
+
+def stream_csv(matrix: sparse.csr_matrix, path: str, chunk_rows: int = CHUNK_ROWS) -> None:
+    """Write the dense rows of ``matrix`` as CSV, ``chunk_rows`` at a time."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        for block in _row_blocks(matrix, chunk_rows):
+            writer.writerows(block)
+
+
+def _write_json_rows(fh: TextIO, matrix: sparse.csr_matrix, chunk_rows: int) -> None:
+    if matrix.shape[0] == 0:
+        fh.write("[]")
+        return
+    fh.write("[\n")
+    first = True
+    for block in _row_blocks(matrix, chunk_rows):
+        for row in block:
+            if not first:
+                fh.write(",\n")
+            first = False
+            fh.write("  [\n    " + ",\n    ".join(json.dumps(v) for v in row) + "\n  ]")
+    fh.write("\n]")
+
+
+def stream_json(matrix: sparse.csr_matrix, path: str, chunk_rows: int = CHUNK_ROWS) -> None:
+    """Write ``matrix`` as the dense ``indent=2`` JSON of :func:`save_json`, streamed."""
+    with open(path, "w", encoding="utf-8") as fh:
+        _write_json_rows(fh, matrix, chunk_rows)
+        fh.write("\n")
+
+
 def save_csv(matrix: List[List[float]], path: str) -> None:
     os.makedirs(os.path.dirname(path), exist_ok=True)
     with open(path, "w", newline="", encoding="utf-8") as fh:
@@ -59,18 +210,35 @@ def save_json(matrix: List[List[float]], path: str) -> None:
         fh.write("\n")
 
 
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Generate the semantic tensor from the weighted coupling map")
+    p.add_argument("--map", default=MAP_PATH, help="logical state map JSON")
+    p.add_argument("--edges", default=EDGE_PATH, help="semantic coupling map JSON or edge store directory")
+    p.add_argument("-o", "--output", default=NPZ_PATH, help="sparse tensor (.npz)")
+    p.add_argument("--csv", nargs="?", const=CSV_PATH, help=f"also write the dense CSV (default {CSV_PATH})")
+    p.add_argument("--json", nargs="?", const=JSON_PATH, help=f"also write the dense JSON (default {JSON_PATH})")
+    p.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="rows per block when streaming CSV/JSON")
+    return p.parse_args()
+
+
 def main() -> None:
-    map_path = "result/logic_physical_map.json"
-    edge_path = "result/semantic_coupling_map.json"
-    csv_path = "result/semantic_tensor.csv"
-    json_path = "result/semantic_tensor.json"
-
-    states = load_states(map_path)
-    edges = load_edges(edge_path)
-    tensor = build_tensor(states, edges)
-    save_csv(tensor, csv_path)
-    save_json(tensor, json_path)
-    print(f"Wrote {csv_path} and {json_path}")
+    args = parse_args()
+    states = load_states(args.map)
+    if os.path.isdir(args.edges):
+        tensor = build_tensor_from_store(states, args.edges)
+    else:
+        tensor = build_sparse_tensor(states, load_edges(args.edges))
+    save_npz(tensor, args.output)
+    written = [args.output]
+    if args.csv:
+        stream_csv(tensor, args.csv, args.chunk_rows)
+        written.append(args.csv)
+    if args.json:
+        stream_json(tensor, args.json, args.chunk_rows)
+        written.append(args.json)
+    n = tensor.shape[0]
+    print(f"{n} states, {tensor.nnz} non-zeros ({tensor.nnz / max(n * n, 1):.2%} dense)")
+    print(f"Wrote {' and '.join(written)}")
 
 
 if __name__ == "__main__":
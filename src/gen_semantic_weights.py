@@ -1,12 +1,123 @@
 #!/usr/bin/env python3
-"""Generate semantic-weighted coupling map from physical proximity."""
+"""Generate semantic-weighted coupling map from physical proximity.
 
+Weights are computed column-wise: the candidate list is turned into
+``distance``/``coupled`` arrays and a kernel from :data:`KERNELS` is evaluated
+with NumPy ufuncs, writing into the output array in place.  Uncoupled pairs
+get weight 0 and weights are rounded to ``--decimals`` places (4 by default,
+as before).
+
+For large candidate sets the columns can be kept in a binary edge store
+(:class:`EdgeStore`): a directory of ``.npy`` files opened as memory maps.
+Re-weighting rewrites the ``weight`` column in place in blocks, and
+``--update`` changes only the listed pairs and re-weights just those rows.
+
+Example usage::
+
+    python src/gen_semantic_weights.py                                   # JSON in, JSON out
+    python src/gen_semantic_weights.py --kernel gaussian --param sigma=1.2
+    python src/gen_semantic_weights.py --store result/semantic_edges     # also build the edge store
+    python src/gen_semantic_weights.py --store result/semantic_edges --update changed_pairs.json
+"""
+from __future__ import annotations
+
+import argparse
+import inspect
 import json
-import math
-from typing import List, Dict
+import os
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 INPUT_PATH = "result/coupling_candidates.json"
 OUTPUT_PATH = "result/semantic_coupling_map.json"
+DEFAULT_DISTANCE = 999
+BLOCK = 1 << 22
+
+SUBSCRIPT_MAP = str.maketrans("₀₁₂₃₄₅₆₇₈₉", "0123456789")
+
+
+def logical_index(label: str) -> int:
+    digits = label.replace("ψ", "").translate(SUBSCRIPT_MAP)
+    try:
+        return int(digits)
+    except ValueError:
+        return 0
+
+
+# -- kernels -----------------------------------------------------------------
+# Each kernel writes w(d) for the distances ``d`` into ``out`` using ufuncs.
+
+
+def _exponential(d: np.ndarray, out: np.ndarray, alpha: float = 0.7) -> None:
+    np.multiply(d, -alpha, out=out)
+    np.exp(out, out=out)
+
+
+def _gaussian(d: np.ndarray, out: np.ndarray, sigma: float = 1.0) -> None:
+    np.divide(d, sigma, out=out)
+    np.square(out, out=out)
+    np.multiply(out, -0.5, out=out)
+    np.exp(out, out=out)
+
+
+def _power(d: np.ndarray, out: np.ndarray, p: float = 2.0, d0: float = 1.0) -> None:
+    np.maximum(d, d0, out=out)
+    np.divide(out, d0, out=out)
+    np.power(out, -p, out=out)
+
+
+def _cutoff(d: np.ndarray, out: np.ndarray, radius: float = 1.5) -> None:
+    np.less_equal(d, radius, out=out, casting="unsafe")
+
+
+KERNELS: Dict[str, Callable[..., None]] = {
+    "exponential": _exponential,
+    "gaussian": _gaussian,
+    "power": _power,
+    "cutoff": _cutoff,
+}
+
+
+def parse_param(text: str) -> Tuple[str, float]:
+    """Parse ``NAME=VALUE`` for ``--param``."""
+    name, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got {text!r}")
+    return name.strip(), float(value)
+
+
+def check_params(kernel: str, params: Optional[Dict[str, float]] = None) -> None:
+    """Raise ``ValueError`` for an unknown kernel or a parameter it does not take."""
+    if kernel not in KERNELS:
+        raise ValueError(f"Unknown kernel {kernel!r}; choose from {', '.join(KERNELS)}")
+    accepted = list(inspect.signature(KERNELS[kernel]).parameters)[2:]
+    unknown = sorted(set(params or {}) - set(accepted))
+    if unknown:
+        raise ValueError(f"Kernel {kernel!r} takes {', '.join(accepted)}; got {', '.join(unknown)}")
+
+
+def compute_weights(
+    distance: np.ndarray,
+    coupled: np.ndarray,
+    kernel: str = "exponential",
+    params: Optional[Dict[str, float]] = None,
+    decimals: Optional[int] = 4,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Return kernel weights for coupled pairs (0 elsewhere), written into ``out``."""
+    check_params(kernel, params)
+    d = np.asarray(distance, dtype=np.float64)
+    if out is None:
+        out = np.empty(d.shape, dtype=np.float64)
+    KERNELS[kernel](d, out, **(params or {}))
+    if decimals is not None:
+        np.round(out, decimals, out=out)
+    np.multiply(out, np.asarray(coupled, dtype=bool), out=out)
+    return out
+
+
+# -- JSON pipeline -------------------------------------------------------------
 
 
 def load_pairs(path: str) -> List[Dict]:
@@ -14,28 +125,222 @@ def load_pairs(path: str) -> List[Dict]:
         return json.load(fh)
 
 
-def apply_semantic_weights(data: List[Dict]) -> List[Dict]:
+def pair_columns(data: Sequence[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the ``distance`` and ``coupled`` columns of candidate entries."""
+    distance = np.fromiter((e.get("distance", DEFAULT_DISTANCE) for e in data), dtype=np.float64, count=len(data))
+    coupled = np.fromiter((bool(e.get("coupled", False)) for e in data), dtype=bool, count=len(data))
+    return distance, coupled
+
+
+def apply_semantic_weights(
+    data: List[Dict],
+    kernel: str = "exponential",
+    params: Optional[Dict[str, float]] = None,
+    decimals: Optional[int] = 4,
+) -> List[Dict]:
+    distance, coupled = pair_columns(data)
+    weights = compute_weights(distance, coupled, kernel, params, decimals)
     updated = []
-    for entry in data:
-        d = entry.get("distance", 999)
-        coupled = entry.get("coupled", False)
-        weight = round(math.exp(-0.7 * d), 4) if coupled else 0.0
-        entry["semantic_weight"] = weight
+    for entry, w in zip(data, weights.tolist()):
+        entry["semantic_weight"] = w
         updated.append(entry)
     return updated
 
 
-def save_output(data: List[Dict], path: str) -> None:
+def save_output(data: object, path: str) -> None:
     with open(path, "w", encoding="utf-8") as fh:
         json.dump(data, fh, indent=2, ensure_ascii=False)
         fh.write("\n")
 
 
+# -- binary edge store ----------------------------------------------------------
+
+
+class EdgeStore:
+    """Columnar candidate pairs in a directory of memory-mapped ``.npy`` files.
+
+    Columns: ``q1``/``q2`` (state indices), ``distance``, ``coupled`` and
+    ``weight``; ``keys``/``order`` give a sorted ``q1 * n + q2`` index for
+    looking up pairs.  ``meta.json`` records the state labels and the kernel
+    the weights were computed with.
+    """
+
+    COLUMNS = ("q1", "q2", "distance", "coupled", "weight", "keys", "order")
+
+    def __init__(self, path: str, mode: str = "r+") -> None:
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as fh:
+            self.meta = json.load(fh)
+        self.states: List[str] = self.meta["states"]
+        for name in self.COLUMNS:
+            setattr(self, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode))
+
+    def __len__(self) -> int:
+        return len(self.q1)
+
+    @classmethod
+    def create(
+        cls,
+        path: str,
+        states: Sequence[str],
+        q1: np.ndarray,
+        q2: np.ndarray,
+        distance: np.ndarray,
+        coupled: np.ndarray,
+        kernel: str = "exponential",
+        params: Optional[Dict[str, float]] = None,
+        decimals: Optional[int] = 4,
+    ) -> "EdgeStore":
+        check_params(kernel, params)
+        os.makedirs(path, exist_ok=True)
+        n = len(states)
+        keys = np.asarray(q1, dtype=np.int64) * n + np.asarray(q2, dtype=np.int64)
+        order = np.argsort(keys, kind="stable")
+        columns = {
+            "q1": np.asarray(q1, dtype=np.int32),
+            "q2": np.asarray(q2, dtype=np.int32),
+            "distance": np.asarray(distance, dtype=np.float64),
+            "coupled": np.asarray(coupled, dtype=bool),
+            "weight": np.zeros(len(keys), dtype=np.float64),
+            "keys": keys[order],
+            "order": order,
+        }
+        for name, arr in columns.items():
+            np.save(os.path.join(path, f"{name}.npy"), arr)
+        meta = {"states": list(states), "kernel": kernel, "params": params or {}, "decimals": decimals}
+        save_output(meta, os.path.join(path, "meta.json"))
+        store = cls(path)
+        store.reweight()
+        return store
+
+    @classmethod
+    def from_pairs(cls, path: str, data: Sequence[Dict], **kernel_args) -> "EdgeStore":
+        labels = {e[k] for e in data for k in ("q1", "q2")}
+        states = sorted(labels, key=lambda s: (logical_index(s), s))
+        idx = {s: i for i, s in enumerate(states)}
+        q1 = np.fromiter((idx[e["q1"]] for e in data), dtype=np.int64, count=len(data))
+        q2 = np.fromiter((idx[e["q2"]] for e in data), dtype=np.int64, count=len(data))
+        distance, coupled = pair_columns(data)
+        return cls.create(path, states, q1, q2, distance, coupled, **kernel_args)
+
+    def _save_meta(self) -> None:
+        save_output(self.meta, os.path.join(self.path, "meta.json"))
+
+    def reweight(self, kernel: Optional[str] = None, params: Optional[Dict[str, float]] = None, rows: Optional[np.ndarray] = None) -> None:
+        """Recompute weights in place, for ``rows`` only or block by block for all.
+
+        Passing a ``kernel`` (or ``params``) switches the stored kernel; rows
+        must then be ``None`` so that every weight uses the new one.  A new
+        kernel without ``params`` starts from its defaults.  ``meta.json`` is
+        rewritten only after the weights have been computed.
+        """
+        switch = kernel is not None or params is not None
+        if switch and rows is not None:
+            raise ValueError("changing the kernel requires re-weighting every row")
+        new_kernel = kernel or self.meta["kernel"]
+        if params is None:
+            params = self.meta["params"] if new_kernel == self.meta["kernel"] else {}
+        check_params(new_kernel, params)
+        args = (new_kernel, params, self.meta["decimals"])
+        if rows is not None:
+            self.weight[rows] = compute_weights(self.distance[rows], self.coupled[rows], *args)
+        else:
+            for start in range(0, len(self), BLOCK):
+                sl = slice(start, start + BLOCK)
+                compute_weights(self.distance[sl], self.coupled[sl], *args, out=self.weight[sl])
+        self.weight.flush()
+        if switch:
+            self.meta["kernel"], self.meta["params"] = new_kernel, params
+            self._save_meta()
+
+    def find(self, q1: np.ndarray, q2: np.ndarray) -> np.ndarray:
+        """Return row numbers of the pairs ``(q1, q2)``; ``KeyError`` if any is missing."""
+        keys = np.asarray(q1, dtype=np.int64) * len(self.states) + np.asarray(q2, dtype=np.int64)
+        pos = np.searchsorted(self.keys, keys)
+        pos = np.minimum(pos, len(self.keys) - 1)
+        missing = self.keys[pos] != keys
+        if missing.any():
+            i = int(np.flatnonzero(missing)[0])
+            raise KeyError(f"pair ({self.states[int(np.atleast_1d(q1)[i])]}, {self.states[int(np.atleast_1d(q2)[i])]}) not in store")
+        return self.order[pos]
+
+    def update(self, rows: np.ndarray, distance: Optional[np.ndarray] = None, coupled: Optional[np.ndarray] = None) -> None:
+        """Change ``distance``/``coupled`` of ``rows`` and re-weight only those rows."""
+        if distance is not None:
+            self.distance[rows] = distance
+            self.distance.flush()
+        if coupled is not None:
+            self.coupled[rows] = coupled
+            self.coupled.flush()
+        self.reweight(rows=rows)
+
+    def update_pairs(self, data: Sequence[Dict]) -> int:
+        """Apply candidate entries (``q1``, ``q2`` and changed fields); return the count."""
+        idx = {s: i for i, s in enumerate(self.states)}
+        rows = self.find([idx[e["q1"]] for e in data], [idx[e["q2"]] for e in data])
+        has_d = np.fromiter(("distance" in e for e in data), dtype=bool, count=len(data))
+        has_c = np.fromiter(("coupled" in e for e in data), dtype=bool, count=len(data))
+        self.distance[rows[has_d]] = [e["distance"] for e in data if "distance" in e]
+        self.coupled[rows[has_c]] = [bool(e["coupled"]) for e in data if "coupled" in e]
+        self.distance.flush()
+        self.coupled.flush()
+        self.reweight(rows=rows)
+        return len(rows)
+
+    def to_pairs(self) -> List[Dict]:
+        """Return the store as ``semantic_coupling_map.json`` entries."""
+        states = self.states
+        return [
+            {"q1": states[a], "q2": states[b], "distance": d, "coupled": c, "semantic_weight": w}
+            for a, b, d, c, w in zip(
+                self.q1.tolist(), self.q2.tolist(), self.distance.tolist(), self.coupled.tolist(), self.weight.tolist()
+            )
+        ]
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Weight coupling candidates by distance")
+    p.add_argument("-i", "--input", default=INPUT_PATH, help="coupling candidates JSON")
+    p.add_argument("-o", "--output", default=OUTPUT_PATH, help="semantic coupling map JSON")
+    p.add_argument("--kernel", choices=sorted(KERNELS), default=None, help="weight kernel (default: exponential, or the store's)")
+    p.add_argument("--param", type=parse_param, action="append", default=[], metavar="NAME=VALUE",
+                   help="kernel parameter, e.g. alpha=0.7, sigma=1.2, p=2, radius=1.5")
+    p.add_argument("--decimals", type=int, default=4, help="round weights to this many decimals (-1: no rounding)")
+    p.add_argument("--store", help="binary edge store directory (created from --input if missing)")
+    p.add_argument("--update", help="with --store: JSON list of changed pairs to re-weight")
+    p.add_argument("--no-json", action="store_true", help="with --store: skip writing the JSON map")
+    return p.parse_args()
+
+
 def main() -> None:
-    pairs = load_pairs(INPUT_PATH)
-    weighted = apply_semantic_weights(pairs)
-    save_output(weighted, OUTPUT_PATH)
-    print(f"Wrote semantic coupling map to {OUTPUT_PATH}")
+    args = parse_args()
+    params = dict(args.param) or None
+    decimals = None if args.decimals < 0 else args.decimals
+    if not args.store:
+        pairs = load_pairs(args.input)
+        weighted = apply_semantic_weights(pairs, args.kernel or "exponential", params, decimals)
+        save_output(weighted, args.output)
+        print(f"Wrote semantic coupling map to {args.output}")
+        return
+
+    if os.path.exists(os.path.join(args.store, "meta.json")):
+        store = EdgeStore(args.store)
+        if args.update:
+            count = store.update_pairs(load_pairs(args.update))
+            print(f"Re-weighted {count} changed pairs in {args.store}")
+        if args.kernel or params:
+            try:
+                store.reweight(args.kernel, params)
+            except ValueError as exc:
+                raise SystemExit(f"{exc}; {args.store} is unchanged")
+            print(f"Re-weighted {len(store)} pairs in {args.store} with {store.meta['kernel']}")
+    else:
+        kernel_args = {"kernel": args.kernel or "exponential", "params": params, "decimals": decimals}
+        store = EdgeStore.from_pairs(args.store, load_pairs(args.input), **kernel_args)
+        print(f"Created edge store {args.store} with {len(store)} pairs")
+    if not args.no_json:
+        save_output(store.to_pairs(), args.output)
+        print(f"Wrote semantic coupling map to {args.output}")
 
 
 if __name__ == "__main__":
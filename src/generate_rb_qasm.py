@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""Generate randomized-benchmarking (RB) and interleaved RB QASM circuits.
+
+The 1-qubit (24 elements) and 2-qubit (11,520 elements) Clifford groups are
+enumerated once by breadth-first search over ``H``, ``S`` and ``CX``.  Every
+element is stored as its action on the signed Pauli operators (8 or 32 of
+them), i.e. an integer permutation, together with a shortest gate word.
+The images of the generators ``X_q``/``Z_q`` form an integer key, and a dense
+``key → index`` table turns any composed permutation back into a group index.
+
+With these tables composing two Cliffords, or a whole batch of them, is a
+few integer gathers, and the inverse of every element is precomputed.  RB
+sequences are sampled as an ``(n_seqs, length)`` index array per seed; the
+running product of all sequences is accumulated column by column so the
+recovery Clifford is exact, and the QASM text is assembled from pre-rendered
+gate snippets.
+
+Example usage::
+
+    python src/generate_rb_qasm.py --qubits 2 --lengths 10 100 1000 --seqs 50
+    python src/generate_rb_qasm.py --qubits 2 --interleave cx --physical 5 6
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+OUT_DIR = "result/rb"
+
+Gate = Tuple[str, ...]
+
+_PAULI_1Q = {
+    (0, 0): np.eye(2, dtype=complex),
+    (1, 0): np.array([[0, 1], [1, 0]], dtype=complex),
+    (0, 1): np.array([[1, 0], [0, -1]], dtype=complex),
+    (1, 1): np.array([[0, -1j], [1j, 0]], dtype=complex),
+}
+_H = np.array([[1, 1], [1, -1]], dtype=complex) / np.sqrt(2)
+_S = np.diag([1, 1j])
+_CX = np.array([[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 0, 1], [0, 0, 1, 0]], dtype=complex)
+_SWAP = np.array([[1, 0, 0, 0], [0, 0, 1, 0], [0, 1, 0, 0], [0, 0, 0, 1]], dtype=complex)
+
+# gates that may be interleaved: name -> (gate word, qubits needed)
+INTERLEAVE: Dict[str, Gate] = {
+    "h": ("H", "0"),
+    "s": ("S", "0"),
+    "x": ("X", "0"),
+    "y": ("Y", "0"),
+    "z": ("Z", "0"),
+    "cx": ("CX", "0", "1"),
+    "cz": ("CZ", "0", "1"),
+    "swap": ("SWAP", "0", "1"),
+}
+
+
+def _embed(mat: np.ndarray, qubits: Sequence[int], n: int) -> np.ndarray:
+    """Return ``mat`` acting on ``qubits`` of ``n`` (qubit 0 = first factor)."""
+    if n == 1:
+        return mat
+    if len(qubits) == 2:
+        return mat if tuple(qubits) == (0, 1) else _SWAP @ mat @ _SWAP
+    return np.kron(mat, np.eye(2)) if qubits[0] == 0 else np.kron(np.eye(2), mat)
+
+
+def _gate_matrix(gate: Gate, n: int) -> np.ndarray:
+    name, qubits = gate[0], [int(q) for q in gate[1:]]
+    one = {"H": _H, "S": _S, "X": _PAULI_1Q[1, 0], "Y": _PAULI_1Q[1, 1], "Z": _PAULI_1Q[0, 1]}
+    if name in one:
+        return _embed(one[name], qubits, n)
+    two = {"CX": _CX, "CZ": np.diag([1, 1, 1, -1]).astype(complex), "SWAP": _SWAP}
+    return _embed(two[name], qubits, n)
+
+
+class CliffordGroup:
+    """Lookup tables for the ``n``-qubit Clifford group (``n`` = 1 or 2).
+
+    Signed Pauli ``±P`` is numbered ``p + sign * 4**n`` where
+    ``p = Σ_q (x_q + 2 z_q) 4**q``.  ``perms[i, P]`` is the signed Pauli that
+    element ``i`` maps ``P`` to under conjugation.
+    """
+
+    def __init__(self, n: int) -> None:
+        if n not in (1, 2):
+            raise ValueError("Only 1- and 2-qubit Clifford groups are supported")
+        self.n = n
+        self.n_paulis = 2 * 4 ** n
+        self.generators = np.array([4 ** q * k for q in range(n) for k in (1, 2)], dtype=np.int64)
+        self._key_weights = self.n_paulis ** np.arange(2 * n, dtype=np.int64)
+        self._paulis = self._pauli_matrices()
+
+        gen_words: List[Gate] = [("H", str(q)) for q in range(n)] + [("S", str(q)) for q in range(n)]
+        if n == 2:
+            gen_words += [("CX", "0", "1"), ("CX", "1", "0")]
+        gen_perms = [self.perm_of_unitary(_gate_matrix(g, n)) for g in gen_words]
+
+        identity = np.arange(self.n_paulis, dtype=np.uint8)
+        self.lookup = np.full(self.n_paulis ** (2 * n), -1, dtype=np.int32)
+        perms = [identity]
+        words: List[Tuple[Gate, ...]] = [()]
+        self.lookup[self.key(identity)] = 0
+        queue = deque([0])
+        while queue:
+            i = queue.popleft()
+            for word, gperm in zip(gen_words, gen_perms):
+                perm = gperm[perms[i]]
+                k = self.key(perm)
+                if self.lookup[k] < 0:
+                    self.lookup[k] = len(perms)
+                    perms.append(perm)
+                    words.append(words[i] + (word,))
+                    queue.append(len(perms) - 1)
+        self.perms = np.array(perms, dtype=np.uint8)
+        self.words = words
+        self.size = len(perms)
+        self.identity = 0
+        # inverse: the permutation inverse of each element's Pauli action
+        inv = np.argsort(self.perms, axis=1).astype(np.uint8)
+        self.inverse = self.lookup[self.key(inv)]
+        self.compose_table: Optional[np.ndarray] = None
+        if n == 1:
+            a, b = np.meshgrid(np.arange(self.size), np.arange(self.size), indexing="ij")
+            self.compose_table = self.compose(a, b)
+
+    def _pauli_matrices(self) -> np.ndarray:
+        mats = []
+        for p in range(4 ** self.n):
+            mat = np.ones((1, 1), dtype=complex)
+            for q in range(self.n):
+                digit = (p >> (2 * q)) & 3
+                mat = np.kron(mat, _PAULI_1Q[digit & 1, digit >> 1])
+            mats.append(mat)
+        return np.array(mats)
+
+    def perm_of_unitary(self, u: np.ndarray) -> np.ndarray:
+        """Return the signed-Pauli permutation of conjugation by ``u``."""
+        base = 4 ** self.n
+        dim = 2 ** self.n
+        perm = np.empty(self.n_paulis, dtype=np.uint8)
+        for p, mat in enumerate(self._paulis):
+            image = u @ mat @ u.conj().T
+            overlaps = np.einsum("kij,ji->k", self._paulis, image).real / dim
+            q = int(np.argmax(np.abs(overlaps)))
+            if not np.isclose(abs(overlaps[q]), 1.0):
+                raise ValueError("Unitary is not a Clifford")
+            sign = 0 if overlaps[q] > 0 else 1
+            perm[p] = q + sign * base
+            perm[p + base] = q + (1 - sign) * base
+        return perm
+
+    def key(self, perm: np.ndarray) -> np.ndarray:
+        """Return the lookup key(s) of permutation(s) ``perm`` (last axis)."""
+        images = np.asarray(perm)[..., self.generators].astype(np.int64)
+        return images @ self._key_weights
+
+    def index_of_gate(self, gate: Gate) -> int:
+        return int(self.lookup[self.key(self.perm_of_unitary(_gate_matrix(gate, self.n)))])
+
+    def compose(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Return the index of "apply ``a``, then ``b``" (broadcasting)."""
+        if self.compose_table is not None:
+            return self.compose_table[a, b]
+        a = np.asarray(a)
+        b = np.asarray(b)
+        images = self.perms[b[..., None], self.perms[a][..., self.generators]].astype(np.int64)
+        return self.lookup[images @ self._key_weights]
+
+    def snippets(self, qubits: Sequence[int], barrier: bool = True) -> List[str]:
+        """Return the QASM text of every element on physical ``qubits``."""
+        fence = "barrier " + ",".join(f"q[{q}]" for q in qubits) + ";\n" if barrier else ""
+        out = []
+        for word in self.words:
+            text = "".join(_gate_line(g, qubits) for g in word)
+            out.append(text + fence)
+        return out
+
+
+def _gate_line(gate: Gate, qubits: Sequence[int]) -> str:
+    args = ", ".join(f"q[{qubits[int(q)]}]" for q in gate[1:])
+    return f"{gate[0].lower()} {args};\n"
+
+
+@lru_cache(maxsize=None)
+def clifford_group(n: int) -> CliffordGroup:
+    return CliffordGroup(n)
+
+
+def sample_sequences(
+    group: CliffordGroup,
+    n_seqs: int,
+    length: int,
+    seed: Optional[int] = None,
+    interleave: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return random Clifford indices ``(n_seqs, length)`` and recovery indices.
+
+    With ``interleave`` the running product includes that element after every
+    random Clifford, as in interleaved RB.
+    """
+    rng = np.random.default_rng(seed)
+    seqs = rng.integers(group.size, size=(n_seqs, length))
+    total = np.full(n_seqs, group.identity, dtype=np.int64)
+    for j in range(length):
+        total = group.compose(total, seqs[:, j])
+        if interleave is not None:
+            total = group.compose(total, np.full(n_seqs, interleave))
+    return seqs, group.inverse[total]
+
+
+def sequence_qasm(
+    seq: Sequence[int],
+    recovery: int,
+    snippets: Sequence[str],
+    qubits: Sequence[int],
+    qreg_size: int,
+    interleave_text: str = "",
+) -> str:
+    """Return the QASM program for one RB sequence."""
+    header = f'OPENQASM 2.0;\ninclude "qelib1.inc";\nqreg q[{qreg_size}];\ncreg c[{len(qubits)}];\n'
+    if interleave_text:
+        body = "".join(snippets[i] + interleave_text for i in seq)
+    else:
+        body = "".join(snippets[i] for i in seq)
+    tail = snippets[recovery] + "".join(f"measure q[{q}] -> c[{k}];\n" for k, q in enumerate(qubits))
+    return header + body + tail
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Generate RB / interleaved RB QASM sequences")
+    p.add_argument("--qubits", type=int, choices=(1, 2), default=2, help="size of the Clifford group")
+    p.add_argument("--lengths", type=int, nargs="+", default=[1, 10, 100, 1000], help="sequence lengths")
+    p.add_argument("--seqs", type=int, default=20, help="sequences per length")
+    p.add_argument("--seed", type=int, default=0, help="random seed")
+    p.add_argument("--interleave", choices=sorted(INTERLEAVE), help="gate interleaved after each Clifford")
+    p.add_argument("--physical", type=int, nargs="+", help="physical qubit indices (default 0..n-1)")
+    p.add_argument("--qreg-size", type=int, default=16, help="size of the emitted qreg")
+    p.add_argument("--no-barriers", action="store_true", help="omit barriers between Cliffords")
+    p.add_argument("-o", "--out-dir", default=OUT_DIR, help="output directory")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    physical = args.physical or list(range(args.qubits))
+    if len(physical) != args.qubits:
+        raise SystemExit(f"--physical needs {args.qubits} qubit indices")
+    group = clifford_group(args.qubits)
+    snippets = group.snippets(physical, barrier=not args.no_barriers)
+
+    interleave = None
+    interleave_text = ""
+    prefix = "rb"
+    if args.interleave:
+        gate = INTERLEAVE[args.interleave]
+        if len(gate) - 1 > args.qubits:
+            raise SystemExit(f"{args.interleave} needs {len(gate) - 1} qubits")
+        interleave = group.index_of_gate(gate)
+        interleave_text = _gate_line(gate, physical)
+        if not args.no_barriers:
+            interleave_text += "barrier " + ",".join(f"q[{q}]" for q in physical) + ";\n"
+        prefix = f"irb_{args.interleave}"
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    manifest = {
+        "qubits": physical,
+        "interleave": args.interleave,
+        "seed": args.seed,
+        "sequences": [],
+    }
+    start = time.perf_counter()
+    count = 0
+    for li, length in enumerate(args.lengths):
+        seqs, recovery = sample_sequences(group, args.seqs, length, args.seed + li, interleave)
+        for k, (seq, rec) in enumerate(zip(seqs.tolist(), recovery.tolist())):
+            name = f"{prefix}_m{length}_{k:04d}.qasm"
+            with open(os.path.join(args.out_dir, name), "w") as fh:
+                fh.write(sequence_qasm(seq, rec, snippets, physical, args.qreg_size, interleave_text))
+            manifest["sequences"].append({"file": name, "length": length, "recovery": rec})
+            count += 1
+    elapsed = time.perf_counter() - start
+    with open(os.path.join(args.out_dir, f"{prefix}_manifest.json"), "w") as fh:
+        json.dump(manifest, fh, indent=2)
+    print(f"Wrote {count} sequences to {args.out_dir} in {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Reduce raw digitizer I/Q captures to filtered I/Q or S21 arrays.
+
+A capture is a flat binary file of interleaved ``I, Q`` samples (``int16`` or
+``float32``, after an optional header of ``--offset`` bytes).  It is
+memory-mapped and processed ``--chunk`` samples at a time, so memory use does
+not depend on the capture length:
+
+1. **Down-conversion** by the intermediate frequency ``--if-freq``,
+2. **low-pass filtering and decimation** by ``--decimation`` with a
+   ``--taps``-tap FIR (cut-off ``--cutoff`` of the output Nyquist rate),
+3. **integration**: the mean of every ``--integrate`` decimated samples.
+
+Steps 1 and 2 are fused into a polyphase filter: mixing before the FIR equals
+filtering with the taps ``h[j] exp(iωj)`` and mixing only the decimated
+output, and the polyphase sum is a handful of small matrix products on the
+float32 samples, one per ``--decimation`` taps.  The filter history, the
+output phase and the integration remainder are carried across chunks, so the
+result equals processing the whole capture at once.
+
+The output is ``.npz`` (``t`` in s, ``I``, ``Q``) or CSV (``timestamp,I,Q``).
+For a stepped frequency sweep (one integrated point per step) give
+``--freq-start``/``--freq-step`` in GHz: the output then has a ``freq``
+column instead and is S21 up to a constant, ready for
+``extract_quantum_metrics.py``, ``batch_fit_resonance.py`` or
+``detect_resonances.py``.
+
+Example usage::
+
+    python src/ingest_raw_iq.py capture.bin result/iq.npz --fs 500e6 --if-freq 50e6 --decimation 50
+    python src/ingest_raw_iq.py sweep.bin result/s21.csv --fs 500e6 --if-freq 50e6 --decimation 50 \\
+        --integrate 1000 --freq-start 4.99 --freq-step 1e-5
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from typing import Iterator, Optional
+
+import numpy as np
+from scipy.signal import firwin
+
+CHUNK_SAMPLES = 1 << 18
+DTYPES = {"int16": np.int16, "float32": np.float32}
+
+
+def open_capture(path: str, dtype: str = "int16", offset: int = 0) -> np.ndarray:
+    """Memory-map an interleaved I/Q capture as an ``(n, 2)`` array."""
+    itemsize = np.dtype(DTYPES[dtype]).itemsize
+    n = (os.path.getsize(path) - offset) // (2 * itemsize)
+    return np.memmap(path, dtype=DTYPES[dtype], mode="r", offset=offset, shape=(n, 2))
+
+
+class DownConverter:
+    """Stateful down-conversion, FIR low-pass and decimation of I/Q chunks.
+
+    ``process`` takes ``(n, 2)`` I/Q sample pairs (any real dtype) and
+    returns the next complex baseband samples ``y[m] = Σ_j h[j] x[mD-j]
+    exp(-iω(mD-j))``; :meth:`flush` returns the last few once the capture
+    has ended.
+
+    The samples are viewed as rows of ``W = G D`` pairs, each row yielding
+    ``G`` outputs (``G`` is chosen so that ``W`` is about ``ROW_SAMPLES``,
+    which keeps the matrix products efficient for small decimation factors),
+    and ``y`` is the sum over a few past rows of ``row @ M[p]``.
+    """
+
+    ROW_SAMPLES = 64
+
+    def __init__(
+        self,
+        fs: float,
+        if_freq: float,
+        decimation: int,
+        numtaps: int = 128,
+        cutoff: float = 0.8,
+        max_chunk: int = CHUNK_SAMPLES,
+    ) -> None:
+        if decimation < 1:
+            raise ValueError("decimation must be >= 1")
+        D = self.decimation = int(decimation)
+        self.taps = firwin(numtaps, cutoff / D) if D > 1 else np.ones(1)
+        L = self.taps.size
+        G = self.group = max(1, -(-self.ROW_SAMPLES // D))
+        W = self.row = G * D
+        P = self.phases = ((G - 1) * D + L - 1) // W + 1
+        hb = self.taps * np.exp(2j * np.pi * if_freq / fs * np.arange(L))
+        # output g of row q needs x[qW + gD - j]; with k = (G-1-g) D + j that
+        # sample is column W-1-(k mod W) of row q - k // W
+        self._mats = np.zeros((P, 2 * W, 2 * G), dtype=np.float32)
+        for g in range(G):
+            k = (G - 1 - g) * D + np.arange(L)
+            p, col = k // W, W - 1 - k % W
+            self._mats[p, 2 * col, 2 * g] = hb.real
+            self._mats[p, 2 * col + 1, 2 * g] = -hb.imag
+            self._mats[p, 2 * col, 2 * g + 1] = hb.imag
+            self._mats[p, 2 * col + 1, 2 * g + 1] = hb.real
+        self._cycle = if_freq / fs * D  # output phase in turns per output sample
+        self._rot = self._rotation(max_chunk // D + G)
+        # the buffer starts with P - 1 rows of history, zeros before sample 0
+        self._buf = np.zeros((P * W + max_chunk, 2), dtype=np.float32)
+        self._fill = P * W - (G - 1) * D - 1
+        self._m_next = 0
+        self._count = 0
+
+    def _rotation(self, n: int) -> np.ndarray:
+        return np.exp(-2j * np.pi * np.mod(self._cycle * np.arange(n), 1.0)).astype(np.complex64)
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        W, G, P = self.row, self.group, self.phases
+        n = len(chunk)
+        if self._fill + n > len(self._buf):
+            grow = np.zeros((self._fill + n - len(self._buf), 2), dtype=np.float32)
+            self._buf = np.concatenate([self._buf, grow])
+        self._buf[self._fill : self._fill + n] = chunk
+        self._fill += n
+        self._count += n
+        rows = self._fill // W - (P - 1)
+        if rows <= 0:
+            return np.empty(0, dtype=np.complex64)
+        flat = self._buf.reshape(-1)
+        out = np.zeros((rows, 2 * G), dtype=np.float32)
+        for p in range(P):
+            start = (P - 1 - p) * W * 2
+            out += flat[start : start + rows * W * 2].reshape(rows, 2 * W) @ self._mats[p]
+        y = out.view(np.complex64).ravel()
+        if y.size > self._rot.size:
+            self._rot = self._rotation(y.size)
+        start = np.exp(-2j * np.pi * np.mod(self._cycle * self._m_next, 1.0))
+        y *= self._rot[: y.size] * np.complex64(start)
+        # drop the consumed rows, keeping P - 1 rows of history and any partial row
+        used = rows * W
+        keep = self._fill - used
+        self._buf[:keep] = self._buf[used : self._fill]
+        self._fill = keep
+        self._m_next += y.size
+        return y
+
+    def flush(self) -> np.ndarray:
+        """Return the outputs of the final partial row (inputs ``mD`` before the end)."""
+        missing = (self._count - 1) // self.decimation + 1 - self._m_next if self._count else 0
+        if missing <= 0:
+            return np.empty(0, dtype=np.complex64)
+        return self.process(np.zeros((self.row, 2), dtype=np.float32))[:missing]
+
+
+class Integrator:
+    """Mean of every ``n`` consecutive samples, carrying the remainder across chunks."""
+
+    def __init__(self, n: int) -> None:
+        self.n = max(1, int(n))
+        self._rest = np.empty(0, dtype=np.complex64)
+
+    def process(self, y: np.ndarray) -> np.ndarray:
+        if self.n == 1:
+            return y
+        y = np.concatenate([self._rest, y]) if self._rest.size else y
+        full = (y.size // self.n) * self.n
+        self._rest = y[full:].copy()
+        return y[:full].reshape(-1, self.n).mean(axis=1)
+
+
+def iter_chunks(samples: np.ndarray, chunk: int = CHUNK_SAMPLES) -> Iterator[np.ndarray]:
+    for start in range(0, len(samples), chunk):
+        yield samples[start : start + chunk]
+
+
+def ingest(
+    samples: np.ndarray,
+    fs: float,
+    if_freq: float,
+    decimation: int,
+    integrate: int = 1,
+    numtaps: int = 128,
+    cutoff: float = 0.8,
+    scale: float = 1.0,
+    chunk: int = CHUNK_SAMPLES,
+) -> np.ndarray:
+    """Return the down-converted, decimated and integrated complex samples."""
+    ddc = DownConverter(fs, if_freq, decimation, numtaps, cutoff, chunk)
+    integ = Integrator(integrate)
+    parts = [integ.process(ddc.process(block)) for block in iter_chunks(samples, chunk)]
+    parts.append(integ.process(ddc.flush()))
+    out = np.concatenate(parts) if parts else np.empty(0, dtype=np.complex64)
+    return out * np.float32(scale) if scale != 1.0 else out
+
+
+def save_output(
+    path: str,
+    z: np.ndarray,
+    period: float,
+    freq_start: Optional[float] = None,
+    freq_step: Optional[float] = None,
+) -> None:
+    """Write ``z`` with its time axis (or sweep frequencies) as ``.npz`` or CSV."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if freq_start is not None:
+        name, axis = "freq", freq_start + freq_step * np.arange(z.size)
+    else:
+        name, axis = "timestamp", period * np.arange(z.size)
+    if path.endswith(".npz"):
+        np.savez(path, **{"freq" if name == "freq" else "t": axis}, I=z.real, Q=z.imag)
+        return
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(f"{name},I,Q\n")
+        np.savetxt(fh, np.column_stack([axis, z.real, z.imag]), delimiter=",", fmt="%.10g")
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Down-convert, decimate and integrate raw digitizer I/Q captures")
+    p.add_argument("input", help="raw capture of interleaved I, Q samples")
+    p.add_argument("output", help="output .npz or .csv")
+    p.add_argument("--dtype", choices=sorted(DTYPES), default="int16", help="sample type")
+    p.add_argument("--offset", type=int, default=0, help="header bytes to skip")
+    p.add_argument("--fs", type=float, required=True, help="sample rate [Hz]")
+    p.add_argument("--if-freq", type=float, default=0.0, help="intermediate frequency to remove [Hz]")
+    p.add_argument("--decimation", type=int, default=1, help="decimation factor")
+    p.add_argument("--taps", type=int, default=128, help="FIR length")
+    p.add_argument("--cutoff", type=float, default=0.8, help="FIR cut-off as a fraction of the output Nyquist rate")
+    p.add_argument("--integrate", type=int, default=1, help="average this many decimated samples per output point")
+    p.add_argument("--scale", type=float, default=1.0, help="multiply the output (e.g. volts per ADC count)")
+    p.add_argument("--chunk", type=int, default=CHUNK_SAMPLES, help="samples per processing chunk")
+    p.add_argument("--freq-start", type=float, help="first sweep frequency [GHz] (one output point per step)")
+    p.add_argument("--freq-step", type=float, help="sweep frequency step [GHz]")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if (args.freq_start is None) != (args.freq_step is None):
+        raise SystemExit("--freq-start and --freq-step go together")
+    samples = open_capture(args.input, args.dtype, args.offset)
+    t0 = time.perf_counter()
+    z = ingest(samples, args.fs, args.if_freq, args.decimation, args.integrate, args.taps, args.cutoff, args.scale, args.chunk)
+    elapsed = time.perf_counter() - t0
+    period = args.decimation * max(1, args.integrate) / args.fs
+    save_output(args.output, z, period, args.freq_start, args.freq_step)
+    mb = samples.nbytes / 1e6
+    print(f"{len(samples)} samples ({mb:.0f} MB) -> {z.size} points in {elapsed:.2f} s ({mb / max(elapsed, 1e-9):.0f} MB/s)")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
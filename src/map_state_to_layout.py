@@ -8,12 +8,28 @@ writes the mapping to ``result/qubit_state_map.txt``.
 State labels default to ``ψ₀``..``ψₙ`` and may be overridden via ``--states``.
 The number of supplied labels must match the number of qubits.  Qubit entries
 are sorted numerically so that ``Q2`` precedes ``Q10``.
+
+With ``--gates`` the states are placed according to the logical gate list
+instead of index order.  The interaction graph (edge weight = number of CX
+gates between two states) is first embedded into the coupling graph with a
+VF2-style backtracking search for a subgraph monomorphism, which puts every
+interacting pair on a coupler.  If no embedding exists (or the search budget
+runs out) simulated annealing minimises ``Σ weight × (hops − 1)`` over the
+hop-distance matrix.  Qubits are coupled when their layout coordinates are
+within ``--threshold`` (1.5 as in ``infer_coupling_candidates.py``).
 """
 
 from __future__ import annotations
 
 import argparse
-from typing import List, Tuple
+import json
+import math
+import random
+import re
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+COORD_PATTERN = re.compile(r"\(\s*([-+\d.eE]+)\s*,\s*([-+\d.eE]+)\s*\)")
 
 
 def read_layout(path: str) -> List[Tuple[str, str]]:
@@ -46,6 +62,204 @@ def write_state_map(layout: List[Tuple[str, str]], states: List[str], path: str)
             fh.write(f"{name}: {coord} → {state}\n")
 
 
+def coupling_graph(layout: List[Tuple[str, str]], threshold: float) -> List[List[int]]:
+    """Return adjacency lists of qubits whose coordinates are within ``threshold``."""
+    points = []
+    for _, coord in layout:
+        m = COORD_PATTERN.search(coord)
+        if not m:
+            raise ValueError(f"Cannot parse coordinate '{coord}'")
+        points.append((float(m.group(1)), float(m.group(2))))
+    adj: List[List[int]] = [[] for _ in points]
+    for i, (x1, y1) in enumerate(points):
+        for j in range(i + 1, len(points)):
+            x2, y2 = points[j]
+            if math.hypot(x1 - x2, y1 - y2) <= threshold:
+                adj[i].append(j)
+                adj[j].append(i)
+    return adj
+
+
+def hop_distances(adj: List[List[int]]) -> List[List[int]]:
+    """Return all-pairs hop counts (``len(adj)`` marks unreachable pairs)."""
+    n = len(adj)
+    dist = []
+    for src in range(n):
+        row = [n] * n
+        row[src] = 0
+        queue = deque([src])
+        while queue:
+            u = queue.popleft()
+            for v in adj[u]:
+                if row[v] == n:
+                    row[v] = row[u] + 1
+                    queue.append(v)
+        dist.append(row)
+    return dist
+
+
+def interaction_graph(gates: List[Dict[str, str]], states: List[str]) -> Dict[Tuple[int, int], int]:
+    """Return ``{(i, j): count}`` of CX gates between state indices ``i < j``."""
+    index = {s: i for i, s in enumerate(states)}
+    weights: Dict[Tuple[int, int], int] = {}
+    for gate in gates:
+        if gate.get("gate") != "CX":
+            continue
+        try:
+            a, b = index[gate["q1"]], index[gate["q2"]]
+        except KeyError as exc:
+            raise ValueError(f"Gate uses unknown state {exc.args[0]}") from None
+        key = (a, b) if a < b else (b, a)
+        weights[key] = weights.get(key, 0) + 1
+    return weights
+
+
+def placement_cost(place: List[int], weights: Dict[Tuple[int, int], int], dist: List[List[int]]) -> int:
+    """Return ``Σ weight × (hops − 1)`` of ``place`` (state index → qubit)."""
+    return sum(w * (dist[place[a]][place[b]] - 1) for (a, b), w in weights.items())
+
+
+def find_embedding(
+    weights: Dict[Tuple[int, int], int],
+    adj: List[List[int]],
+    budget: int = 200_000,
+) -> Optional[Dict[int, int]]:
+    """Return a map of interacting states onto qubits keeping every edge coupled.
+
+    VF2-style backtracking: states are matched in BFS order from the
+    heaviest node, and a candidate qubit must be unused, have enough
+    neighbours and be coupled to the images of all matched neighbours.
+    Returns ``None`` if no embedding exists or ``budget`` steps are exceeded.
+    """
+    nbrs: Dict[int, set] = {}
+    strength: Dict[int, int] = {}
+    for (a, b), w in weights.items():
+        nbrs.setdefault(a, set()).add(b)
+        nbrs.setdefault(b, set()).add(a)
+        strength[a] = strength.get(a, 0) + w
+        strength[b] = strength.get(b, 0) + w
+    if not nbrs:
+        return {}
+    phys_adj = [set(a) for a in adj]
+
+    order: List[int] = []
+    seen = set()
+    for root in sorted(nbrs, key=lambda v: (-len(nbrs[v]), -strength[v], v)):
+        if root in seen:
+            continue
+        seen.add(root)
+        queue = deque([root])
+        while queue:
+            v = queue.popleft()
+            order.append(v)
+            for u in sorted(nbrs[v] - seen, key=lambda u: (-len(nbrs[u]), -strength[u], u)):
+                seen.add(u)
+                queue.append(u)
+
+    mapping: Dict[int, int] = {}
+    used = set()
+    steps = 0
+
+    def extend(pos: int) -> bool:
+        nonlocal steps
+        if pos == len(order):
+            return True
+        v = order[pos]
+        mapped = [mapping[u] for u in nbrs[v] if u in mapping]
+        if mapped:
+            candidates = set.intersection(*(phys_adj[p] for p in mapped)) - used
+        else:
+            candidates = set(range(len(adj))) - used
+        for p in sorted(candidates, key=lambda p: (-len(adj[p]), p)):
+            steps += 1
+            if steps > budget:
+                return False
+            if len(adj[p]) < len(nbrs[v]):
+                continue
+            mapping[v] = p
+            used.add(p)
+            if extend(pos + 1):
+                return True
+            del mapping[v]
+            used.discard(p)
+        return False
+
+    return dict(mapping) if extend(0) else None
+
+
+def anneal_placement(
+    place: List[int],
+    weights: Dict[Tuple[int, int], int],
+    dist: List[List[int]],
+    steps: int = 20_000,
+    seed: Optional[int] = None,
+) -> List[int]:
+    """Improve ``place`` by simulated annealing over pairwise qubit swaps."""
+    rng = random.Random(seed)
+    n_phys = len(dist)
+    nbrs: Dict[int, List[Tuple[int, int]]] = {}
+    for (a, b), w in weights.items():
+        nbrs.setdefault(a, []).append((b, w))
+        nbrs.setdefault(b, []).append((a, w))
+    place = list(place)
+    owner = [-1] * n_phys
+    for s, p in enumerate(place):
+        owner[p] = s
+    cost = placement_cost(place, weights, dist)
+    best, best_cost = list(place), cost
+    temp0 = max(1.0, max(weights.values(), default=1))
+
+    def local(s: int, p: int, other: int, other_p: int) -> int:
+        """Cost of ``s``'s edges with ``s`` at ``p`` and ``other`` at ``other_p``."""
+        total = 0
+        for t, w in nbrs.get(s, ()):
+            q = other_p if t == other else place[t]
+            total += w * dist[p][q]
+        return total
+
+    for step in range(steps):
+        temp = temp0 * (1 - step / steps) + 1e-3
+        p1, p2 = rng.randrange(n_phys), rng.randrange(n_phys)
+        s1, s2 = owner[p1], owner[p2]
+        if p1 == p2 or (s1 < 0 and s2 < 0):
+            continue
+        delta = 0
+        if s1 >= 0:
+            delta += local(s1, p2, s2, p1) - local(s1, p1, s2, p2)
+        if s2 >= 0:
+            delta += local(s2, p1, s1, p2) - local(s2, p2, s1, p1)
+        if delta <= 0 or rng.random() < math.exp(-delta / temp):
+            owner[p1], owner[p2] = s2, s1
+            if s1 >= 0:
+                place[s1] = p2
+            if s2 >= 0:
+                place[s2] = p1
+            cost += delta
+            if cost < best_cost:
+                best, best_cost = list(place), cost
+    return best
+
+
+def optimize_placement(
+    gates: List[Dict[str, str]],
+    states: List[str],
+    adj: List[List[int]],
+    anneal_steps: int = 20_000,
+    seed: Optional[int] = None,
+) -> Tuple[List[int], str]:
+    """Return state index → qubit index and the method that produced it."""
+    weights = interaction_graph(gates, states)
+    dist = hop_distances(adj)
+    identity = list(range(len(states)))
+    if placement_cost(identity, weights, dist) == 0:
+        return identity, "identity"
+    embedding = find_embedding(weights, adj)
+    if embedding is not None:
+        free = iter(p for p in range(len(adj)) if p not in set(embedding.values()))
+        return [embedding[s] if s in embedding else next(free) for s in range(len(states))], "vf2"
+    return anneal_placement(identity, weights, dist, anneal_steps, seed), "anneal"
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Map logical states to qubit layout")
     parser.add_argument(
@@ -65,6 +279,10 @@ def parse_args() -> argparse.Namespace:
         default="result/qubit_state_map.txt",
         help="output state map file",
     )
+    parser.add_argument("--gates", help="logical gate list JSON; place interacting states on couplers")
+    parser.add_argument("--threshold", type=float, default=1.5, help="coupling distance threshold")
+    parser.add_argument("--anneal-steps", type=int, default=20_000, help="annealing iterations for the fallback")
+    parser.add_argument("--seed", type=int, default=0, help="annealing random seed")
     return parser.parse_args()
 
 
@@ -82,6 +300,19 @@ def main() -> None:
         sub = str.maketrans("0123456789", "₀₁₂₃₄₅₆₇₈₉")
         states = [f"ψ{str(i).translate(sub)}" for i in range(num)]
 
+    if args.gates:
+        with open(args.gates) as fh:
+            gates = json.load(fh)
+        adj = coupling_graph(layout, args.threshold)
+        place, method = optimize_placement(gates, states, adj, args.anneal_steps, args.seed)
+        weights = interaction_graph(gates, states)
+        dist = hop_distances(adj)
+        before = placement_cost(list(range(num)), weights, dist)
+        after = placement_cost(place, weights, dist)
+        print(f"Placement cost (extra hops) {before} → {after} via {method}")
+        by_qubit = {p: s for s, p in enumerate(place)}
+        states = [states[by_qubit[p]] for p in range(num)]
+
     write_state_map(layout, states, args.output)
     print(f"State map written to {args.output}")
 
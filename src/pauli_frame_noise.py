@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""Pauli-frame Monte Carlo estimate of circuit-level error rates.
+
+Error rates come from the fitted outputs of the measurement tools:
+
+- ``extract_t2_from_dd.py`` → ``{"Gamma_dec", "T2", "unit"}``.  A ``"pulse"``
+  unit is converted to ns with ``--pulse-ns`` (DD pulse spacing).
+- ``compute_noise_spectrum.py`` → ``{"noise_model": {"A", "B"}}`` for
+  ``S(f) = A/f + B`` in V²/Hz.  With a phase sensitivity ``κ`` (rad/s per V)
+  the accumulated phase variance over a window ``t`` is modelled as
+  ``σ² = κ² (B t / 2 + A t² ln(1 / (f_low t)))``.
+
+Every qubit dephases between the end of its previous operation and the end of
+the current one (idle time plus gate time, taken from the ASAP schedule of
+``schedule_qasm.py``) with probability ``p_Z = (1 - exp(-t/T2 - σ²/2)) / 2``.
+The idle part of the window is applied before the gate and the rest after it,
+so idle errors are propagated through the gate that ends the idle period.
+Optional depolarizing errors ``--p1``/``--p2`` follow each gate.
+
+Shots are simulated 64 at a time: the X and Z components of every qubit's
+Pauli frame are ``uint64`` words over shots, Clifford gates update whole rows
+with XORs, and errors are injected by sampling only the affected shot
+positions.  A shot fails when any measured qubit (every qubit if the circuit
+has no ``measure``) ends with a flipped Z-basis outcome.
+
+Example usage::
+
+    python src/pauli_frame_noise.py result/iirb_swap_resolved.qasm --t2 result/t2.json --shots 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.qasm_ops import Op, parse_qasm_file
+from src.schedule_qasm import Schedule, parse_duration, schedule_ops
+from src.simulate_stabilizer import popcount
+
+QASM_PATH = "result/iirb_swap_resolved.qasm"
+OUT_PATH = "result/pauli_frame_result.json"
+BATCH_SHOTS = 1 << 20
+
+ONE = np.uint64(1)
+
+# X/Z components of the non-identity 1-qubit Paulis X, Y, Z
+_PAULI_1Q = ((1, 0), (1, 1), (0, 1))
+_PAULI_2Q = tuple((a, b) for a in ((0, 0),) + _PAULI_1Q for b in ((0, 0),) + _PAULI_1Q)[1:]
+
+
+def load_t2_ns(path: str, pulse_ns: float) -> float:
+    """Return T2 in ns from an ``extract_t2_from_dd.py`` output file."""
+    with open(path) as fh:
+        data = json.load(fh)
+    t2 = float(data["T2"])
+    unit = data.get("unit", "ns")
+    scale = {"pulse": pulse_ns, "s": 1e9, "us": 1e3, "ns": 1.0}
+    if unit not in scale:
+        raise ValueError(f"Unknown T2 unit: {unit}")
+    return t2 * scale[unit]
+
+
+def load_noise_model(path: str) -> Tuple[float, float]:
+    """Return ``(A, B)`` from a ``compute_noise_spectrum.py`` output file."""
+    with open(path) as fh:
+        model = json.load(fh)["noise_model"]
+    return float(model["A"]), float(model["B"])
+
+
+class DephasingModel:
+    """Z-error probability for a window of ``t`` ns."""
+
+    def __init__(
+        self,
+        t2_ns: float = math.inf,
+        noise: Tuple[float, float] = (0.0, 0.0),
+        sensitivity: float = 0.0,
+        f_low: float = 1.0,
+    ) -> None:
+        self.t2_ns = t2_ns
+        self.a, self.b = noise
+        self.sensitivity = sensitivity
+        self.f_low = f_low
+
+    def probability(self, t_ns: float) -> float:
+        if t_ns <= 0:
+            return 0.0
+        t = t_ns * 1e-9
+        exponent = t_ns / self.t2_ns if self.t2_ns > 0 else math.inf
+        if self.sensitivity:
+            log_term = max(math.log(1.0 / (self.f_low * t)), 0.0)
+            var = self.sensitivity ** 2 * (self.b * t / 2 + self.a * t * t * log_term)
+            exponent += var / 2
+        return 0.5 * (1.0 - math.exp(-exponent))
+
+
+class PauliFrames:
+    """X/Z Pauli frames of ``shots`` shots packed into ``uint64`` words."""
+
+    def __init__(self, n_qubits: int, shots: int, rng: np.random.Generator) -> None:
+        self.shots = shots
+        self.words = (shots + 63) // 64
+        self.x = np.zeros((n_qubits, self.words), dtype=np.uint64)
+        self.z = np.zeros((n_qubits, self.words), dtype=np.uint64)
+        self.rows = list(range(n_qubits))
+        self.rng = rng
+        tail = shots & 63
+        self.valid = np.full(self.words, ~np.uint64(0), dtype=np.uint64)
+        if tail:
+            self.valid[-1] = (ONE << np.uint64(tail)) - ONE
+
+    # -- error sampling -----------------------------------------------------
+    def error_positions(self, p: float) -> np.ndarray:
+        """Return the shots hit by an error that occurs with probability ``p``."""
+        if p > 0.05:
+            return np.flatnonzero(self.rng.random(self.shots) < p)
+        k = self.rng.binomial(self.shots, p) if p > 0 else 0
+        return self.rng.choice(self.shots, k, replace=False, shuffle=False)
+
+    def mask(self, pos: np.ndarray) -> np.ndarray:
+        """Return the packed mask of shot positions ``pos``."""
+        m = np.zeros(self.words, dtype=np.uint64)
+        np.bitwise_or.at(m, pos >> 6, ONE << (pos & 63).astype(np.uint64))
+        return m
+
+    def _apply(self, pos: np.ndarray, paulis: Sequence[Tuple[Tuple[int, int], ...]], rows: Sequence[int]) -> None:
+        """Apply a uniformly chosen Pauli from ``paulis`` at every shot in ``pos``."""
+        choice = self.rng.integers(len(paulis), size=pos.size)
+        for k, pauli in enumerate(paulis):
+            m = self.mask(pos[choice == k])
+            for row, (ex, ez) in zip(rows, pauli):
+                if ex:
+                    self.x[row] ^= m
+                if ez:
+                    self.z[row] ^= m
+
+    def dephase(self, q: int, p: float) -> None:
+        if p > 0:
+            self.z[self.rows[q]] ^= self.mask(self.error_positions(p))
+
+    def depolarize1(self, q: int, p: float) -> None:
+        if p > 0:
+            self._apply(self.error_positions(p), [(pauli,) for pauli in _PAULI_1Q], [self.rows[q]])
+
+    def depolarize2(self, a: int, b: int, p: float) -> None:
+        if p > 0:
+            self._apply(self.error_positions(p), _PAULI_2Q, [self.rows[a], self.rows[b]])
+
+    # -- Clifford propagation -----------------------------------------------
+    def h(self, q: int) -> None:
+        r = self.rows[q]
+        self.x[r], self.z[r] = self.z[r].copy(), self.x[r].copy()
+
+    def s(self, q: int) -> None:
+        r = self.rows[q]
+        self.z[r] ^= self.x[r]
+
+    def cx(self, c: int, t: int) -> None:
+        rc, rt = self.rows[c], self.rows[t]
+        self.x[rt] ^= self.x[rc]
+        self.z[rc] ^= self.z[rt]
+
+    def cz(self, a: int, b: int) -> None:
+        ra, rb = self.rows[a], self.rows[b]
+        self.z[ra] ^= self.x[rb]
+        self.z[rb] ^= self.x[ra]
+
+    def swap(self, a: int, b: int) -> None:
+        self.rows[a], self.rows[b] = self.rows[b], self.rows[a]
+
+    def flips(self, q: int) -> np.ndarray:
+        """Return the packed shots whose Z-basis outcome of ``q`` is flipped."""
+        return self.x[self.rows[q]].copy()
+
+
+def _propagate(frames: PauliFrames, op: Op) -> None:
+    name, qs = op.name, op.qubits
+    if name == "H":
+        frames.h(qs[0])
+    elif name in ("S", "SDG"):
+        frames.s(qs[0])
+    elif name in ("SX", "SXDG"):
+        frames.h(qs[0])
+        frames.s(qs[0])
+        frames.h(qs[0])
+    elif name in ("CX", "CNOT"):
+        frames.cx(*qs)
+    elif name == "CZ":
+        frames.cz(*qs)
+    elif name == "SWAP":
+        frames.swap(*qs)
+    elif name in ("X", "Y", "Z", "ID", "I", "BARRIER", "MEASURE"):
+        pass
+    else:
+        raise ValueError(f"Non-Clifford or unsupported gate: {name}")
+
+
+def _split_window(dephasing: DephasingModel, idle: float, total: float) -> Tuple[float, float]:
+    """Split the Z-error probability of a ``total`` ns window into idle and gate parts.
+
+    The two parts compose (``1 - 2p`` multiplies) to the probability of the
+    whole window.
+    """
+    p_idle = dephasing.probability(idle)
+    p_total = dephasing.probability(total)
+    if p_idle >= 0.5:
+        return p_idle, 0.0
+    return p_idle, 0.5 * (1.0 - (1.0 - 2.0 * p_total) / (1.0 - 2.0 * p_idle))
+
+
+def run_shots(
+    sched: Schedule,
+    shots: int,
+    dephasing: DephasingModel,
+    p1: float = 0.0,
+    p2: float = 0.0,
+    seed: Optional[int] = None,
+) -> Tuple[int, np.ndarray]:
+    """Simulate ``shots`` noisy shots; return failures and per-qubit flip counts."""
+    rng = np.random.default_rng(seed)
+    n = sched.n_qubits
+    measured = [q for op in sched.ops if op.name == "MEASURE" for q in op.qubits]
+    failures = 0
+    flip_counts = np.zeros(n, dtype=np.int64)
+    done = 0
+    # per-qubit dephasing probabilities do not depend on the shot batch
+    windows: List[List[Tuple[int, float, float]]] = []
+    last_end = [0.0] * n
+    for i, op in enumerate(sched.ops):
+        entry = []
+        if op.name != "BARRIER":
+            start = sched.asap_start[i]
+            end = start + sched.duration[i]
+            for q in op.qubits:
+                entry.append((q, *_split_window(dephasing, start - last_end[q], end - last_end[q])))
+                last_end[q] = end
+        windows.append(entry)
+    final = [(q, dephasing.probability(sched.makespan - last_end[q])) for q in range(n)]
+
+    while done < shots:
+        batch = min(BATCH_SHOTS, shots - done)
+        frames = PauliFrames(n, batch, rng)
+        outcome = np.zeros(frames.words, dtype=np.uint64)
+        for op, entry in zip(sched.ops, windows):
+            if op.name == "MEASURE":
+                for q, p_idle, p_gate in entry:
+                    frames.dephase(q, p_idle)
+                    frames.dephase(q, p_gate)
+                for q in op.qubits:
+                    flip = frames.flips(q)
+                    flip_counts[q] += int(popcount(flip).sum())
+                    outcome |= flip
+                continue
+            for q, p_idle, _ in entry:
+                frames.dephase(q, p_idle)
+            _propagate(frames, op)
+            for q, _, p_gate in entry:
+                frames.dephase(q, p_gate)
+            if op.name == "BARRIER":
+                continue
+            if len(op.qubits) == 1:
+                frames.depolarize1(op.qubits[0], p1)
+            elif len(op.qubits) == 2:
+                frames.depolarize2(op.qubits[0], op.qubits[1], p2)
+        if not measured:
+            for q, p in final:
+                frames.dephase(q, p)
+            for q in range(n):
+                flip = frames.flips(q)
+                flip_counts[q] += int(popcount(flip).sum())
+                outcome |= flip
+        failures += int(popcount(outcome & frames.valid).sum())
+        done += batch
+    return failures, flip_counts
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Pauli-frame Monte Carlo error-rate estimate for a Clifford QASM circuit")
+    p.add_argument("qasm", nargs="?", default=QASM_PATH, help="input QASM file")
+    p.add_argument("-o", "--output", default=OUT_PATH, help="output JSON file")
+    p.add_argument("--shots", type=int, default=1_000_000, help="number of Monte Carlo shots")
+    p.add_argument("--seed", type=int, help="random seed")
+    p.add_argument("--t2", help="T2 JSON from extract_t2_from_dd.py")
+    p.add_argument("--pulse-ns", type=float, default=100.0, help="DD pulse spacing for T2 in pulse units")
+    p.add_argument("--noise", help="noise fit JSON from compute_noise_spectrum.py")
+    p.add_argument("--sensitivity", type=float, default=0.0, help="phase sensitivity κ in rad/s per V")
+    p.add_argument("--f-low", type=float, default=1.0, help="low-frequency cutoff for 1/f noise [Hz]")
+    p.add_argument("--p1", type=float, default=0.0, help="depolarizing probability after 1-qubit gates")
+    p.add_argument("--p2", type=float, default=0.0, help="depolarizing probability after 2-qubit gates")
+    p.add_argument("--duration", type=parse_duration, action="append", default=[],
+                   metavar="NAME=NS", help="override a gate duration (see schedule_qasm.py)")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    circuit = parse_qasm_file(args.qasm)
+    sched = schedule_ops(circuit.ops, circuit.n_qubits, dict(args.duration))
+    t2_ns = load_t2_ns(args.t2, args.pulse_ns) if args.t2 else math.inf
+    noise = load_noise_model(args.noise) if args.noise else (0.0, 0.0)
+    dephasing = DephasingModel(t2_ns, noise, args.sensitivity, args.f_low)
+
+    start = time.perf_counter()
+    failures, flips = run_shots(sched, args.shots, dephasing, args.p1, args.p2, args.seed)
+    elapsed = time.perf_counter() - start
+    rate = failures / args.shots
+    result = {
+        "shots": args.shots,
+        "logical_error_rate": rate,
+        "stderr": math.sqrt(rate * (1 - rate) / args.shots),
+        "flip_rate": (flips / args.shots).tolist(),
+        "makespan_ns": sched.makespan,
+        "T2_ns": t2_ns if math.isfinite(t2_ns) else None,
+        "runtime_s": elapsed,
+        "shots_per_s": args.shots / elapsed if elapsed else None,
+    }
+    with open(args.output, "w") as fh:
+        json.dump(result, fh, indent=2)
+    print(
+        f"Logical error rate {rate:.3e} ± {result['stderr']:.1e} over {args.shots} shots "
+        f"({args.shots / elapsed:.3g} shots/s); wrote {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
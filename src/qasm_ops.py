@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Minimal OPENQASM 2.0 reader shared by the circuit simulators.
+
+``simulate_qasm.py`` only understands the ``SWAP``/``CX`` lines produced by
+``resolve_swap_paths.py``.  The readers here accept the broader subset used by
+the benchmarking tools: single-qubit gates (optionally with angle parameters
+such as ``rz(pi/4)``), two-qubit gates, ``barrier`` and ``measure``.  Gate
+names are normalised to upper case, and qubits of all ``qreg`` declarations
+are numbered consecutively in declaration order.
+"""
+from __future__ import annotations
+
+import ast
+import math
+import operator
+import re
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+
+
+class Op(NamedTuple):
+    """A single circuit instruction."""
+
+    name: str
+    qubits: Tuple[int, ...]
+    params: Tuple[float, ...] = ()
+
+
+class Circuit(NamedTuple):
+    n_qubits: int
+    ops: List[Op]
+
+
+REG_PATTERN = re.compile(r"^(qreg|creg)\s+(\w+)\s*\[(\d+)\]\s*;")
+OP_PATTERN = re.compile(r"^(\w+)\s*(?:\(([^)]*)\))?\s+([^;]*);")
+ARG_PATTERN = re.compile(r"^(\w+)\s*(?:\[(\d+)\])?$")
+SKIP_PREFIXES = ("OPENQASM", "include", "//")
+
+_BINOPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Pow: operator.pow,
+}
+
+
+def eval_param(expr: str) -> float:
+    """Evaluate a gate angle such as ``-pi/2`` without using ``eval``."""
+
+    def _eval(node: ast.AST) -> float:
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return float(node.value)
+        if isinstance(node, ast.Name) and node.id == "pi":
+            return math.pi
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            val = _eval(node.operand)
+            return -val if isinstance(node.op, ast.USub) else val
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINOPS:
+            return _BINOPS[type(node.op)](_eval(node.left), _eval(node.right))
+        raise ValueError(f"Unsupported parameter expression: {expr}")
+
+    return _eval(ast.parse(expr.strip(), mode="eval").body)
+
+
+def iter_qasm_ops(path: str) -> Iterator[Op]:
+    """Yield :class:`Op` entries from ``path`` one line at a time.
+
+    ``barrier`` on a whole register expands to all of its qubits.  For
+    ``measure q[i] -> c[j];`` only the measured qubit is kept.
+    """
+    regs: Dict[str, Tuple[int, int]] = {}
+    n_qubits = 0
+    with open(path, encoding="utf-8") as fh:
+        for lineno, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line or line.startswith(SKIP_PREFIXES):
+                continue
+            m = REG_PATTERN.match(line)
+            if m:
+                kind, name, size = m.groups()
+                if kind == "qreg":
+                    regs[name] = (n_qubits, int(size))
+                    n_qubits += int(size)
+                continue
+            m = OP_PATTERN.match(line)
+            if not m:
+                raise ValueError(f"{path}:{lineno}: cannot parse '{line}'")
+            name, params, args = m.groups()
+            if name == "measure":
+                args = args.split("->", 1)[0]
+            qubits: List[int] = []
+            for arg in args.split(","):
+                am = ARG_PATTERN.match(arg.strip())
+                if not am or am.group(1) not in regs:
+                    raise ValueError(f"{path}:{lineno}: unknown qubit '{arg.strip()}'")
+                offset, size = regs[am.group(1)]
+                if am.group(2) is None:
+                    qubits.extend(range(offset, offset + size))
+                else:
+                    qubits.append(offset + int(am.group(2)))
+            values = tuple(eval_param(p) for p in params.split(",")) if params else ()
+            yield Op(name.upper(), tuple(qubits), values)
+
+
+def count_qubits(path: str) -> int:
+    """Return the total size of all ``qreg`` declarations in ``path``."""
+    total = 0
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            m = REG_PATTERN.match(line.strip())
+            if m and m.group(1) == "qreg":
+                total += int(m.group(3))
+    return total
+
+
+def parse_qasm_file(path: str) -> Circuit:
+    """Return the full :class:`Circuit` contained in ``path``."""
+    ops = list(iter_qasm_ops(path))
+    return Circuit(count_qubits(path), ops)
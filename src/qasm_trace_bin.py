@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""Compact, randomly addressable binary format for QASM execution traces.
+
+The JSON trace written by ``simulate_qasm.py --json`` stores the full qubit
+state at every step.  This module stores only the qubits that changed per
+step and groups steps into zlib-compressed blocks.  Each block starts with a
+full-state keyframe, and a block index at the end of the file gives the byte
+offset of every block, so any step can be reconstructed by decompressing a
+single block.
+
+File layout (little endian)::
+
+    header   "QTRB" | version u16 | reserved u16 | n_qubits u32 | block_steps u32
+    block*   payload_len u32 | n_records u32 | zlib(keyframe + records)
+    index    block offsets u64 * n_blocks
+    footer   n_steps u64 | index_offset u64 | "QTRE"
+
+A keyframe is the packed bit state *after* the first step of the block.  A
+record is ``gate u8 | nargs u8 | args u32*nargs | nchanged u32 |
+changed u32*nchanged`` where ``changed`` lists the qubits whose bit toggled.
+Files without a footer (e.g. an interrupted simulation) are still readable;
+the block index is rebuilt by scanning the block headers.
+
+Example usage::
+
+    python src/qasm_trace_bin.py result/qasm_trace.bin --step 12345
+"""
+from __future__ import annotations
+
+import argparse
+import struct
+import zlib
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+MAGIC = b"QTRB"
+END_MAGIC = b"QTRE"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+BLOCK_HEADER = struct.Struct("<II")
+FOOTER = struct.Struct("<QQ4s")
+U32 = struct.Struct("<I")
+GATE_CODES: Dict[str, int] = {
+    "INIT": 0,
+    "SWAP": 1,
+    "CX": 2,
+    "CZ": 3,
+    "H": 4,
+    "S": 5,
+    "X": 6,
+    "Y": 7,
+    "Z": 8,
+    "MEASURE": 9,
+}
+GATE_NAMES: Dict[int, str] = {code: name for name, code in GATE_CODES.items()}
+DEFAULT_BLOCK_STEPS = 4096
+
+
+def pack_bits(state: Sequence[int]) -> bytes:
+    """Return ``state`` packed eight qubits per byte (qubit 0 in bit 0)."""
+    out = bytearray((len(state) + 7) // 8)
+    for idx, bit in enumerate(state):
+        if bit:
+            out[idx >> 3] |= 1 << (idx & 7)
+    return bytes(out)
+
+
+def unpack_bits(data: bytes, n_qubits: int) -> List[int]:
+    """Inverse of :func:`pack_bits`."""
+    return [(data[idx >> 3] >> (idx & 7)) & 1 for idx in range(n_qubits)]
+
+
+class TraceWriter:
+    """Incrementally write a delta-encoded trace.
+
+    ``append`` is called once per executed step with the indices of the qubits
+    whose value toggled.  Only the current block is kept in memory.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        initial: Sequence[int],
+        block_steps: int = DEFAULT_BLOCK_STEPS,
+        level: int = 6,
+    ) -> None:
+        if block_steps <= 0:
+            raise ValueError("block_steps must be positive")
+        self.path = path
+        self.n_qubits = len(initial)
+        self.block_steps = block_steps
+        self.level = level
+        self.n_steps = 0
+        self._state = bytearray(initial)
+        self._offsets: array = array("Q")
+        self._buf = bytearray()
+        self._records = 0
+        self._fh = open(path, "wb")
+        self._fh.write(HEADER.pack(MAGIC, VERSION, 0, self.n_qubits, block_steps))
+
+    def append(self, gate: str, args: Sequence[int] = (), changed: Iterable[int] = ()) -> None:
+        """Record one step.  ``changed`` lists qubits whose bit toggled."""
+        code = GATE_CODES.get(gate.upper())
+        if code is None:
+            raise ValueError(f"Unsupported gate in trace: {gate}")
+        changed = list(changed)
+        for idx in changed:
+            self._state[idx] ^= 1
+        if self.n_steps % self.block_steps == 0:
+            self._flush_block()
+            self._buf += pack_bits(self._state)
+        self._buf += struct.pack(f"<BB{len(args)}I", code, len(args), *args)
+        self._buf += U32.pack(len(changed))
+        if changed:
+            self._buf += struct.pack(f"<{len(changed)}I", *changed)
+        self._records += 1
+        self.n_steps += 1
+
+    def _flush_block(self) -> None:
+        if not self._records:
+            return
+        payload = zlib.compress(bytes(self._buf), self.level)
+        self._offsets.append(self._fh.tell())
+        self._fh.write(BLOCK_HEADER.pack(len(payload), self._records))
+        self._fh.write(payload)
+        self._buf = bytearray()
+        self._records = 0
+
+    def close(self) -> None:
+        if self._fh.closed:
+            return
+        self._flush_block()
+        index_offset = self._fh.tell()
+        self._fh.write(self._offsets.tobytes())
+        self._fh.write(FOOTER.pack(self.n_steps, index_offset, END_MAGIC))
+        self._fh.close()
+
+    def __enter__(self) -> "TraceWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+class TraceReader:
+    """Random-access reader for traces written by :class:`TraceWriter`.
+
+    ``reader[i]`` returns the same dictionary layout as one entry of the JSON
+    trace (``step``, ``gate``, optional ``args`` and ``qubits``).  Only the
+    block containing the requested step is decompressed and the most recently
+    used block is cached.  Iterating over the reader decodes every block once.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fh = open(path, "rb")
+        magic, version, _, n_qubits, block_steps = HEADER.unpack(self._fh.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a binary QASM trace")
+        if version != VERSION:
+            raise ValueError(f"Unsupported trace version {version}")
+        self.n_qubits = n_qubits
+        self.block_steps = block_steps
+        self._nbytes = (n_qubits + 7) // 8
+        self._cache_idx = -1
+        self._cache: List[Tuple[int, Tuple[int, ...], Tuple[int, ...]]] = []
+        self._keyframe = b""
+        self._offsets, self.n_steps = self._read_index()
+
+    def _read_index(self) -> Tuple[array, int]:
+        fh = self._fh
+        fh.seek(0, 2)
+        size = fh.tell()
+        if size >= HEADER.size + FOOTER.size:
+            fh.seek(size - FOOTER.size)
+            n_steps, index_offset, magic = FOOTER.unpack(fh.read(FOOTER.size))
+            if magic == END_MAGIC:
+                fh.seek(index_offset)
+                offsets = array("Q")
+                offsets.frombytes(fh.read(size - FOOTER.size - index_offset))
+                return offsets, n_steps
+        return self._scan_blocks(size)
+
+    def _scan_blocks(self, size: int) -> Tuple[array, int]:
+        """Rebuild the block index of a trace that was never closed."""
+        offsets = array("Q")
+        n_steps = 0
+        pos = HEADER.size
+        while pos + BLOCK_HEADER.size <= size:
+            self._fh.seek(pos)
+            length, records = BLOCK_HEADER.unpack(self._fh.read(BLOCK_HEADER.size))
+            if pos + BLOCK_HEADER.size + length > size:
+                break
+            offsets.append(pos)
+            n_steps += records
+            pos += BLOCK_HEADER.size + length
+        return offsets, n_steps
+
+    def _load_block(self, block: int) -> None:
+        if block == self._cache_idx:
+            return
+        self._fh.seek(self._offsets[block])
+        length, n_records = BLOCK_HEADER.unpack(self._fh.read(BLOCK_HEADER.size))
+        data = zlib.decompress(self._fh.read(length))
+        self._keyframe = data[: self._nbytes]
+        records = []
+        pos = self._nbytes
+        for _ in range(n_records):
+            code, nargs = data[pos], data[pos + 1]
+            pos += 2
+            args = struct.unpack_from(f"<{nargs}I", data, pos)
+            pos += 4 * nargs
+            (nchanged,) = U32.unpack_from(data, pos)
+            pos += 4
+            changed = struct.unpack_from(f"<{nchanged}I", data, pos)
+            pos += 4 * nchanged
+            records.append((code, args, changed))
+        self._cache = records
+        self._cache_idx = block
+
+    def __len__(self) -> int:
+        return self.n_steps
+
+    def _entry(self, step: int, record: Tuple[int, Tuple[int, ...], Tuple[int, ...]], state: List[int]) -> Dict:
+        code, args, _ = record
+        entry: Dict[str, object] = {"step": step, "gate": GATE_NAMES.get(code, str(code))}
+        if args:
+            entry["args"] = list(args)
+        entry["qubits"] = state.copy()
+        return entry
+
+    def state_at(self, step: int) -> List[int]:
+        """Return the qubit state after ``step``."""
+        return self[step]["qubits"]
+
+    def __getitem__(self, step: int) -> Dict:
+        if step < 0:
+            step += self.n_steps
+        if not 0 <= step < self.n_steps:
+            raise IndexError(step)
+        block, offset = divmod(step, self.block_steps)
+        self._load_block(block)
+        state = unpack_bits(self._keyframe, self.n_qubits)
+        for _, _, changed in self._cache[1 : offset + 1]:
+            for idx in changed:
+                state[idx] ^= 1
+        return self._entry(step, self._cache[offset], state)
+
+    def __iter__(self) -> Iterator[Dict]:
+        step = 0
+        for block in range(len(self._offsets)):
+            self._load_block(block)
+            state = unpack_bits(self._keyframe, self.n_qubits)
+            for offset, record in enumerate(self._cache):
+                if offset:
+                    for idx in record[2]:
+                        state[idx] ^= 1
+                yield self._entry(step, record, state)
+                step += 1
+
+    def close(self) -> None:
+        self._fh.close()
+
+    def __enter__(self) -> "TraceReader":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Inspect a binary QASM trace")
+    parser.add_argument("trace", nargs="?", default="result/qasm_trace.bin", help="binary trace file")
+    parser.add_argument("--step", type=int, action="append", help="print the state after STEP (repeatable)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    with TraceReader(args.trace) as reader:
+        print(
+            f"{args.trace}: {len(reader)} steps, {reader.n_qubits} qubits, "
+            f"{reader.block_steps} steps per keyframe"
+        )
+        steps: Optional[List[int]] = args.step
+        for step in steps or [len(reader) - 1]:
+            entry = reader[step]
+            bits = "".join(str(b) for b in entry["qubits"])
+            gate_args = entry.get("args")
+            gate = entry["gate"] + (f" {gate_args}" if gate_args else "")
+            print(f"Step {entry['step']}: {gate} |{bits}⟩")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,24 @@
 #!/usr/bin/env python3
-"""Render QASM execution trace as a series of images or an animated GIF."""
+"""Render QASM execution trace as a series of images or an animated GIF.
+
+Frames are drawn incrementally: the qubit labels are drawn once on a static
+background, and each subsequent frame only redraws the title and the qubit
+rows whose value changed since the previous rendered frame.  The selected
+steps (every ``--stride``-th one plus the last) are split into chunks that
+are rendered and GIF-encoded by a process pool.  Encoded frames are spliced
+into the output GIF as soon as their chunk finishes, so memory stays bounded
+by a few chunks regardless of the trace length.
+"""
 from __future__ import annotations
 
+import argparse
+import io
 import json
 import os
-from typing import Dict, List
+import struct
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence
 
 from PIL import Image, ImageDraw, ImageFont
 
@@ -12,68 +26,258 @@ TRACE_PATH = "result/qasm_trace.json"
 PNG_DIR = "docs/plot"
 GIF_PATH = "result/qasm_trace.gif"
 
+WIDTH = 220
+TOP = 25
+ROW_HEIGHT = 20
+FRAME_MS = 600
+CHUNK_FRAMES = 64
+
+
+def load_trace(path: str) -> Sequence[Dict]:
+    """Return trace step dictionaries from ``path``.
 
-def load_trace(path: str) -> List[Dict]:
-    """Return list of trace step dictionaries from ``path``."""
+    Binary ``.bin`` traces are opened with :class:`TraceReader`, which decodes
+    steps on demand instead of loading the whole file; release it with
+    :func:`close_trace`.
+    """
     if not os.path.exists(path):
         return []
+    if path.endswith(".bin"):
+        from src.qasm_trace_bin import TraceReader
+
+        return TraceReader(path)
     with open(path, "r", encoding="utf-8") as fh:
         return json.load(fh)
 
 
-def draw_step(step: Dict, font: ImageFont.ImageFont) -> Image.Image:
-    """Return an image visualizing ``step``."""
-    qubits = step["qubits"]
-    width = 220
-    height = 30 + 20 * len(qubits)
-    img = Image.new("RGB", (width, height), "white")
-    draw = ImageDraw.Draw(img)
+def close_trace(trace: Sequence[Dict]) -> None:
+    """Close the file behind a trace returned by :func:`load_trace`, if any."""
+    close = getattr(trace, "close", None)
+    if close is not None:
+        close()
+
 
-    gate = step["gate"]
+def load_font() -> ImageFont.ImageFont:
+    try:
+        return ImageFont.truetype("DejaVuSansMono.ttf", 14)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def step_title(step: Dict) -> str:
+    title = f"Step {step['step']}: {step['gate']}"
     args = step.get("args", [])
-    title = f"Step {step['step']}: {gate}"
     if args:
-        title += f" q[{args[0]}], q[{args[1]}]"
-    draw.text((10, 5), title, fill="black", font=font)
+        title += " " + ", ".join(f"q[{a}]" for a in args)
+    return title
 
-    y = 25
-    for idx, bit in enumerate(qubits):
-        state = "\N{LARGE GREEN SQUARE}" if bit else "\N{BLACK LARGE SQUARE}"
-        draw.text((10, y), f"q[{idx:2d}]: {state}", fill="black", font=font)
-        y += 20
 
-    return img
+def bit_glyph(bit: int) -> str:
+    return "\N{LARGE GREEN SQUARE}" if bit else "\N{BLACK LARGE SQUARE}"
 
 
-def main() -> None:
-    trace = load_trace(TRACE_PATH)
-    if not trace:
-        print(f"Trace file {TRACE_PATH} not found or empty")
-        return
+class FrameRenderer:
+    """Draw successive steps on one canvas, redrawing only changed rows."""
 
-    os.makedirs(PNG_DIR, exist_ok=True)
-    try:
-        font = ImageFont.truetype("DejaVuSansMono.ttf", 14)
-    except OSError:
-        font = ImageFont.load_default()
+    def __init__(self, n_qubits: int, font: ImageFont.ImageFont) -> None:
+        self.font = font
+        self.background = Image.new("RGB", (WIDTH, 30 + ROW_HEIGHT * n_qubits), "white")
+        draw = ImageDraw.Draw(self.background)
+        self.glyph_x: List[float] = []
+        for idx in range(n_qubits):
+            label = f"q[{idx:2d}]: "
+            draw.text((10, TOP + ROW_HEIGHT * idx), label, fill="black", font=font)
+            self.glyph_x.append(10 + draw.textlength(label, font=font))
+        self.canvas: Optional[Image.Image] = None
+        self.prev: List[int] = []
+
+    def render(self, step: Dict) -> Image.Image:
+        """Return the canvas updated to ``step`` (reused between calls)."""
+        qubits = list(step["qubits"])
+        if self.canvas is None:
+            self.canvas = self.background.copy()
+            changed: Sequence[int] = range(len(qubits))
+        else:
+            changed = [i for i, (a, b) in enumerate(zip(qubits, self.prev)) if a != b]
+        draw = ImageDraw.Draw(self.canvas)
+        draw.rectangle((0, 0, WIDTH, TOP - 1), fill="white")
+        draw.text((10, 5), step_title(step), fill="black", font=self.font)
+        for idx in changed:
+            y = TOP + ROW_HEIGHT * idx
+            x = self.glyph_x[idx]
+            draw.rectangle((x, y, WIDTH, y + ROW_HEIGHT - 1), fill="white")
+            draw.text((x, y), bit_glyph(qubits[idx]), fill="black", font=self.font)
+        self.prev = qubits
+        return self.canvas
+
+
+def encode_gif_frame(img: Image.Image) -> bytes:
+    """Return ``img`` as a standalone single-frame GIF."""
+    buf = io.BytesIO()
+    img.quantize(16, method=Image.Quantize.FASTOCTREE).save(buf, format="GIF")
+    return buf.getvalue()
+
+
+def _skip_sub_blocks(data: bytes, pos: int) -> int:
+    while data[pos]:
+        pos += data[pos] + 1
+    return pos + 1
+
+
+class GifStreamWriter:
+    """Append single-frame GIFs to an animated GIF without buffering them.
+
+    Each frame's global colour table is moved into a local colour table and
+    preceded by a graphic control extension carrying the frame delay.
+    """
 
+    def __init__(self, path: str, width: int, height: int, duration_ms: int = FRAME_MS, loop: int = 0) -> None:
+        self.fh: BinaryIO = open(path, "wb")
+        self.delay = max(1, round(duration_ms / 10))
+        self.frames = 0
+        self.fh.write(b"GIF89a" + struct.pack("<HHBBB", width, height, 0, 0, 0))
+        self.fh.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", loop) + b"\x00")
+
+    def write_frame(self, gif: bytes) -> None:
+        if gif[:3] != b"GIF":
+            raise ValueError("Not a GIF frame")
+        packed = gif[10]
+        pos = 13
+        gct = b""
+        if packed & 0x80:
+            gct_size = packed & 0x07
+            gct = gif[pos : pos + 3 * (2 << gct_size)]
+            pos += len(gct)
+        while gif[pos] == 0x21:  # skip the encoder's own extensions
+            pos = _skip_sub_blocks(gif, pos + 2)
+        if gif[pos] != 0x2C:
+            raise ValueError("GIF frame has no image descriptor")
+        descriptor = bytearray(gif[pos : pos + 10])
+        pos += 10
+        if descriptor[9] & 0x80:
+            local = gif[pos : pos + 3 * (2 << (descriptor[9] & 0x07))]
+            pos += len(local)
+        elif gct:
+            descriptor[9] |= 0x80 | gct_size
+            local = gct
+        else:
+            local = b""
+        end = _skip_sub_blocks(gif, pos + 1)
+        self.fh.write(b"\x21\xf9\x04\x04" + struct.pack("<H", self.delay) + b"\x00\x00")
+        self.fh.write(bytes(descriptor) + local + gif[pos:end])
+        self.frames += 1
+
+    def close(self) -> None:
+        self.fh.write(b"\x3b")
+        self.fh.close()
+
+
+_WORKER: Dict[str, object] = {}
+
+
+def _init_worker(trace_path: str, png_dir: Optional[str]) -> None:
+    _WORKER["trace"] = load_trace(trace_path)
+    _WORKER["font"] = load_font()
+    _WORKER["png_dir"] = png_dir
+
+
+def _render_chunk(indices: Sequence[int]) -> List[bytes]:
+    """Render ``indices`` of the worker's trace and return encoded frames."""
+    trace = _WORKER["trace"]
+    png_dir = _WORKER["png_dir"]
+    renderer: Optional[FrameRenderer] = None
     frames = []
-    for step in trace:
-        img = draw_step(step, font)
-        png_path = os.path.join(PNG_DIR, f"qasm_trace_step_{step['step']:03d}.png")
-        img.save(png_path)
-        frames.append(img)
-
-    if frames:
-        frames[0].save(
-            GIF_PATH,
-            save_all=True,
-            append_images=frames[1:],
-            duration=600,
-            loop=0,
-        )
-
-    print(f"Wrote {len(frames)} frames to {PNG_DIR} and {GIF_PATH}")
+    for i in indices:
+        step = trace[i]
+        if renderer is None:
+            renderer = FrameRenderer(len(step["qubits"]), _WORKER["font"])
+        img = renderer.render(step)
+        if png_dir:
+            img.save(os.path.join(png_dir, f"qasm_trace_step_{step['step']:03d}.png"))
+        frames.append(encode_gif_frame(img))
+    return frames
+
+
+def frame_chunks(n_steps: int, stride: int, chunk: int) -> Iterator[List[int]]:
+    """Yield lists of step indices: every ``stride``-th step plus the last."""
+    indices = range(0, n_steps, stride)
+    for start in range(0, len(indices), chunk):
+        part = list(indices[start : start + chunk])
+        if start + chunk >= len(indices) and part[-1] != n_steps - 1:
+            part.append(n_steps - 1)
+        yield part
+
+
+def render_trace(
+    trace_path: str,
+    gif_path: str,
+    png_dir: Optional[str] = PNG_DIR,
+    stride: int = 1,
+    workers: int = 1,
+    chunk: int = CHUNK_FRAMES,
+    duration_ms: int = FRAME_MS,
+) -> int:
+    """Render ``trace_path`` to ``gif_path`` and return the number of frames."""
+    trace = load_trace(trace_path)
+    try:
+        n_steps = len(trace)
+        if not n_steps:
+            return 0
+        height = 30 + ROW_HEIGHT * len(trace[0]["qubits"])
+    finally:
+        close_trace(trace)
+    if png_dir:
+        os.makedirs(png_dir, exist_ok=True)
+
+    writer = GifStreamWriter(gif_path, WIDTH, height, duration_ms)
+    try:
+        chunks = frame_chunks(n_steps, max(1, stride), chunk)
+        if workers <= 1:
+            _init_worker(trace_path, png_dir)
+            try:
+                for part in chunks:
+                    for frame in _render_chunk(part):
+                        writer.write_frame(frame)
+            finally:
+                close_trace(_WORKER.pop("trace"))
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(trace_path, png_dir)) as pool:
+                pending: deque = deque()
+                for part in chunks:
+                    pending.append(pool.submit(_render_chunk, part))
+                    if len(pending) >= 2 * workers:
+                        for frame in pending.popleft().result():
+                            writer.write_frame(frame)
+                while pending:
+                    for frame in pending.popleft().result():
+                        writer.write_frame(frame)
+    finally:
+        writer.close()
+    return writer.frames
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Render a QASM execution trace to PNG frames and a GIF")
+    p.add_argument("--trace", default=TRACE_PATH, help="trace file (.json or .bin)")
+    p.add_argument("--gif", default=GIF_PATH, help="output animated GIF")
+    p.add_argument("--png-dir", default=PNG_DIR, help="directory for per-step PNG files")
+    p.add_argument("--no-png", action="store_true", help="skip per-step PNG files")
+    p.add_argument("--stride", type=int, default=1, help="render every N-th step (the last step is always kept)")
+    p.add_argument("--workers", type=int, default=1, help="rendering processes (0 = all CPUs)")
+    p.add_argument("--duration", type=int, default=FRAME_MS, help="frame duration in ms")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    png_dir = None if args.no_png else args.png_dir
+    workers = args.workers or os.cpu_count() or 1
+    count = render_trace(args.trace, args.gif, png_dir, args.stride, workers, duration_ms=args.duration)
+    if not count:
+        print(f"Trace file {args.trace} not found or empty")
+        return
+    where = f"{png_dir} and {args.gif}" if png_dir else args.gif
+    print(f"Wrote {count} frames to {where}")
 
 
 if __name__ == "__main__":
@@ -5,16 +5,44 @@ This script reads ``result/path_matrix.json`` and a JSON list of logical
 operations and outputs an OPENQASM file with SWAP-resolved gates.  Each
 non-adjacent CX gate is decomposed along the shortest physical route.
 
+Two routing modes are available:
+
+``restore`` (default)
+    Move the control next to the target, apply CX and undo every SWAP so the
+    mapping is the identity again after each gate.
+``lazy``
+    Keep the evolving logical→physical mapping between gates and move both
+    endpoints towards each other.  With ``--restore-final`` the initial
+    mapping is re-established once at the end of the circuit.
+
+Gate counts and circuit depth of both modes are printed for comparison.
+
+With ``--batch`` a directory or glob of gate-list JSON files is routed
+against the same chip.  The state map and path matrix are loaded once in the
+parent process and inherited by forked workers (or sent once per worker
+where ``fork`` is unavailable); each worker writes its own QASM output and
+returns the per-file SWAP/CX counts and depth.
+
 Example usage::
 
-    python src/resolve_swap_paths.py
+    python src/resolve_swap_paths.py --mode lazy --restore-final
+    python src/resolve_swap_paths.py --batch "result/rb_gates/*.json" --workers 4
 """
 from __future__ import annotations
 
+import argparse
+import glob
 import json
-from typing import Dict, List, Tuple
+import multiprocessing as mp
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
 
 SUBSCRIPT_MAP = str.maketrans("₀₁₂₃₄₅₆₇₈₉", "0123456789")
+GATE_PATTERN = re.compile(r"^(SWAP|CX)\s+q\[(\d+)\],\s*q\[(\d+)\];")
 
 
 def parse_state_map(path: str) -> Tuple[Dict[str, int], Dict[str, str], Dict[str, str]]:
@@ -70,7 +98,7 @@ def resolve_gates(gates: List[Dict[str, str]], path_matrix: Dict[str, Dict[str,
     pos_to_state = {node: node for node in node_to_idx}
     state_to_pos = {node: node for node in node_to_idx}
 
-    lines: List[str] = ["OPENQASM 2.0;", "include \"qelib1.inc\";", "qreg q[16];", ""]
+    lines = qasm_header(len(node_to_idx))
     for gate in gates:
         gtype = gate.get("gate")
         if gtype != "CX":
@@ -98,15 +126,269 @@ def resolve_gates(gates: List[Dict[str, str]], path_matrix: Dict[str, Dict[str,
     return lines
 
 
+def qasm_header(n_qubits: int) -> List[str]:
+    return ["OPENQASM 2.0;", "include \"qelib1.inc\";", f"qreg q[{n_qubits}];", ""]
+
+
+def coupling_adjacency(path_matrix: Dict[str, Dict[str, List[str]]]) -> Dict[str, Set[str]]:
+    """Return physical adjacency derived from the single-hop paths."""
+    adj: Dict[str, Set[str]] = {node: set() for node in path_matrix}
+    for src, dests in path_matrix.items():
+        for dst, path in dests.items():
+            if len(path) == 2:
+                adj[src].add(dst)
+                adj.setdefault(dst, set()).add(src)
+    return adj
+
+
+def restore_mapping(
+    adj: Dict[str, Set[str]],
+    node_to_idx: Dict[str, int],
+    pos_to_state: Dict[str, str],
+    state_to_pos: Dict[str, str],
+) -> List[str]:
+    """Return SWAPs that put every state back on its initial position.
+
+    Positions are fixed leaf-first on a BFS spanning tree.  Each state travels
+    along the tree path inside the not-yet-fixed subtree, so SWAPs never
+    disturb positions that were already restored.
+    """
+    nodes = sorted(adj, key=lambda n: node_to_idx.get(n, 0))
+    if not nodes:
+        return []
+    root = nodes[0]
+    parent: Dict[str, Optional[str]] = {root: None}
+    depth = {root: 0}
+    order = [root]
+    queue = deque([root])
+    while queue:
+        u = queue.popleft()
+        for v in sorted(adj[u], key=lambda n: node_to_idx.get(n, 0)):
+            if v not in parent:
+                parent[v] = u
+                depth[v] = depth[u] + 1
+                order.append(v)
+                queue.append(v)
+
+    lines: List[str] = []
+    for target in reversed(order):
+        cur = state_to_pos[target]
+        if cur == target:
+            continue
+        up: List[str] = [cur]
+        down: List[str] = [target]
+        while depth[up[-1]] > depth[down[-1]]:
+            up.append(parent[up[-1]])  # type: ignore[arg-type]
+        while depth[down[-1]] > depth[up[-1]]:
+            down.append(parent[down[-1]])  # type: ignore[arg-type]
+        while up[-1] != down[-1]:
+            up.append(parent[up[-1]])  # type: ignore[arg-type]
+            down.append(parent[down[-1]])  # type: ignore[arg-type]
+        path = up + list(reversed(down[:-1]))
+        for i in range(len(path) - 1):
+            lines.append(emit_swap(path[i], path[i + 1], node_to_idx, pos_to_state, state_to_pos))
+    return lines
+
+
+def resolve_gates_lazy(
+    gates: List[Dict[str, str]],
+    path_matrix: Dict[str, Dict[str, List[str]]],
+    node_to_idx: Dict[str, int],
+    restore: bool = False,
+) -> List[str]:
+    """Route CX gates while keeping the mapping between gates.
+
+    Both endpoints walk towards each other along the shortest path, so a
+    distance-``d`` gate costs ``d - 1`` SWAPs instead of ``2 (d - 1)``, and
+    later gates benefit from states that are already close together.
+    """
+    pos_to_state = {node: node for node in node_to_idx}
+    state_to_pos = {node: node for node in node_to_idx}
+
+    lines = qasm_header(len(node_to_idx))
+    for gate in gates:
+        if gate.get("gate") != "CX":
+            continue
+        q1 = gate.get("q1")
+        q2 = gate.get("q2")
+        if q1 is None or q2 is None:
+            continue
+        start = state_to_pos.get(q1)
+        end = state_to_pos.get(q2)
+        if start is None or end is None:
+            continue
+        path = path_matrix[start][end]
+        hops = max(len(path) - 2, 0)
+        forward = (hops + 1) // 2
+        lines.append(f"// {q1} ↔ {q2} via {' → '.join(path)} (SWAPs: {hops})")
+        for i in range(forward):
+            lines.append(emit_swap(path[i], path[i + 1], node_to_idx, pos_to_state, state_to_pos))
+        for i in range(hops - forward):
+            lines.append(emit_swap(path[-1 - i], path[-2 - i], node_to_idx, pos_to_state, state_to_pos))
+        lines.append(f"CX q[{node_to_idx[state_to_pos[q1]]}], q[{node_to_idx[state_to_pos[q2]]}];")
+        lines.append("")
+    if restore:
+        swaps = restore_mapping(coupling_adjacency(path_matrix), node_to_idx, pos_to_state, state_to_pos)
+        if swaps:
+            lines.append(f"// restore initial mapping (SWAPs: {len(swaps)})")
+            lines.extend(swaps)
+            lines.append("")
+    return lines
+
+
+def circuit_stats(lines: List[str]) -> Dict[str, int]:
+    """Return SWAP/CX counts and ASAP depth of SWAP-resolved QASM ``lines``."""
+    level: Dict[int, int] = {}
+    stats = {"SWAP": 0, "CX": 0, "gates": 0, "depth": 0}
+    for line in lines:
+        m = GATE_PATTERN.match(line.strip())
+        if not m:
+            continue
+        gate, a, b = m.group(1), int(m.group(2)), int(m.group(3))
+        layer = max(level.get(a, 0), level.get(b, 0)) + 1
+        level[a] = level[b] = layer
+        stats[gate] += 1
+        stats["gates"] += 1
+        stats["depth"] = max(stats["depth"], layer)
+    return stats
+
+
+def format_stats(label: str, stats: Dict[str, int]) -> str:
+    return (
+        f"{label:<8} gates={stats['gates']:<6} SWAP={stats['SWAP']:<6} "
+        f"CX={stats['CX']:<6} depth={stats['depth']}"
+    )
+
+
+RoutingTables = Tuple[Dict[str, int], Dict[str, Dict[str, List[str]]]]
+
+# routing tables and options shared with batch workers
+_BATCH: Dict[str, object] = {}
+
+
+def _set_batch_state(tables: RoutingTables, mode: str, restore_final: bool) -> None:
+    _BATCH.update(tables=tables, mode=mode, restore_final=restore_final)
+
+
+def _route_file(job: Tuple[str, str]) -> Dict[str, object]:
+    """Route one gate file with the shared tables and write its QASM."""
+    path, output = job
+    start = time.perf_counter()
+    node_to_idx, path_matrix = _BATCH["tables"]
+    gates = load_gate_sequence(path)
+    if _BATCH["mode"] == "lazy":
+        lines = resolve_gates_lazy(gates, path_matrix, node_to_idx, restore=_BATCH["restore_final"])
+    else:
+        lines = resolve_gates(gates, path_matrix, node_to_idx)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as fh:
+        fh.write("\n".join(lines))
+    stats = circuit_stats(lines)
+    return {"file": path, "output": output, **stats, "seconds": time.perf_counter() - start}
+
+
+def batch_inputs(pattern: str) -> List[str]:
+    """Return the gate files named by a directory or a glob ``pattern``."""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.json")
+    return sorted(glob.glob(pattern))
+
+
+def batch_outputs(files: List[str], out_dir: str) -> List[str]:
+    """Return the QASM output path of each gate file.
+
+    Outputs mirror the input paths relative to their common directory, so
+    inputs sharing a basename (``runs/*/gates.json``) do not overwrite each
+    other.
+    """
+    if not files:
+        return []
+    dirs = [os.path.dirname(os.path.abspath(path)) for path in files]
+    root = os.path.commonpath(dirs)
+    return [
+        os.path.normpath(os.path.join(out_dir, os.path.relpath(d, root), os.path.splitext(os.path.basename(path))[0] + ".qasm"))
+        for d, path in zip(dirs, files)
+    ]
+
+
+def route_batch(
+    files: List[str],
+    tables: RoutingTables,
+    out_dir: str,
+    mode: str = "restore",
+    restore_final: bool = False,
+    workers: int = 1,
+) -> List[Dict[str, object]]:
+    """Route every file in ``files`` and return per-file summaries in order."""
+    os.makedirs(out_dir, exist_ok=True)
+    _set_batch_state(tables, mode, restore_final)
+    jobs = list(zip(files, batch_outputs(files, out_dir)))
+    if workers <= 1:
+        return [_route_file(job) for job in jobs]
+    chunksize = max(1, len(files) // (workers * 8))
+    if "fork" in mp.get_all_start_methods():
+        # forked workers inherit _BATCH without copying the tables
+        pool = ProcessPoolExecutor(workers, mp_context=mp.get_context("fork"))
+    else:
+        pool = ProcessPoolExecutor(
+            workers, initializer=_set_batch_state, initargs=(tables, mode, restore_final)
+        )
+    with pool:
+        return list(pool.map(_route_file, jobs, chunksize=chunksize))
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Resolve logical CX gates into nearest-neighbour SWAP/CX QASM")
+    p.add_argument("--mode", choices=["restore", "lazy"], default="restore", help="routing strategy")
+    p.add_argument("--restore-final", action="store_true", help="lazy mode: restore the initial mapping at the end")
+    p.add_argument("--state-map", default="result/qubit_state_map.txt", help="qubit state map file")
+    p.add_argument("--paths", default="result/path_matrix.json", help="all-pairs path matrix")
+    p.add_argument("--gates", default="result/sample_logical_gates.json", help="logical gate list JSON")
+    p.add_argument("-o", "--output", default="result/iirb_swap_resolved.qasm", help="output QASM file")
+    p.add_argument("--batch", help="directory or glob of gate list JSON files to route")
+    p.add_argument("--out-dir", default="result/routed", help="batch mode: output directory")
+    p.add_argument("--workers", type=int, default=0, help="batch mode: worker processes (0 = all CPUs)")
+    return p.parse_args()
+
+
+def batch_main(args: argparse.Namespace) -> None:
+    files = batch_inputs(args.batch)
+    if not files:
+        print(f"No gate files match {args.batch}")
+        return
+    node_to_idx, _, _ = parse_state_map(args.state_map)
+    tables = (node_to_idx, load_path_matrix(args.paths))
+    workers = args.workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    results = route_batch(files, tables, args.out_dir, args.mode, args.restore_final, workers)
+    elapsed = time.perf_counter() - start
+    for res in results:
+        print(f"{os.path.basename(res['file']):30s} SWAP={res['SWAP']:<6d} CX={res['CX']:<6d} depth={res['depth']}")
+    summary_path = os.path.join(args.out_dir, "routing_summary.json")
+    with open(summary_path, "w") as fh:
+        json.dump(results, fh, indent=2)
+    print(f"Routed {len(files)} files in {elapsed:.2f} s ({len(files) / elapsed:.1f} files/s); wrote {summary_path}")
+
+
 def main() -> None:
-    node_to_idx, pos_to_state, state_to_pos = parse_state_map("result/qubit_state_map.txt")
-    path_matrix = load_path_matrix("result/path_matrix.json")
-    gates = load_gate_sequence("result/sample_logical_gates.json")
-    lines = resolve_gates(gates, path_matrix, node_to_idx)
-    out_path = "result/iirb_swap_resolved.qasm"
-    with open(out_path, "w") as fh:
+    args = parse_args()
+    if args.batch:
+        batch_main(args)
+        return
+    node_to_idx, pos_to_state, state_to_pos = parse_state_map(args.state_map)
+    path_matrix = load_path_matrix(args.paths)
+    gates = load_gate_sequence(args.gates)
+    baseline = resolve_gates(gates, path_matrix, node_to_idx)
+    if args.mode == "lazy":
+        lines = resolve_gates_lazy(gates, path_matrix, node_to_idx, restore=args.restore_final)
+    else:
+        lines = baseline
+    with open(args.output, "w") as fh:
         fh.write("\n".join(lines))
-    print(f"Wrote QASM to {out_path}")
+    print(format_stats("restore", circuit_stats(baseline)))
+    if args.mode == "lazy":
+        print(format_stats("lazy", circuit_stats(lines)))
+    print(f"Wrote QASM to {args.output}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""SABRE-style lookahead SWAP router over a gate dependency DAG.
+
+``resolve_swap_paths.py`` routes each logical CX on its own.  For long gate
+lists this router follows the SABRE heuristic [arXiv:1809.02573]:
+
+- The CX list is turned into a dependency DAG (one predecessor per qubit) and
+  a *front layer* of gates whose predecessors have all executed is kept.
+- Executable front gates (endpoints adjacent on the chip) are emitted
+  immediately.  Otherwise every SWAP touching a front-layer qubit is scored
+  with a precomputed distance matrix over the front layer plus a lookahead
+  window of upcoming gates, weighted by a decay factor that discourages
+  repeatedly swapping the same qubits.
+- The initial layout is chosen by bidirectional passes: route forwards, then
+  route the reversed circuit from the resulting mapping, and use the final
+  mapping of that backward pass as the starting layout.
+
+Example usage::
+
+    python src/sabre_route.py --gates result/sample_logical_gates.json
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import shortest_path
+
+from src.resolve_swap_paths import (
+    circuit_stats,
+    coupling_adjacency,
+    format_stats,
+    load_gate_sequence,
+    load_path_matrix,
+    parse_state_map,
+    qasm_header,
+    resolve_gates,
+)
+
+RoutedOp = Tuple[str, int, int]
+
+
+def distance_matrix(n_phys: int, edges: Sequence[Tuple[int, int]]) -> np.ndarray:
+    """Return all-pairs hop distances of the undirected coupling graph."""
+    rows = [u for u, v in edges] + [v for u, v in edges]
+    cols = [v for u, v in edges] + [u for u, v in edges]
+    graph = csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(n_phys, n_phys))
+    dist = shortest_path(graph, directed=False, unweighted=True)
+    if np.isinf(dist).any():
+        raise ValueError("Coupling graph is not connected")
+    return dist.astype(np.int32)
+
+
+class SabreRouter:
+    """Route two-qubit gates on a fixed coupling graph."""
+
+    def __init__(
+        self,
+        n_phys: int,
+        edges: Sequence[Tuple[int, int]],
+        lookahead: int = 20,
+        weight: float = 0.5,
+        decay_delta: float = 0.001,
+        decay_reset: int = 5,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.n_phys = n_phys
+        self.adj: List[List[int]] = [[] for _ in range(n_phys)]
+        for u, v in edges:
+            self.adj[u].append(v)
+            self.adj[v].append(u)
+        self.dist = distance_matrix(n_phys, edges)
+        self._dist_rows = self.dist.tolist()
+        self.lookahead = lookahead
+        self.weight = weight
+        self.decay_delta = decay_delta
+        self.decay_reset = decay_reset
+        self.rng = np.random.default_rng(seed)
+
+    def _pass(self, gates: np.ndarray, layout: np.ndarray, emit: bool) -> Tuple[List[RoutedOp], np.ndarray]:
+        n_gates = len(gates)
+        ga = gates[:, 0].tolist()
+        gb = gates[:, 1].tolist()
+        succ: List[List[int]] = [[] for _ in range(n_gates)]
+        npred = [0] * n_gates
+        last: Dict[int, int] = {}
+        for g in range(n_gates):
+            for q in (ga[g], gb[g]):
+                prev = last.get(q)
+                if prev is not None and (not succ[prev] or succ[prev][-1] != g):
+                    succ[prev].append(g)
+                    npred[g] += 1
+                last[q] = g
+
+        l2p = layout.tolist()
+        p2l = [-1] * self.n_phys
+        for q, p in enumerate(l2p):
+            p2l[p] = q
+        dist = self._dist_rows
+        decay = [1.0] * self.n_phys
+        ops: List[RoutedOp] = []
+        stalled = 0
+        front = [g for g in range(n_gates) if npred[g] == 0]
+
+        while front:
+            stack, front = front, []
+            executed = False
+            while stack:
+                g = stack.pop()
+                pa, pb = l2p[ga[g]], l2p[gb[g]]
+                if dist[pa][pb] == 1:
+                    executed = True
+                    if emit:
+                        ops.append(("CX", pa, pb))
+                    for s in succ[g]:
+                        npred[s] -= 1
+                        if npred[s] == 0:
+                            stack.append(s)
+                else:
+                    front.append(g)
+            if not front:
+                break
+            if executed:
+                decay = [1.0] * self.n_phys
+                stalled = 0
+
+            if stalled > 10 * self.n_phys:
+                # release valve: walk the first front gate along a shortest path
+                g = front[0]
+                swaps = self._forced_path(l2p[ga[g]], l2p[gb[g]])
+            else:
+                swaps = [self._best_swap(front, ga, gb, succ, l2p, decay)]
+            for s1, s2 in swaps:
+                l1, l2 = p2l[s1], p2l[s2]
+                p2l[s1], p2l[s2] = l2, l1
+                if l1 >= 0:
+                    l2p[l1] = s2
+                if l2 >= 0:
+                    l2p[l2] = s1
+                if emit:
+                    ops.append(("SWAP", s1, s2))
+                decay[s1] += self.decay_delta
+                decay[s2] += self.decay_delta
+                stalled += 1
+                if stalled % self.decay_reset == 0:
+                    decay = [1.0] * self.n_phys
+        return ops, np.array(l2p, dtype=np.int64)
+
+    def _forced_path(self, start: int, end: int) -> List[Tuple[int, int]]:
+        path = [start]
+        while self._dist_rows[path[-1]][end] > 1:
+            cur = path[-1]
+            path.append(min(self.adj[cur], key=lambda v: self._dist_rows[v][end]))
+        return [(path[i], path[i + 1]) for i in range(len(path) - 1)]
+
+    def _best_swap(
+        self,
+        front: List[int],
+        ga: List[int],
+        gb: List[int],
+        succ: List[List[int]],
+        l2p: List[int],
+        decay: List[float],
+    ) -> Tuple[int, int]:
+        extended: List[int] = []
+        seen = set(front)
+        queue = list(front)
+        head = 0
+        while head < len(queue) and len(extended) < self.lookahead:
+            for s in succ[queue[head]]:
+                if s not in seen:
+                    seen.add(s)
+                    queue.append(s)
+                    extended.append(s)
+            head += 1
+        extended = extended[: self.lookahead]
+
+        dist = self._dist_rows
+        # physical qubit -> [(other endpoint, layer weight)] for scored gates;
+        # a candidate SWAP only changes the distance of gates it touches
+        touching: Dict[int, List[Tuple[int, float]]] = {}
+        base = 0.0
+        for layer, w in ((front, 1.0 / len(front)), (extended, self.weight / max(len(extended), 1))):
+            for g in layer:
+                pa, pb = l2p[ga[g]], l2p[gb[g]]
+                base += w * dist[pa][pb]
+                touching.setdefault(pa, []).append((pb, w))
+                touching.setdefault(pb, []).append((pa, w))
+
+        front_phys = set()
+        for g in front:
+            front_phys.add(l2p[ga[g]])
+            front_phys.add(l2p[gb[g]])
+        best: List[Tuple[int, int]] = []
+        best_score = float("inf")
+        for p in front_phys:
+            row_p = dist[p]
+            touch_p = touching[p]
+            for nb in self.adj[p]:
+                if nb < p and nb in front_phys:
+                    continue  # already scored from the other endpoint
+                row_nb = dist[nb]
+                delta = 0.0
+                for other, w in touch_p:
+                    if other != nb:
+                        delta += w * (row_nb[other] - row_p[other])
+                for other, w in touching.get(nb, ()):
+                    if other != p:
+                        delta += w * (row_p[other] - row_nb[other])
+                dp, dn = decay[p], decay[nb]
+                score = (base + delta) * (dp if dp > dn else dn)
+                if score < best_score - 1e-12:
+                    best_score = score
+                    best = [(p, nb)]
+                elif score <= best_score + 1e-12:
+                    best.append((p, nb))
+        s1, s2 = best[int(self.rng.integers(len(best)))] if len(best) > 1 else best[0]
+        return (s1, s2) if s1 < s2 else (s2, s1)
+
+    def choose_layout(self, gates: np.ndarray, layout: np.ndarray, passes: int = 1) -> np.ndarray:
+        """Refine ``layout`` with ``passes`` forward/backward routing rounds."""
+        reverse = gates[::-1].copy()
+        for _ in range(passes):
+            _, layout = self._pass(gates, layout, emit=False)
+            _, layout = self._pass(reverse, layout, emit=False)
+        return layout
+
+    def route(
+        self, gates: np.ndarray, layout: np.ndarray, layout_passes: int = 1
+    ) -> Tuple[List[RoutedOp], np.ndarray, np.ndarray]:
+        """Return routed ops plus the initial and final logical→physical layouts.
+
+        A CX with identical control and target is a ``ValueError``: it can
+        never become executable, so routing would not terminate.
+        """
+        gates = np.asarray(gates, dtype=np.int64).reshape(-1, 2)
+        same = np.flatnonzero(gates[:, 0] == gates[:, 1])
+        if same.size:
+            raise ValueError(f"gate {int(same[0])}: CX with identical control and target")
+        if layout_passes > 0 and len(gates):
+            layout = self.choose_layout(gates, layout, layout_passes)
+        ops, final = self._pass(gates, layout, emit=True)
+        return ops, layout, final
+
+
+def gates_to_indices(gates: List[Dict[str, str]], states: Sequence[str]) -> np.ndarray:
+    """Convert ``{"gate": "CX", "q1", "q2"}`` entries to logical index pairs.
+
+    A CX whose ``q1`` equals ``q2`` is a ``ValueError``.
+    """
+    index = {s: i for i, s in enumerate(states)}
+    for n, g in enumerate(gates):
+        if g.get("gate") == "CX" and g.get("q1") == g.get("q2"):
+            raise ValueError(f"gate {n}: CX {g.get('q1')}, {g.get('q2')} has identical control and target")
+    pairs = [
+        (index[g["q1"]], index[g["q2"]])
+        for g in gates
+        if g.get("gate") == "CX" and g.get("q1") in index and g.get("q2") in index
+    ]
+    return np.array(pairs, dtype=np.int64).reshape(-1, 2)
+
+
+def routed_qasm(ops: List[RoutedOp], n_phys: int, layout: Sequence[int], states: Sequence[str]) -> List[str]:
+    lines = qasm_header(n_phys)
+    lines.insert(3, "// initial layout: " + ", ".join(f"{s}→q[{p}]" for s, p in zip(states, layout)))
+    lines.extend(f"{gate} q[{a}], q[{b}];" for gate, a, b in ops)
+    lines.append("")
+    return lines
+
+
+def write_layout_map(src_map: str, dst_map: str, layout: Sequence[int], states: Sequence[str]) -> None:
+    """Write ``layout`` in the ``qubit_state_map.txt`` format of ``src_map``."""
+    coords: Dict[int, Tuple[str, str]] = {}
+    with open(src_map) as fh:
+        for line in fh:
+            line = line.strip()
+            if not line or ":" not in line or "→" not in line:
+                continue
+            qname, rest = line.split(":", 1)
+            coord, _ = rest.split("→", 1)
+            coords[int("".join(ch for ch in qname if ch.isdigit()))] = (qname.strip(), coord.strip())
+    by_phys = {int(p): s for s, p in zip(states, layout)}
+    with open(dst_map, "w") as fh:
+        for idx in sorted(coords):
+            if idx in by_phys:
+                name, coord = coords[idx]
+                fh.write(f"{name}: {coord} → {by_phys[idx]}\n")
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="SABRE lookahead routing of logical CX gates")
+    p.add_argument("--state-map", default="result/qubit_state_map.txt", help="qubit state map file")
+    p.add_argument("--paths", default="result/path_matrix.json", help="all-pairs path matrix")
+    p.add_argument("--gates", default="result/sample_logical_gates.json", help="logical gate list JSON")
+    p.add_argument("-o", "--output", default="result/iirb_sabre_routed.qasm", help="output QASM file")
+    p.add_argument("--layout-out", default="result/sabre_state_map.txt", help="initial layout in state map format")
+    p.add_argument("--lookahead", type=int, default=20, help="size of the lookahead window")
+    p.add_argument("--weight", type=float, default=0.5, help="weight of the lookahead term")
+    p.add_argument("--layout-passes", type=int, default=1, help="forward/backward rounds for the initial layout")
+    p.add_argument("--seed", type=int, default=0, help="tie-break random seed")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    node_to_idx, _, _ = parse_state_map(args.state_map)
+    path_matrix = load_path_matrix(args.paths)
+    gate_list = load_gate_sequence(args.gates)
+
+    states = sorted(node_to_idx, key=lambda s: node_to_idx[s])
+    adj = coupling_adjacency(path_matrix)
+    edges = sorted({tuple(sorted((node_to_idx[u], node_to_idx[v]))) for u in adj for v in adj[u]})
+    n_phys = max(node_to_idx.values()) + 1
+    router = SabreRouter(n_phys, edges, lookahead=args.lookahead, weight=args.weight, seed=args.seed)
+    try:
+        gates = gates_to_indices(gate_list, states)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+    layout = np.array([node_to_idx[s] for s in states], dtype=np.int64)
+
+    start = time.perf_counter()
+    ops, initial, _ = router.route(gates, layout, layout_passes=args.layout_passes)
+    elapsed = time.perf_counter() - start
+
+    lines = routed_qasm(ops, n_phys, initial.tolist(), states)
+    with open(args.output, "w") as fh:
+        fh.write("\n".join(lines))
+    write_layout_map(args.state_map, args.layout_out, initial.tolist(), states)
+
+    print(format_stats("restore", circuit_stats(resolve_gates(gate_list, path_matrix, node_to_idx))))
+    print(format_stats("sabre", circuit_stats(lines)))
+    print(f"Routed {len(gates)} gates in {elapsed:.3f} s; wrote {args.output} and {args.layout_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""ASAP/ALAP scheduler for QASM circuits produced by the pipeline.
+
+Gates are read with :mod:`src.qasm_ops` and scheduled in single linear passes
+that only track, per qubit, when it becomes free and which gate last used it:
+
+- ASAP: each gate starts when the last of its qubits is free.
+- ALAP: the same sweep over the reversed circuit, ending every qubit at the
+  ASAP makespan.
+- ``barrier`` synchronises its qubits and takes no time.
+
+Besides layer indices (unit durations) and start times (configurable
+durations in ns), the report contains the depth, the critical path and the
+idle windows of every qubit.  All passes are ``O(gates)``; the per-gate
+results are flat ``array`` columns next to the op list itself, so
+million-gate circuits are fine.
+
+Example usage::
+
+    python src/schedule_qasm.py result/iirb_swap_resolved.qasm --duration CX=300
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from array import array
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from src.qasm_ops import Op, count_qubits, iter_qasm_ops
+
+QASM_PATH = "result/iirb_swap_resolved.qasm"
+OUT_PATH = "result/schedule_report.json"
+
+# ns; "1Q"/"2Q" are the fallbacks for gates not listed by name
+DEFAULT_DURATIONS: Dict[str, float] = {
+    "1Q": 20.0,
+    "2Q": 200.0,
+    "SWAP": 600.0,
+    "MEASURE": 1000.0,
+    "BARRIER": 0.0,
+    "ID": 20.0,
+}
+
+
+class Schedule(NamedTuple):
+    """Per-gate schedule columns, indexed like the input op list."""
+
+    ops: List[Op]
+    n_qubits: int
+    asap_start: array
+    alap_start: array
+    duration: array
+    asap_layer: array
+    alap_layer: array
+    makespan: float
+    depth: int
+    critical_path: List[int]
+
+
+def gate_duration(op: Op, durations: Dict[str, float]) -> float:
+    if op.name in durations:
+        return durations[op.name]
+    return durations["1Q"] if len(op.qubits) == 1 else durations["2Q"]
+
+
+def schedule_ops(ops: Sequence[Op], n_qubits: int, durations: Optional[Dict[str, float]] = None) -> Schedule:
+    """Return ASAP and ALAP schedules of ``ops`` on ``n_qubits`` qubits."""
+    durations = {**DEFAULT_DURATIONS, **(durations or {})}
+    ops = list(ops)
+    n_ops = len(ops)
+    dur = array("d", (gate_duration(op, durations) for op in ops))
+    is_barrier = [op.name == "BARRIER" for op in ops]
+
+    # ASAP: free time / layer per qubit and the gate that set it
+    free = [0.0] * n_qubits
+    layer_free = [0] * n_qubits
+    owner = [-1] * n_qubits
+    asap = array("d", bytes(8 * n_ops))
+    asap_layer = array("l", bytes(array("l").itemsize * n_ops))
+    pred = array("l", [-1]) * n_ops
+    for i, op in enumerate(ops):
+        qs = op.qubits
+        last = max(qs, key=free.__getitem__)
+        start = free[last]
+        layer = max(layer_free[q] for q in qs)
+        pred[i] = owner[last]
+        asap[i] = start
+        asap_layer[i] = layer
+        end = start + dur[i]
+        nxt = layer if is_barrier[i] else layer + 1
+        for q in qs:
+            free[q] = end
+            layer_free[q] = nxt
+            owner[q] = i
+    makespan = max(free, default=0.0)
+    depth = max(layer_free, default=0)
+
+    # ALAP: mirror sweep from the makespan / last layer
+    latest = [makespan] * n_qubits
+    layer_latest = [depth] * n_qubits
+    alap = array("d", bytes(8 * n_ops))
+    alap_layer = array("l", bytes(array("l").itemsize * n_ops))
+    for i in range(n_ops - 1, -1, -1):
+        qs = ops[i].qubits
+        end = min(latest[q] for q in qs)
+        top = min(layer_latest[q] for q in qs)
+        start = end - dur[i]
+        layer = top if is_barrier[i] else top - 1
+        alap[i] = start
+        alap_layer[i] = layer
+        for q in qs:
+            latest[q] = start
+            layer_latest[q] = layer
+
+    critical: List[int] = []
+    if n_ops:
+        i = max(range(n_ops), key=lambda k: asap[k] + dur[k])
+        while i >= 0:
+            critical.append(i)
+            i = pred[i]
+        critical.reverse()
+    return Schedule(ops, n_qubits, asap, alap, dur, asap_layer, alap_layer, makespan, depth, critical)
+
+
+def idle_windows(sched: Schedule, min_length: float = 0.0) -> Dict[int, List[List[float]]]:
+    """Return ``qubit → [[start, end], ...]`` gaps in the ASAP schedule.
+
+    The window before a qubit's first gate and after its last gate are
+    included, so a qubit that is never used idles for the whole makespan.
+    """
+    last_end = [0.0] * sched.n_qubits
+    windows: Dict[int, List[List[float]]] = {q: [] for q in range(sched.n_qubits)}
+    for i, op in enumerate(sched.ops):
+        if op.name == "BARRIER":
+            continue
+        start = sched.asap_start[i]
+        for q in op.qubits:
+            if start - last_end[q] > min_length:
+                windows[q].append([last_end[q], start])
+            last_end[q] = start + sched.duration[i]
+    for q in range(sched.n_qubits):
+        if sched.makespan - last_end[q] > min_length:
+            windows[q].append([last_end[q], sched.makespan])
+    return windows
+
+
+def summarize(sched: Schedule, include_windows: bool = False) -> Dict[str, object]:
+    windows = idle_windows(sched)
+    qubits = {}
+    for q, wins in windows.items():
+        lengths = [end - start for start, end in wins]
+        entry: Dict[str, object] = {
+            "idle_total": sum(lengths),
+            "idle_windows": len(wins),
+            "longest_idle": max(lengths, default=0.0),
+        }
+        if include_windows:
+            entry["windows"] = wins
+        qubits[str(q)] = entry
+    path_ops = [sched.ops[i] for i in sched.critical_path]
+    return {
+        "gates": sum(1 for op in sched.ops if op.name != "BARRIER"),
+        "depth": sched.depth,
+        "makespan_ns": sched.makespan,
+        "critical_path": {
+            "length": len(path_ops),
+            "duration_ns": sum(sched.duration[i] for i in sched.critical_path),
+            "gates": dict(Counter(op.name for op in path_ops)),
+        },
+        "layer_sizes": {
+            "asap": _layer_histogram(sched.asap_layer, sched.ops, sched.depth),
+            "alap": _layer_histogram(sched.alap_layer, sched.ops, sched.depth),
+        },
+        "qubits": qubits,
+    }
+
+
+def _layer_histogram(layers: array, ops: Sequence[Op], depth: int) -> List[int]:
+    """Return the number of gates in each layer."""
+    counts = [0] * depth
+    for layer, op in zip(layers, ops):
+        if op.name != "BARRIER":
+            counts[layer] += 1
+    return counts
+
+
+def layered_qasm(sched: Schedule, mode: str = "asap") -> List[str]:
+    """Return QASM lines with gates grouped by layer and separated by barriers."""
+    layers = sched.asap_layer if mode == "asap" else sched.alap_layer
+    buckets: List[List[Op]] = [[] for _ in range(sched.depth)]
+    for layer, op in zip(layers, sched.ops):
+        if op.name != "BARRIER":
+            buckets[layer].append(op)
+    lines = ["OPENQASM 2.0;", 'include "qelib1.inc";', f"qreg q[{sched.n_qubits}];", ""]
+    for idx, bucket in enumerate(buckets):
+        if idx:
+            lines.append("barrier q;")
+        for op in bucket:
+            params = "(" + ",".join(repr(p) for p in op.params) + ")" if op.params else ""
+            lines.append(f"{op.name.lower()}{params} " + ", ".join(f"q[{q}]" for q in op.qubits) + ";")
+    lines.append("")
+    return lines
+
+
+def parse_duration(text: str) -> Tuple[str, float]:
+    name, _, value = text.partition("=")
+    if not value:
+        raise argparse.ArgumentTypeError(f"expected NAME=NS, got '{text}'")
+    return name.upper(), float(value)
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="ASAP/ALAP scheduling of a QASM circuit")
+    p.add_argument("qasm", nargs="?", default=QASM_PATH, help="input QASM file")
+    p.add_argument("-o", "--output", default=OUT_PATH, help="output JSON report")
+    p.add_argument("--durations", help="JSON file mapping gate names (or 1Q/2Q) to ns")
+    p.add_argument("--duration", type=parse_duration, action="append", default=[],
+                   metavar="NAME=NS", help="override a single gate duration")
+    p.add_argument("--windows", action="store_true", help="list every idle window in the report")
+    p.add_argument("--layered", help="also write a barrier-separated layered QASM file")
+    p.add_argument("--mode", choices=("asap", "alap"), default="asap", help="layers used by --layered")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    durations: Dict[str, float] = {}
+    if args.durations:
+        with open(args.durations) as fh:
+            durations.update({k.upper(): float(v) for k, v in json.load(fh).items()})
+    durations.update(dict(args.duration))
+
+    sched = schedule_ops(iter_qasm_ops(args.qasm), count_qubits(args.qasm), durations)
+    report = summarize(sched, include_windows=args.windows)
+    with open(args.output, "w") as fh:
+        json.dump(report, fh, indent=2)
+    if args.layered:
+        with open(args.layered, "w") as fh:
+            fh.write("\n".join(layered_qasm(sched, args.mode)))
+    print(
+        f"{report['gates']} gates: depth {sched.depth}, makespan {sched.makespan:.1f} ns, "
+        f"critical path {len(sched.critical_path)} gates; wrote {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""Stationary weights and mixing time of the normalized semantic tensor.
+
+``simulate_semantic_spread.py`` propagates ``v ← P v`` with the row-stochastic
+matrix ``P``.  Instead of running it until the vector stops changing, this
+script computes the limit directly:
+
+- The closed communicating classes of ``P`` (strongly connected components
+  with no outgoing weight) are found with ``scipy.sparse.csgraph``.
+- On each class the stationary distribution ``π`` (``π P = π``) is found by
+  power iteration on the lazy chain ``(I + P) / 2``, which has the same ``π``
+  but cannot oscillate; iteration stops when the L1 change falls below
+  ``--tol``.
+- States outside the closed classes are absorbed with probabilities ``h``
+  solved from ``(I - Q) h = R 1``, so ``P^k → Σ_C h_C π_C^T`` and the limit of
+  ``P^k e_j`` is read off without stepping.
+- The second-largest eigenvalue modulus ``|λ₂|`` of ``P`` (Arnoldi via
+  ``scipy.sparse.linalg.eigs``, or a dense solve for small tensors) certifies
+  the convergence rate.  For a symmetric tensor the chain is reversible and
+  ``t_mix(ε) ≤ ln(1 / (ε π_min)) / (1 - |λ₂|)``.
+
+Example usage::
+
+    python src/semantic_steady_state.py
+    python src/semantic_steady_state.py --seed-state ψ₃ --eps 1e-3
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+from scipy.sparse.linalg import ArpackNoConvergence, eigs, spsolve
+
+from src.simulate_semantic_spread import STATE_PATH, SpreadEngine, default_tensor_path, load_states, load_tensor
+
+OUT_PATH = "result/semantic_steady_state.json"
+DENSE_EIG_MAX = 512
+
+
+class SteadyState(NamedTuple):
+    classes: List[np.ndarray]  # state indices of each closed class
+    stationary: List[np.ndarray]  # π of each class (sums to 1)
+    absorption: np.ndarray  # (n, n_classes) absorption probabilities
+    iterations: List[int]
+    residual: float  # max_C ||π_C P_CC - π_C||_1
+    lambda2: Optional[float]  # |λ₂| of P, None if not computed
+
+    def limit(self, seed: int) -> np.ndarray:
+        """Return ``lim P^k e_seed`` (the Cesàro limit for periodic classes)."""
+        out = np.zeros(self.absorption.shape[0])
+        for c, (idx, pi) in enumerate(zip(self.classes, self.stationary)):
+            pos = np.searchsorted(idx, seed)
+            if pos < idx.size and idx[pos] == seed:
+                out += self.absorption[:, c] * pi[pos]
+        return out
+
+    def mixing_time(self, eps: float) -> float:
+        """Return the reversible-chain bound on ``t_mix(eps)`` (``inf`` if ``|λ₂| ≈ 1``)."""
+        if self.lambda2 is None or self.lambda2 >= 1 - 1e-12:
+            return math.inf
+        pi_min = min(float(pi.min()) for pi in self.stationary)
+        return math.log(1.0 / (eps * pi_min)) / (1.0 - self.lambda2)
+
+
+def closed_classes(P: sparse.csr_matrix) -> List[np.ndarray]:
+    """Return the recurrent classes of ``P`` as sorted index arrays."""
+    n_comp, labels = csgraph.connected_components(P, directed=True, connection="strong")
+    coo = P.tocoo()
+    leaks = np.zeros(n_comp, dtype=bool)
+    leaks[labels[coo.row[labels[coo.row] != labels[coo.col]]]] = True
+    has_mass = np.zeros(n_comp, dtype=bool)
+    has_mass[labels[coo.row[coo.data > 0]]] = True
+    order = np.argsort(labels, kind="stable")
+    bounds = np.searchsorted(labels[order], np.arange(n_comp + 1))
+    classes = [order[bounds[c] : bounds[c + 1]] for c in range(n_comp) if has_mass[c] and not leaks[c]]
+    return sorted(classes, key=lambda idx: idx[0])
+
+
+def power_iteration(P: sparse.csr_matrix, tol: float = 1e-12, max_iter: int = 1_000_000) -> Tuple[np.ndarray, int]:
+    """Return ``(π, iterations)`` for an irreducible stochastic ``P``.
+
+    Iterates ``π ← (π + π P) / 2`` from the uniform distribution and stops
+    once the L1 change is below ``tol``.
+    """
+    n = P.shape[0]
+    pt = P.T.tocsr()
+    pi = np.full(n, 1.0 / n)
+    for it in range(1, max_iter + 1):
+        nxt = 0.5 * (pi + pt @ pi)
+        nxt /= nxt.sum()
+        delta = np.abs(nxt - pi).sum()
+        pi = nxt
+        if delta < tol:
+            return pi, it
+    raise RuntimeError(f"power iteration did not converge in {max_iter} iterations (L1 change {delta:.3e})")
+
+
+def absorption_probabilities(P: sparse.csr_matrix, classes: List[np.ndarray]) -> np.ndarray:
+    """Return ``h[i, c]``: probability that the walk from ``i`` ends in class ``c``."""
+    n = P.shape[0]
+    h = np.zeros((n, len(classes)))
+    recurrent = np.zeros(n, dtype=bool)
+    for c, idx in enumerate(classes):
+        h[idx, c] = 1.0
+        recurrent[idx] = True
+    transient = np.flatnonzero(~recurrent)
+    if transient.size and classes:
+        Q = P[transient][:, transient]
+        R = P[transient][:, np.flatnonzero(recurrent)] @ h[recurrent]
+        A = (sparse.identity(transient.size, format="csc") - Q).tocsc()
+        sol = spsolve(A, R)
+        h[transient] = np.asarray(sol).reshape(transient.size, len(classes))
+    return h
+
+
+def second_eigenvalue(P: sparse.csr_matrix, n_classes: int) -> float:
+    """Return ``|λ₂|``: the largest eigenvalue modulus after the ``n_classes`` unit ones."""
+    n = P.shape[0]
+    k = n_classes + 1
+    if n <= DENSE_EIG_MAX or k >= n - 1:
+        mods = np.sort(np.abs(np.linalg.eigvals(P.toarray())))[::-1]
+    else:
+        try:
+            vals = eigs(P, k=k, which="LM", return_eigenvectors=False, tol=1e-10)
+        except ArpackNoConvergence as exc:
+            vals = exc.eigenvalues
+        mods = np.sort(np.abs(vals))[::-1]
+    return float(mods[n_classes]) if mods.size > n_classes else 0.0
+
+
+def solve_steady_state(engine: SpreadEngine, tol: float = 1e-12, max_iter: int = 1_000_000, eig: bool = True) -> SteadyState:
+    P = sparse.csr_matrix(engine.P, dtype=np.float64)
+    classes = closed_classes(P)
+    stationary, iterations = [], []
+    residual = 0.0
+    for idx in classes:
+        sub = P[idx][:, idx]
+        pi, it = power_iteration(sub, tol, max_iter)
+        stationary.append(pi)
+        iterations.append(it)
+        residual = max(residual, float(np.abs(sub.T @ pi - pi).sum()))
+    h = absorption_probabilities(P, classes)
+    lam2 = second_eigenvalue(P, len(classes)) if eig else None
+    return SteadyState(classes, stationary, h, iterations, residual, lam2)
+
+
+def summarize(result: SteadyState, states: List[str], seed: int, eps: float) -> Dict:
+    limit = result.limit(seed)
+    t_mix = result.mixing_time(eps)
+    return {
+        "classes": [
+            {
+                "states": [states[i] for i in idx],
+                "stationary": {states[i]: float(w) for i, w in zip(idx, pi)},
+                "iterations": it,
+            }
+            for idx, pi, it in zip(result.classes, result.stationary, result.iterations)
+        ],
+        "seed_state": states[seed],
+        "limit_vector": limit.tolist(),
+        "certificate": {
+            "residual_l1": result.residual,
+            "lambda2": result.lambda2,
+            "spectral_gap": None if result.lambda2 is None else 1.0 - result.lambda2,
+            "epsilon": eps,
+            "mixing_time_bound": None if math.isinf(t_mix) else math.ceil(t_mix),
+        },
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Stationary distribution and mixing time of the semantic tensor")
+    p.add_argument("--states", default=STATE_PATH, help="logical state map JSON")
+    p.add_argument("--tensor", help="semantic tensor .npz or JSON (default: .npz if present)")
+    p.add_argument("--seed-state", default=None, help="state whose limit vector is reported (default: first state)")
+    p.add_argument("--tol", type=float, default=1e-12, help="L1 tolerance for power iteration")
+    p.add_argument("--max-iter", type=int, default=1_000_000, help="power iteration limit")
+    p.add_argument("--eps", type=float, default=0.25, help="total-variation target for the mixing time")
+    p.add_argument("--no-eig", action="store_true", help="skip the second-eigenvalue computation")
+    p.add_argument("-o", "--output", default=OUT_PATH, help="output JSON file")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    states = load_states(args.states)
+    engine = SpreadEngine(load_tensor(args.tensor or default_tensor_path()), use_sparse=True)
+    seed = states.index(args.seed_state) if args.seed_state else 0
+    result = solve_steady_state(engine, args.tol, args.max_iter, not args.no_eig)
+    summary = summarize(result, states, seed, args.eps)
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump(summary, fh, indent=2, ensure_ascii=False)
+        fh.write("\n")
+
+    cert = summary["certificate"]
+    print(f"{len(result.classes)} closed class(es), power iteration {max(result.iterations, default=0)} steps, residual {cert['residual_l1']:.2e}")
+    if result.lambda2 is not None:
+        bound = cert["mixing_time_bound"]
+        mix = f"t_mix({args.eps:g}) ≤ {bound}" if bound is not None else "no mixing (|λ₂| = 1: periodic or disconnected)"
+        print(f"|λ₂| = {result.lambda2:.6f}, {mix}")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Semantic spread driven by an evolving resonance matrix Λ(t).
+
+``network_simulation.py`` evolves the resonance strengths with the logistic
+competition model::
+
+    λ_ij ← λ_ij + dt (r λ_ij (1 - λ_ij) - c Σ_{k≠i,j} λ_ik λ_kj)
+
+Here the same model is run on an ``n × n`` array and, at every step, the
+current Λ(t) is used as the transition kernel of the spread ``v ← P(t) v``:
+``P(t)`` is Λ(t) with negative strengths clipped to zero, optionally masked by
+the coupling graph (the non-zero pattern of the semantic tensor), and
+row-normalized.  The competition sum is ``(Λ²)_ij - λ_ij (λ_ii + λ_jj)``
+(``- λ_ii²`` on the diagonal), so one matrix product per step replaces the
+triple loop.
+
+The loop is fused and allocation-free: Λ, the Λ² product and one scratch
+matrix are allocated once and every update is written in place with
+``out=`` ufuncs; ``P(t)`` is never formed — the scratch matrix holds the
+clipped (masked) kernel just long enough for one product with the spread
+vectors.
+
+Example usage::
+
+    python src/simulate_lambda_spread.py --steps 100
+    python src/simulate_lambda_spread.py --random 1000 --steps 10000 --record-every 100 --float32
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from src.simulate_semantic_spread import STATE_PATH, default_tensor_path, load_states, load_tensor
+
+OUT_PATH = "result/lambda_spread.json"
+
+
+def init_lambda(n: int, rng: np.random.Generator, low: float = 0.01, high: float = 0.05, dtype=np.float64) -> np.ndarray:
+    """Return Λ(0) like ``network_simulation._init_lambda_matrix``: U(low, high) off the diagonal."""
+    lam = rng.uniform(low, high, size=(n, n)).astype(dtype)
+    np.fill_diagonal(lam, 0.0)
+    return lam
+
+
+class LambdaSpread:
+    """Co-evolve Λ(t) and spread vectors with preallocated buffers.
+
+    ``lam`` is updated in place.  ``mask`` (boolean ``n × n`` or ``None``)
+    restricts which strengths act as transition weights; it does not affect
+    the evolution of Λ itself.  In the original model a strength pushed below
+    zero by the competition term diverges (``r λ (1 - λ)`` is negative and
+    growing there), which overflows long runs; ``clip_negative`` keeps Λ ≥ 0,
+    so such couplings die out at zero instead.
+    """
+
+    def __init__(
+        self,
+        lam: np.ndarray,
+        vecs: np.ndarray,
+        dt: float = 0.1,
+        r: float = 1.0,
+        c: float = 0.05,
+        mask: Optional[np.ndarray] = None,
+        clip_negative: bool = False,
+    ) -> None:
+        self.lam = lam
+        self.n = lam.shape[0]
+        self.vecs = np.array(vecs, dtype=lam.dtype)
+        self.dt, self.r, self.c = dt, r, c
+        self.mask = None if mask is None else np.asarray(mask, dtype=lam.dtype)
+        self._out = np.empty_like(self.vecs)
+        self._sq = np.empty_like(lam)
+        self._buf = np.empty_like(lam)
+        self._sums = np.empty(self.n, dtype=lam.dtype)
+        self._diag = np.empty(self.n, dtype=lam.dtype)
+        self._diag_idx = np.arange(self.n)
+        self.clip_negative = clip_negative
+
+    def spread_step(self) -> None:
+        """``v ← P(t) v`` with the clipped, masked, row-normalized Λ(t)."""
+        kernel = np.maximum(self.lam, 0.0, out=self._buf)
+        if self.mask is not None:
+            kernel *= self.mask
+        kernel.sum(axis=1, out=self._sums)
+        self._sums[self._sums == 0] = 1.0
+        out = np.matmul(kernel, self.vecs, out=self._out)
+        out /= self._sums.reshape((-1,) + (1,) * (out.ndim - 1))
+        self._out, self.vecs = self.vecs, out
+
+    def lambda_step(self) -> None:
+        """Advance Λ by one logistic-competition step, in place."""
+        lam, sq, buf, d = self.lam, self._sq, self._buf, self._diag
+        np.copyto(d, lam[self._diag_idx, self._diag_idx])
+        np.matmul(lam, lam, out=sq)
+        # competition: Λ² - λ_ij (λ_ii + λ_jj), with λ_ii² added back on the diagonal
+        np.add.outer(d, d, out=buf)
+        buf *= lam
+        sq -= buf
+        sq[self._diag_idx, self._diag_idx] += d * d
+        sq *= self.c
+        # growth: r λ (1 - λ)
+        np.subtract(1.0, lam, out=buf)
+        buf *= lam
+        buf *= self.r
+        buf -= sq
+        buf *= self.dt
+        lam += buf
+        if self.clip_negative:
+            np.maximum(lam, 0.0, out=lam)
+
+    def step(self) -> None:
+        self.spread_step()
+        self.lambda_step()
+
+    def stats(self) -> Dict[str, float]:
+        """Return the ``network_simulation`` statistics of Λ."""
+        lam = self.lam
+        return {
+            "avg": float(lam.mean()),
+            "min": float(lam.min()),
+            "max": float(lam.max()),
+            "neg_count": int(np.count_nonzero(lam < 0.0)),
+        }
+
+
+def coupling_mask(tensor) -> np.ndarray:
+    """Return the boolean non-zero pattern of a dense or sparse semantic tensor."""
+    if sparse.issparse(tensor):
+        return tensor.toarray() != 0
+    return np.asarray(tensor) != 0
+
+
+def run(sim: LambdaSpread, steps: int, record_every: int = 1) -> List[Dict]:
+    """Run ``steps`` fused steps and return records every ``record_every`` steps."""
+    def record(step: int) -> Dict:
+        rec = {"step": step, "t": step * sim.dt, **sim.stats()}
+        vec = sim.vecs if sim.vecs.ndim == 1 else sim.vecs[:, 0]
+        rec["vector"] = vec.tolist()
+        return rec
+
+    history = [record(0)]
+    for step in range(1, steps + 1):
+        sim.step()
+        if step % record_every == 0 or step == steps:
+            history.append(record(step))
+    return history
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Semantic spread driven by the evolving resonance matrix Λ(t)")
+    p.add_argument("--states", default=STATE_PATH, help="logical state map JSON")
+    p.add_argument("--tensor", help="semantic tensor for the coupling mask (default: .npz if present)")
+    p.add_argument("--random", type=int, metavar="N", help="use N synthetic states instead of the state map (no mask)")
+    p.add_argument("--no-mask", action="store_true", help="let every Λ entry act as a transition weight")
+    p.add_argument("--init", choices=["uniform", "tensor"], default="uniform",
+                   help="Λ(0): U(0.01, 0.05) off the diagonal, or the semantic tensor")
+    p.add_argument("--steps", type=int, default=50, help="number of steps")
+    p.add_argument("--dt", type=float, default=0.1, help="time step")
+    p.add_argument("--r", type=float, default=1.0, help="logistic growth rate")
+    p.add_argument("--c", type=float, default=0.05, help="competition coefficient")
+    p.add_argument("--clip-negative", action="store_true", help="keep Λ ≥ 0 (the unclipped model diverges in long runs)")
+    p.add_argument("--seed-state", default=None, help="initial state label (default: first state)")
+    p.add_argument("--seed", type=int, default=None, help="random seed for Λ(0)")
+    p.add_argument("--record-every", type=int, default=1, help="record statistics every N steps")
+    p.add_argument("--float32", action="store_true", help="compute in single precision")
+    p.add_argument("--lambda-out", help="write the final Λ to this .npy file")
+    p.add_argument("-o", "--output", default=OUT_PATH, help="output JSON file")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    dtype = np.float32 if args.float32 else np.float64
+    rng = np.random.default_rng(args.seed)
+    mask = None
+    if args.random:
+        states = [f"s{i}" for i in range(args.random)]
+        tensor = None
+    else:
+        states = load_states(args.states)
+        tensor = load_tensor(args.tensor or default_tensor_path())
+        if not args.no_mask:
+            mask = coupling_mask(tensor)
+    n = len(states)
+    if args.init == "tensor":
+        if tensor is None:
+            raise SystemExit("--init tensor needs the semantic tensor (not --random)")
+        lam = (tensor.toarray() if sparse.issparse(tensor) else np.asarray(tensor)).astype(dtype)
+    else:
+        lam = init_lambda(n, rng, dtype=dtype)
+    seed = states.index(args.seed_state) if args.seed_state else 0
+    vec = np.zeros(n, dtype=dtype)
+    vec[seed] = 1.0
+
+    sim = LambdaSpread(lam, vec, args.dt, args.r, args.c, mask, args.clip_negative)
+    t0 = time.perf_counter()
+    history = run(sim, args.steps, max(1, args.record_every))
+    elapsed = time.perf_counter() - t0
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as fh:
+        json.dump({"states": states, "seed_state": states[seed], "history": history}, fh, indent=2, ensure_ascii=False)
+        fh.write("\n")
+    if args.lambda_out:
+        np.save(args.lambda_out, sim.lam)
+    last = history[-1]
+    print(f"{n} states, {args.steps} steps in {elapsed:.2f} s ({args.steps / max(elapsed, 1e-9):.0f} steps/s)")
+    print(f"t={last['t']:.1f} avg={last['avg']:.6f} min={last['min']:.6f} max={last['max']:.6f} neg_count={last['neg_count']}")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
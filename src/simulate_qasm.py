@@ -4,7 +4,10 @@
 This script prints a human readable trace of the operations contained in
 ``result/iirb_swap_resolved.qasm``.  With the ``--json`` flag a machine
 friendly log of the state at each step is written to
-``result/qasm_trace.json``.
+``result/qasm_trace.json``.  The ``--bin`` flag writes the same trace in the
+compact delta-encoded format of :mod:`qasm_trace_bin` to
+``result/qasm_trace.bin`` while the program runs, which keeps memory use
+constant for very long circuits.
 """
 from __future__ import annotations
 
@@ -12,18 +15,18 @@ import argparse
 import json
 import os
 import re
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
 
 
 QASM_PATH = "result/iirb_swap_resolved.qasm"
 TRACE_PATH = "result/qasm_trace.json"
+TRACE_BIN_PATH = "result/qasm_trace.bin"
 
 
-def parse_qasm(path: str) -> List[Tuple[str, int, int]]:
-    """Return list of (gate, i, j) operations from ``path``."""
-    ops: List[Tuple[str, int, int]] = []
+def iter_qasm(path: str) -> Iterator[Tuple[str, int, int]]:
+    """Yield (gate, i, j) operations from ``path`` one line at a time."""
     if not os.path.exists(path):
-        return ops
+        return
     pattern = re.compile(r"^(SWAP|CX)\s+q\[(\d+)\],\s*q\[(\d+)\];")
     with open(path) as fh:
         for line in fh:
@@ -33,8 +36,12 @@ def parse_qasm(path: str) -> List[Tuple[str, int, int]]:
             m = pattern.match(line)
             if m:
                 gate, a, b = m.groups()
-                ops.append((gate, int(a), int(b)))
-    return ops
+                yield gate, int(a), int(b)
+
+
+def parse_qasm(path: str) -> List[Tuple[str, int, int]]:
+    """Return list of (gate, i, j) operations from ``path``."""
+    return list(iter_qasm(path))
 
 
 def format_state(state: List[int]) -> str:
@@ -49,12 +56,21 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="write execution log as JSON",
     )
+    parser.add_argument(
+        "--bin",
+        action="store_true",
+        help=f"write a delta-encoded binary trace to {TRACE_BIN_PATH}",
+    )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="only print the final state",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    ops = parse_qasm(QASM_PATH)
 
     qubits = [0] * 16
     step = 0
@@ -62,25 +78,41 @@ def main() -> None:
     log = []
     if args.json:
         log.append({"step": step, "gate": "INIT", "qubits": qubits.copy()})
+    writer = None
+    if args.bin:
+        from src.qasm_trace_bin import TraceWriter
+
+        writer = TraceWriter(TRACE_BIN_PATH, qubits)
+        writer.append("INIT")
 
-    print(f"Step {step}: INIT q[0..15] = {format_state(qubits)}")
-    for gate, i, j in ops:
+    if not args.quiet:
+        print(f"Step {step}: INIT q[0..15] = {format_state(qubits)}")
+    for gate, i, j in iter_qasm(QASM_PATH):
         step += 1
+        changed: Tuple[int, ...] = ()
         if gate == "SWAP":
+            if qubits[i] != qubits[j]:
+                changed = (i, j)
             qubits[i], qubits[j] = qubits[j], qubits[i]
         elif gate == "CX":
             if qubits[i] == 1:
                 qubits[j] ^= 1
+                changed = (j,)
 
         if args.json:
             log.append({"step": step, "gate": gate, "args": [i, j], "qubits": qubits.copy()})
+        if writer is not None:
+            writer.append(gate, (i, j), changed)
 
-        print(f"Step {step}: {gate} q[{i}], q[{j}]")
-        print("  → " + ", ".join(f"q[{idx}]={val}" for idx, val in enumerate(qubits)))
+        if not args.quiet:
+            print(f"Step {step}: {gate} q[{i}], q[{j}]")
+            print("  → " + ", ".join(f"q[{idx}]={val}" for idx, val in enumerate(qubits)))
     print(
         "Final state: " + ", ".join(f"q[{idx}]={val}" for idx, val in enumerate(qubits))
     )
 
+    if writer is not None:
+        writer.close()
     if args.json:
         with open(TRACE_PATH, "w", encoding="utf-8") as fh:
             json.dump(log, fh, indent=2)
@@ -1,15 +1,49 @@
 #!/usr/bin/env python3
-"""Simulate semantic spread over 5 steps using the semantic tensor."""
+"""Simulate semantic spread over the semantic tensor.
+
+The tensor is row-normalized into a stochastic matrix ``P`` and a weight
+vector is propagated as ``v ← P v``.  :class:`SpreadEngine` keeps ``P`` as a
+dense ``ndarray`` or a SciPy CSR matrix and offers two strategies:
+
+- stepping: ``k`` products of ``P`` with a block of vectors, ``O(k · nnz · m)``;
+- repeated squaring: ``P^k`` from ``⌈log2 k⌉`` dense squarings plus one
+  product per set bit of ``k``, ``O(log k · n³)``.
+
+:meth:`SpreadEngine.spread` picks the cheaper one.  Unit vectors for many
+seed states are propagated together as one matrix-matrix product, so the
+spread from every state is simply the columns of ``P^k``.
+
+Example usage::
+
+    python src/simulate_semantic_spread.py --steps 5
+    python src/simulate_semantic_spread.py --steps 1000 --all-seeds result/semantic_spread_all.npy
+"""
 from __future__ import annotations
 
+import argparse
 import json
 import os
-from typing import List
+import time
+from typing import List, Optional, Sequence, Union
 
 import matplotlib.pyplot as plt
+import numpy as np
+from scipy import sparse
+
+from src.gen_semantic_tensor import NPZ_PATH as TENSOR_NPZ_PATH, load_npz_mmap
 
 SUBSCRIPT_MAP = str.maketrans("₀₁₂₃₄₅₆₇₈₉", "0123456789")
 
+STATE_PATH = "result/logic_physical_map.json"
+TENSOR_PATH = "result/semantic_tensor.json"
+HIST_PATH = "result/semantic_spread_steps.json"
+PNG_PATH = "docs/plot/semantic_spread_step{steps}.png"
+
+# Use CSR when at most this fraction of entries is non-zero
+SPARSE_DENSITY = 0.05
+
+Matrix = Union[np.ndarray, sparse.csr_matrix]
+
 
 def logical_index(label: str) -> int:
     digits = label.replace("ψ", "").translate(SUBSCRIPT_MAP)
@@ -26,7 +60,15 @@ def load_states(path: str) -> List[str]:
     return [d["logical_state"] for d in data]
 
 
-def load_tensor(path: str) -> List[List[float]]:
+def default_tensor_path() -> str:
+    """Return the sparse ``.npz`` tensor if it exists, else the dense JSON one."""
+    return TENSOR_NPZ_PATH if os.path.exists(TENSOR_NPZ_PATH) else TENSOR_PATH
+
+
+def load_tensor(path: str) -> Union[List[List[float]], sparse.csr_matrix]:
+    """Load a dense JSON tensor, or a ``.npz`` one memory-mapped as CSR."""
+    if path.endswith(".npz"):
+        return load_npz_mmap(path)
     with open(path, "r", encoding="utf-8") as fh:
         return json.load(fh)
 
@@ -49,14 +91,104 @@ def multiply(mat: List[List[float]], vec: List[float]) -> List[float]:
     return result
 
 
-def simulate(states: List[str], mat: List[List[float]], steps: int = 5) -> List[dict]:
-    norm = normalize_rows(mat)
-    vec = [1.0 if i == 0 else 0.0 for i in range(len(states))]
-    history = [{"step": 0, "vector": vec}]
-    for n in range(1, steps + 1):
-        vec = multiply(norm, vec)
-        history.append({"step": n, "vector": vec})
-    return history
+class SpreadEngine:
+    """Row-stochastic semantic tensor with batched propagation.
+
+    Rows summing to zero are kept as they are, as in :func:`normalize_rows`.
+    ``use_sparse=None`` chooses CSR when the density is at most
+    :data:`SPARSE_DENSITY`.
+    """
+
+    def __init__(self, tensor: Union[Sequence[Sequence[float]], Matrix], use_sparse: Optional[bool] = None, dtype=np.float64) -> None:
+        if sparse.issparse(tensor):
+            mat = sparse.csr_matrix(tensor, dtype=dtype)
+        else:
+            mat = np.asarray(tensor, dtype=dtype)
+            if mat.ndim != 2 or mat.shape[0] != mat.shape[1]:
+                raise ValueError(f"tensor must be square, got shape {mat.shape}")
+        n = mat.shape[0]
+        nnz = mat.nnz if sparse.issparse(mat) else np.count_nonzero(mat)
+        if use_sparse is None:
+            use_sparse = nnz <= SPARSE_DENSITY * n * n
+        sums = np.asarray(mat.sum(axis=1), dtype=dtype).ravel()
+        scale = np.where(sums > 0, 1.0 / np.where(sums > 0, sums, 1.0), 1.0).astype(dtype)
+        if use_sparse:
+            self.P: Matrix = sparse.csr_matrix(sparse.diags(scale) @ sparse.csr_matrix(mat))
+        else:
+            dense = mat.toarray() if sparse.issparse(mat) else mat
+            self.P = dense * scale[:, None]
+        self.n = n
+        self.nnz = int(nnz)
+        self.dtype = np.dtype(dtype)
+        self.is_sparse = bool(use_sparse)
+
+    def dense(self) -> np.ndarray:
+        return self.P.toarray() if self.is_sparse else np.array(self.P)
+
+    def unit(self, seeds: Sequence[int]) -> np.ndarray:
+        """Return unit column vectors for ``seeds`` as an ``(n, m)`` block."""
+        vecs = np.zeros((self.n, len(seeds)), dtype=self.dtype)
+        vecs[np.asarray(seeds), np.arange(len(seeds))] = 1.0
+        return vecs
+
+    def step(self, vecs: np.ndarray, steps: int = 1) -> np.ndarray:
+        """Apply ``P`` to ``vecs`` (a vector or an ``(n, m)`` block) ``steps`` times."""
+        out = np.asarray(vecs, dtype=self.dtype)
+        for _ in range(steps):
+            out = self.P @ out
+        return out
+
+    def power(self, k: int) -> np.ndarray:
+        """Return ``P^k`` as a dense array by repeated squaring."""
+        if k < 0:
+            raise ValueError("k must be non-negative")
+        result: Optional[np.ndarray] = None
+        base = self.dense()
+        while True:
+            if k & 1:
+                result = base.copy() if result is None else result @ base
+            k >>= 1
+            if not k:
+                break
+            base = base @ base
+        return np.eye(self.n, dtype=self.dtype) if result is None else result
+
+    def _squaring_cheaper(self, steps: int, m: int) -> bool:
+        products = steps.bit_length() + bin(steps).count("1") - 2
+        return products * self.n**3 < steps * self.nnz * m
+
+    def spread(self, steps: int, seeds: Optional[Sequence[int]] = None, method: str = "auto") -> np.ndarray:
+        """Return the ``steps``-step spread from unit ``seeds`` as an ``(n, m)`` array.
+
+        Column ``j`` is ``P^steps e_seeds[j]``; ``seeds=None`` means every
+        state, i.e. ``P^steps`` itself.  ``method`` is ``"step"``,
+        ``"square"`` or ``"auto"``.
+        """
+        m = self.n if seeds is None else len(seeds)
+        if method == "auto":
+            method = "square" if self._squaring_cheaper(steps, m) else "step"
+        if method == "square":
+            pk = self.power(steps)
+            return pk if seeds is None else pk[:, np.asarray(seeds)]
+        if method != "step":
+            raise ValueError(f"unknown method {method!r}")
+        start = np.eye(self.n, dtype=self.dtype) if seeds is None else self.unit(seeds)
+        return self.step(start, steps)
+
+    def history(self, seed: int = 0, steps: int = 5) -> np.ndarray:
+        """Return the ``(steps + 1, n)`` trajectory of the unit vector at ``seed``."""
+        out = np.empty((steps + 1, self.n), dtype=self.dtype)
+        vec = self.unit([seed])[:, 0]
+        out[0] = vec
+        for n in range(1, steps + 1):
+            vec = self.P @ vec
+            out[n] = vec
+        return out
+
+
+def simulate(states: List[str], mat: List[List[float]], steps: int = 5, seed: int = 0) -> List[dict]:
+    traj = SpreadEngine(mat).history(seed, steps)
+    return [{"step": n, "vector": vec.tolist()} for n, vec in enumerate(traj)]
 
 
 def save_history(history: List[dict], path: str) -> None:
@@ -76,18 +208,44 @@ def plot_final(states: List[str], vec: List[float], path: str) -> None:
     plt.close()
 
 
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Simulate semantic spread over the semantic tensor")
+    p.add_argument("--states", default=STATE_PATH, help="logical state map JSON")
+    p.add_argument("--tensor", help="semantic tensor .npz or JSON (default: .npz if present)")
+    p.add_argument("--steps", type=int, default=5, help="number of propagation steps")
+    p.add_argument("--seed-state", default=None, help="initial state label (default: first state)")
+    p.add_argument("-o", "--output", default=HIST_PATH, help="step history JSON")
+    p.add_argument("--png", default=None, help="bar chart of the final vector")
+    p.add_argument("--all-seeds", metavar="NPY", help="also write the spread from every state (P^steps) to NPY")
+    p.add_argument("--method", choices=["auto", "step", "square"], default="auto", help="strategy for --all-seeds")
+    p.add_argument("--float32", action="store_true", help="compute in single precision")
+    storage = p.add_mutually_exclusive_group()
+    storage.add_argument("--sparse", dest="use_sparse", action="store_true", default=None, help="force CSR storage")
+    storage.add_argument("--dense", dest="use_sparse", action="store_false", help="force dense storage")
+    return p.parse_args()
+
+
 def main() -> None:
-    state_path = "result/logic_physical_map.json"
-    tensor_path = "result/semantic_tensor.json"
-    hist_path = "result/semantic_spread_steps.json"
-    png_path = "docs/plot/semantic_spread_step5.png"
-
-    states = load_states(state_path)
-    tensor = load_tensor(tensor_path)
-    history = simulate(states, tensor, steps=5)
-    save_history(history, hist_path)
+    args = parse_args()
+    states = load_states(args.states)
+    tensor = load_tensor(args.tensor or default_tensor_path())
+    seed = states.index(args.seed_state) if args.seed_state else 0
+    engine = SpreadEngine(tensor, args.use_sparse, np.float32 if args.float32 else np.float64)
+
+    traj = engine.history(seed, args.steps)
+    history = [{"step": n, "vector": vec.tolist()} for n, vec in enumerate(traj)]
+    save_history(history, args.output)
+    png_path = args.png or PNG_PATH.format(steps=args.steps)
     plot_final(states, history[-1]["vector"], png_path)
-    print(f"Wrote {hist_path} and {png_path}")
+    print(f"Wrote {args.output} and {png_path}")
+
+    if args.all_seeds:
+        t0 = time.perf_counter()
+        spread = engine.spread(args.steps, method=args.method)
+        elapsed = time.perf_counter() - t0
+        np.save(args.all_seeds, spread)
+        storage = "CSR" if engine.is_sparse else "dense"
+        print(f"Wrote {args.all_seeds}: spread from {engine.n} states over {args.steps} steps ({storage}, {elapsed:.2f} s)")
 
 
 if __name__ == "__main__":
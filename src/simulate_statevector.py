@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""NumPy statevector simulator for the generated IIRB circuits.
+
+Unlike ``simulate_qasm.py``, which tracks classical bits, this backend keeps
+the full complex amplitude vector so phases and superpositions are visible.
+It is intended for up to ~26 qubits on a single CPU node.
+
+Implementation notes:
+
+- The state is one contiguous ``complex64``/``complex128`` buffer viewed as an
+  ``n``-axis tensor.  Controlled gates update strided slices in place; 2x2
+  unitaries are reshaped matrix products into a second buffer that is then
+  swapped in.
+- ``SWAP`` is a zero-cost relabelling of which tensor axis holds a qubit.
+- Consecutive single-qubit gates on the same qubit are fused into one 2x2
+  matrix and applied only when a multi-qubit gate or the end of the circuit
+  needs them.
+
+Example usage::
+
+    python src/simulate_statevector.py result/iirb_generated.qasm --shots 1024
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.qasm_ops import Op, parse_qasm_file
+
+QASM_PATH = "result/iirb_generated.qasm"
+OUT_PATH = "result/statevector_result.json"
+MAX_QUBITS = 30
+
+_SQ2 = 1.0 / np.sqrt(2.0)
+FIXED_1Q: Dict[str, np.ndarray] = {
+    "ID": np.eye(2),
+    "I": np.eye(2),
+    "X": np.array([[0, 1], [1, 0]]),
+    "Y": np.array([[0, -1j], [1j, 0]]),
+    "Z": np.diag([1, -1]),
+    "H": np.array([[_SQ2, _SQ2], [_SQ2, -_SQ2]]),
+    "S": np.diag([1, 1j]),
+    "SDG": np.diag([1, -1j]),
+    "T": np.diag([1, np.exp(1j * np.pi / 4)]),
+    "TDG": np.diag([1, np.exp(-1j * np.pi / 4)]),
+    "SX": 0.5 * np.array([[1 + 1j, 1 - 1j], [1 - 1j, 1 + 1j]]),
+}
+
+
+def u3(theta: float, phi: float, lam: float) -> np.ndarray:
+    """Return the OpenQASM ``U(theta, phi, lambda)`` matrix."""
+    c, s = np.cos(theta / 2), np.sin(theta / 2)
+    return np.array(
+        [
+            [c, -np.exp(1j * lam) * s],
+            [np.exp(1j * phi) * s, np.exp(1j * (phi + lam)) * c],
+        ]
+    )
+
+
+def single_qubit_matrix(name: str, params: Sequence[float]) -> Optional[np.ndarray]:
+    """Return the 2x2 unitary for gate ``name`` or ``None`` if unknown."""
+    if name in FIXED_1Q:
+        return FIXED_1Q[name]
+    if name == "RX":
+        (t,) = params
+        return np.array([[np.cos(t / 2), -1j * np.sin(t / 2)], [-1j * np.sin(t / 2), np.cos(t / 2)]])
+    if name == "RY":
+        (t,) = params
+        return np.array([[np.cos(t / 2), -np.sin(t / 2)], [np.sin(t / 2), np.cos(t / 2)]])
+    if name == "RZ":
+        (t,) = params
+        return np.diag([np.exp(-0.5j * t), np.exp(0.5j * t)])
+    if name in ("U1", "P"):
+        (lam,) = params
+        return np.diag([1, np.exp(1j * lam)])
+    if name == "U2":
+        phi, lam = params
+        return u3(np.pi / 2, phi, lam)
+    if name in ("U3", "U"):
+        return u3(*params)
+    return None
+
+
+CONTROLLED_1Q = {"CX": "X", "CNOT": "X", "CY": "Y", "CZ": "Z", "CH": "H"}
+
+
+class StatevectorSimulator:
+    """In-place statevector simulator with SWAP relabelling and gate fusion."""
+
+    def __init__(self, n_qubits: int, dtype: type = np.complex128) -> None:
+        if n_qubits > MAX_QUBITS:
+            raise ValueError(f"{n_qubits} qubits exceed the statevector limit of {MAX_QUBITS}")
+        self.n = n_qubits
+        self.dtype = np.dtype(dtype)
+        self.state = np.zeros(2 ** n_qubits, dtype=self.dtype)
+        self.state[0] = 1.0
+        self._buf = np.empty_like(self.state)
+        # qubit -> tensor axis; axis 0 is the most significant bit of the index
+        self.axis: List[int] = list(range(n_qubits))
+        self._pending: Dict[int, np.ndarray] = {}
+        self.measured: List[int] = []
+        self.applied = 0
+
+    # -- single-qubit gates -------------------------------------------------
+    def apply_1q(self, qubit: int, mat: np.ndarray) -> None:
+        """Queue ``mat`` on ``qubit``; it is fused with later 1-qubit gates."""
+        prev = self._pending.get(qubit)
+        self._pending[qubit] = mat if prev is None else mat @ prev
+
+    def _flush(self, qubit: int) -> None:
+        mat = self._pending.pop(qubit, None)
+        if mat is not None:
+            self._apply_axis(self.axis[qubit], mat)
+
+    def flush(self) -> None:
+        for qubit in list(self._pending):
+            self._flush(qubit)
+
+    def _apply_axis(self, axis: int, mat: np.ndarray) -> None:
+        mat = np.asarray(mat, dtype=self.dtype)
+        left, right = 2 ** axis, 2 ** (self.n - axis - 1)
+        view = self.state.reshape(left, 2, right)
+        if mat[0, 1] == 0 and mat[1, 0] == 0:
+            if mat[0, 0] != 1:
+                view[:, 0, :] *= mat[0, 0]
+            if mat[1, 1] != 1:
+                view[:, 1, :] *= mat[1, 1]
+            self.applied += 1
+            return
+        out = self._buf.reshape(left, 2, right)
+        if right > 16:
+            np.matmul(mat, view, out=out)
+        else:
+            # short trailing axes: one (left, 2R) x (2R, 2R) product is faster
+            block = np.kron(mat, np.eye(right, dtype=self.dtype)).T
+            np.matmul(view.reshape(left, 2 * right), block, out=out.reshape(left, 2 * right))
+        self.state, self._buf = self._buf, self.state
+        self.applied += 1
+
+    # -- two-qubit gates ----------------------------------------------------
+    def _pair_slices(self, ctrl_axis: int, targ_axis: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return views of the ctrl=1 amplitudes with targ=0 and targ=1.
+
+        The state is viewed as a 5-axis tensor so the slices keep long
+        contiguous runs instead of iterating over ``n`` size-2 axes.
+        """
+        a, b = sorted((ctrl_axis, targ_axis))
+        view = self.state.reshape(2 ** a, 2, 2 ** (b - a - 1), 2, 2 ** (self.n - b - 1))
+        if ctrl_axis < targ_axis:
+            return view[:, 1, :, 0, :], view[:, 1, :, 1, :]
+        return view[:, 0, :, 1, :], view[:, 1, :, 1, :]
+
+    def swap(self, a: int, b: int) -> None:
+        """Exchange qubits ``a`` and ``b`` by relabelling tensor axes."""
+        self.axis[a], self.axis[b] = self.axis[b], self.axis[a]
+        pa, pb = self._pending.pop(a, None), self._pending.pop(b, None)
+        if pa is not None:
+            self._pending[b] = pa
+        if pb is not None:
+            self._pending[a] = pb
+
+    def controlled(self, ctrl: int, targ: int, mat: np.ndarray) -> None:
+        """Apply ``mat`` to ``targ`` on the subspace where ``ctrl`` is 1."""
+        self._flush(ctrl)
+        self._flush(targ)
+        lo, hi = self._pair_slices(self.axis[ctrl], self.axis[targ])
+        if mat[0, 1] == 0 and mat[1, 0] == 0:
+            if mat[0, 0] != 1:
+                lo *= mat[0, 0]
+            hi *= mat[1, 1]
+        elif mat[0, 0] == 0 and mat[1, 1] == 0:
+            tmp = lo.copy()
+            lo[...] = hi
+            hi[...] = tmp
+            if mat[0, 1] != 1:
+                lo *= mat[0, 1]
+            if mat[1, 0] != 1:
+                hi *= mat[1, 0]
+        else:
+            tmp = lo.copy()
+            lo *= mat[0, 0]
+            lo += mat[0, 1] * hi
+            hi *= mat[1, 1]
+            hi += mat[1, 0] * tmp
+        self.applied += 1
+
+    # -- circuit execution --------------------------------------------------
+    def run(self, ops: Sequence[Op]) -> None:
+        for op in ops:
+            name = op.name
+            if name == "BARRIER":
+                continue
+            if name == "MEASURE":
+                self.measured.extend(q for q in op.qubits if q not in self.measured)
+                continue
+            if self.measured and any(q in self.measured for q in op.qubits):
+                raise ValueError("Mid-circuit measurement is not supported")
+            if name == "SWAP":
+                self.swap(*op.qubits)
+                continue
+            if len(op.qubits) == 1:
+                mat = single_qubit_matrix(name, op.params)
+                if mat is None:
+                    raise ValueError(f"Unsupported gate: {name}")
+                self.apply_1q(op.qubits[0], mat)
+                continue
+            if name in CONTROLLED_1Q:
+                self.controlled(op.qubits[0], op.qubits[1], FIXED_1Q[CONTROLLED_1Q[name]])
+            elif name in ("CP", "CU1", "CPHASE"):
+                self.controlled(op.qubits[0], op.qubits[1], np.diag([1, np.exp(1j * op.params[0])]))
+            else:
+                raise ValueError(f"Unsupported gate: {name}")
+        self.flush()
+
+    def probabilities(self) -> np.ndarray:
+        """Return basis-state probabilities indexed with qubit 0 as MSB."""
+        self.flush()
+        probs = (np.abs(self.state) ** 2).reshape((2,) * self.n)
+        return np.transpose(probs, self.axis).reshape(-1)
+
+    def sample(self, shots: int, qubits: Optional[Sequence[int]] = None, seed: Optional[int] = None) -> Dict[str, int]:
+        """Sample ``shots`` measurement outcomes of ``qubits`` (default all)."""
+        self.flush()
+        qubits = list(qubits) if qubits is not None else list(range(self.n))
+        probs = np.abs(self.state) ** 2
+        cdf = np.cumsum(probs)
+        rng = np.random.default_rng(seed)
+        idx = np.searchsorted(cdf, rng.random(shots) * cdf[-1], side="right")
+        idx = np.minimum(idx, probs.size - 1)
+        bits = np.zeros((shots, len(qubits)), dtype=np.uint8)
+        for col, q in enumerate(qubits):
+            bits[:, col] = (idx >> (self.n - 1 - self.axis[q])) & 1
+        keys, counts = np.unique(bits, axis=0, return_counts=True)
+        return {"".join(map(str, k)): int(c) for k, c in zip(keys, counts)}
+
+
+def top_states(probs: np.ndarray, n_qubits: int, k: int) -> List[Dict[str, object]]:
+    """Return the ``k`` most likely basis states as bitstrings (q[0] first)."""
+    k = min(k, probs.size)
+    idx = np.argpartition(probs, -k)[-k:]
+    idx = idx[np.argsort(probs[idx])[::-1]]
+    return [{"state": format(int(i), f"0{n_qubits}b"), "prob": float(probs[i])} for i in idx]
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Statevector simulation of a QASM circuit")
+    p.add_argument("qasm", nargs="?", default=QASM_PATH, help="input QASM file")
+    p.add_argument("-o", "--output", default=OUT_PATH, help="output JSON file")
+    p.add_argument("--shots", type=int, default=0, help="number of measurement samples")
+    p.add_argument("--seed", type=int, help="random seed for sampling")
+    p.add_argument("--top", type=int, default=16, help="number of most likely states to report")
+    p.add_argument("--single", action="store_true", help="use complex64 instead of complex128")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    circuit = parse_qasm_file(args.qasm)
+    dtype = np.complex64 if args.single else np.complex128
+    sim = StatevectorSimulator(circuit.n_qubits, dtype=dtype)
+    start = time.perf_counter()
+    sim.run(circuit.ops)
+    elapsed = time.perf_counter() - start
+    probs = sim.probabilities()
+    result: Dict[str, object] = {
+        "n_qubits": circuit.n_qubits,
+        "gates": len(circuit.ops),
+        "kernels_applied": sim.applied,
+        "runtime_s": elapsed,
+        "norm": float(probs.sum()),
+        "top_states": top_states(probs, circuit.n_qubits, args.top),
+    }
+    if args.shots:
+        result["counts"] = sim.sample(args.shots, sim.measured or None, seed=args.seed)
+    with open(args.output, "w") as fh:
+        json.dump(result, fh, indent=2)
+    print(
+        f"Simulated {len(circuit.ops)} gates on {circuit.n_qubits} qubits in {elapsed:.3f} s "
+        f"({sim.applied} kernels); wrote {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
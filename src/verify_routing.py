@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""Check that a routed QASM circuit implements the intended logical CX gates.
+
+The routed circuit is replayed once: ``SWAP`` updates the physical→logical
+permutation and each ``CX`` is rewritten to the logical states it acts on.
+The result is compared with the logical gate list (or an unrouted QASM file)
+modulo gate commutation.
+
+Two CX gates commute unless a shared qubit is the control of one and the
+target of the other.  Projecting the circuit onto each qubit therefore gives
+a sequence of *role blocks* (maximal runs of gates in which that qubit is
+always control, or always target); the gates inside a block commute, so a
+block is compared as a multiset.  Two circuits are equivalent exactly when
+every qubit has the same block sequence, which is checked in linear time.
+
+Example usage::
+
+    python src/verify_routing.py result/iirb_swap_resolved.qasm
+    python src/verify_routing.py result/iirb_sabre_routed.qasm --reference-qasm result/iirb_generated.qasm
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from src.resolve_swap_paths import load_gate_sequence, load_path_matrix, parse_state_map
+
+LINE_PATTERN = re.compile(r"^(SWAP|CX)\s+q\[(\d+)\],\s*q\[(\d+)\];", re.IGNORECASE)
+LAYOUT_PATTERN = re.compile(r"(\S+?)→q\[(\d+)\]")
+
+LogicalCX = Tuple[str, str]
+# qubit -> [(role, partner counts), ...]; role 0 = control, 1 = target
+CanonicalForm = Dict[str, List[Tuple[int, Dict[str, int]]]]
+
+
+def read_layout_comment(path: str) -> Optional[Dict[int, str]]:
+    """Return the ``// initial layout:`` mapping written by ``sabre_route.py``."""
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if line.startswith("// initial layout:"):
+                return {int(p): s for s, p in LAYOUT_PATTERN.findall(line)}
+            if LINE_PATTERN.match(line):
+                break
+    return None
+
+
+def iter_physical_gates(lines: Iterable[str]) -> Iterator[Tuple[str, int, int]]:
+    for line in lines:
+        m = LINE_PATTERN.match(line.strip())
+        if m:
+            yield m.group(1).upper(), int(m.group(2)), int(m.group(3))
+
+
+def logical_cx_sequence(
+    gates: Iterable[Tuple[str, int, int]],
+    phys_to_logical: Dict[int, str],
+    coupled: Optional[Set[Tuple[int, int]]] = None,
+) -> Tuple[List[LogicalCX], Dict[int, str]]:
+    """Replay physical gates and return logical CX pairs and the final mapping.
+
+    With ``coupled`` every gate is also checked to act on a coupled pair.  A
+    CX on a physical qubit that holds no logical state is a ``ValueError``.
+    """
+    at = dict(phys_to_logical)
+    logical: List[LogicalCX] = []
+    for n, (gate, a, b) in enumerate(gates):
+        if coupled is not None and (a, b) not in coupled:
+            raise ValueError(f"gate {n}: {gate} q[{a}], q[{b}] acts on uncoupled qubits")
+        if gate == "SWAP":
+            at[a], at[b] = at.get(b), at.get(a)
+        else:
+            control, target = at.get(a), at.get(b)
+            if control is None or target is None:
+                raise ValueError(f"gate {n}: {gate} q[{a}], q[{b}] acts on an unmapped physical qubit")
+            logical.append((control, target))
+    return logical, at
+
+
+def canonical_form(pairs: Iterable[LogicalCX]) -> CanonicalForm:
+    """Return the per-qubit role-block form of a CX sequence."""
+    form: CanonicalForm = {}
+    for control, target in pairs:
+        for qubit, role, partner in ((control, 0, target), (target, 1, control)):
+            blocks = form.get(qubit)
+            if blocks is None:
+                blocks = form[qubit] = []
+            if blocks and blocks[-1][0] == role:
+                counts = blocks[-1][1]
+            else:
+                counts = {}
+                blocks.append((role, counts))
+            counts[partner] = counts.get(partner, 0) + 1
+    return form
+
+
+def first_difference(expected: CanonicalForm, actual: CanonicalForm) -> Optional[str]:
+    """Return a description of the first mismatch, or ``None`` if equivalent."""
+    for qubit in sorted(set(expected) | set(actual)):
+        exp, act = expected.get(qubit, []), actual.get(qubit, [])
+        for i, (e, a) in enumerate(zip(exp, act)):
+            if e != a:
+                role = ("control", "target")
+                return (
+                    f"{qubit}: block {i} expected {role[e[0]]} with {e[1]}, "
+                    f"got {role[a[0]]} with {a[1]}"
+                )
+        if len(exp) != len(act):
+            return f"{qubit}: expected {len(exp)} role blocks, got {len(act)}"
+    return None
+
+
+def coupled_pairs(path_matrix: Dict[str, Dict[str, List[str]]], node_to_idx: Dict[str, int]) -> Set[Tuple[int, int]]:
+    return {
+        (node_to_idx[u], node_to_idx[v])
+        for u, dests in path_matrix.items()
+        for v, path in dests.items()
+        if len(path) == 2
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Verify a routed QASM circuit against its logical gates")
+    p.add_argument("qasm", nargs="?", default="result/iirb_swap_resolved.qasm", help="routed QASM file")
+    p.add_argument("--gates", default="result/sample_logical_gates.json", help="logical gate list JSON")
+    p.add_argument("--reference-qasm", help="compare against an unrouted QASM file instead of --gates")
+    p.add_argument("--state-map", default="result/qubit_state_map.txt", help="qubit state map file")
+    p.add_argument("--paths", help="path matrix; also check every gate acts on coupled qubits")
+    p.add_argument("--require-restored", action="store_true", help="fail unless the final mapping is the initial one")
+    return p.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    node_to_idx, _, _ = parse_state_map(args.state_map)
+    default_layout = {idx: state for state, idx in node_to_idx.items()}
+    layout = read_layout_comment(args.qasm) or default_layout
+    coupled = None
+    if args.paths:
+        pairs = coupled_pairs(load_path_matrix(args.paths), node_to_idx)
+        coupled = pairs | {(b, a) for a, b in pairs}
+
+    with open(args.qasm, encoding="utf-8") as fh:
+        try:
+            routed, final = logical_cx_sequence(iter_physical_gates(fh), layout, coupled)
+        except ValueError as exc:
+            print(f"FAIL: {exc}")
+            sys.exit(1)
+
+    if args.reference_qasm:
+        with open(args.reference_qasm, encoding="utf-8") as fh:
+            cx_only = (gate for gate in iter_physical_gates(fh) if gate[0] == "CX")
+            try:
+                expected, _ = logical_cx_sequence(cx_only, default_layout)
+            except ValueError as exc:
+                print(f"FAIL: reference {exc}")
+                sys.exit(1)
+    else:
+        expected = [(g["q1"], g["q2"]) for g in load_gate_sequence(args.gates) if g.get("gate") == "CX"]
+
+    if routed == expected:
+        print(f"OK: {len(routed)} logical CX gates match in identical order")
+    else:
+        diff = first_difference(canonical_form(expected), canonical_form(routed))
+        if diff:
+            print(f"FAIL: {diff}")
+            sys.exit(1)
+        print(f"OK: {len(routed)} logical CX gates match up to commutation")
+    if final != layout:
+        moved = sum(1 for p in layout if final.get(p) != layout[p])
+        print(f"Final mapping differs from the initial layout on {moved} qubits")
+        if args.require_restored:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
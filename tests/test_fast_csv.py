@@ -0,0 +1,75 @@
+import os
+
+from conftest import HAS_NUMPY
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not HAS_NUMPY, reason="NumPy が未インストールのためスキップ"
+)
+
+if HAS_NUMPY:
+    import numpy as np
+    from src.fast_csv import cache_path, load_columns
+
+
+def _write(path, rows, header="freq,I,Q"):
+    path.write_text(header + "\n" + "\n".join(rows) + "\n")
+    return str(path)
+
+
+def test_matches_genfromtxt_across_chunks_and_missing_fields(tmp_path) -> None:
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(103, 3))
+    rows = [",".join(repr(v) for v in row) for row in data.tolist()]
+    rows[10] = "1.5,,2.5"  # empty field
+    rows[50] = "2.0,nan,x"  # text
+    rows.insert(70, "")  # blank line
+    path = _write(tmp_path / "trace.csv", rows)
+
+    cols = load_columns(path, cache=False, chunk_rows=16)
+    ref = np.genfromtxt(path, delimiter=",", names=True)
+    assert list(cols) == ["freq", "I", "Q"]
+    for name in cols:
+        np.testing.assert_array_equal(cols[name], ref[name])
+
+
+def test_sidecar_cache_is_memory_mapped_and_invalidated(tmp_path) -> None:
+    path = _write(tmp_path / "trace.csv", ["1,2,3", "4,5,6"])
+    first = load_columns(path)
+    assert os.path.exists(cache_path(path))
+    again = load_columns(path)
+    assert isinstance(again["Q"], np.memmap)
+    np.testing.assert_array_equal(again["Q"], first["Q"])
+
+    _write(tmp_path / "trace.csv", ["1,2,3", "4,5,7"])
+    os.utime(path, ns=(0, 0))  # same size; the mtime and hash still differ
+    assert load_columns(path)["Q"].tolist() == [3.0, 7.0]
+
+    other = tmp_path / "cache"
+    load_columns(path, cache_dir=str(other))
+    assert os.path.exists(cache_path(path, str(other)))
+
+
+def test_reload_keeps_earlier_mappings_intact(tmp_path) -> None:
+    path = _write(tmp_path / "daq.csv", [f"{i},{100 + i}" for i in range(5)], header="a,b")
+    load_columns(path)
+    old = load_columns(path)["b"]
+    assert isinstance(old, np.memmap)
+
+    for n in (8, 2):  # the export grows, then is restarted
+        _write(tmp_path / "daq.csv", [f"{i},{200 + i}" for i in range(n)], header="a,b")
+        assert load_columns(path)["b"].tolist() == [200.0 + i for i in range(n)]
+        assert old.tolist() == [100.0, 101.0, 102.0, 103.0, 104.0]
+    assert sorted(os.listdir(tmp_path)) == ["daq.csv", "daq.csv.npy", "daq.csv.npy.json"]
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX file modes")
+def test_sidecar_gets_the_umask_file_mode(tmp_path) -> None:
+    path = _write(tmp_path / "shared.csv", ["1,2,3"])
+    old = os.umask(0o022)
+    try:
+        load_columns(path)
+    finally:
+        os.umask(old)
+    for name in (cache_path(path), cache_path(path) + ".json"):
+        assert os.stat(name).st_mode & 0o777 == 0o644
@@ -0,0 +1,49 @@
+import random
+from pathlib import Path
+
+from src.generate_iirb_qasm import (
+    generate_parallel_qasm,
+    load_candidates,
+    misra_gries_coloring,
+    parse_state_map,
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_misra_gries_uses_at_most_delta_plus_one_colours() -> None:
+    for seed in range(200):
+        rng = random.Random(seed)
+        n = rng.randint(2, 12)
+        edges = [(a, b) for a in range(n) for b in range(a + 1, n) if rng.random() < 0.5]
+        rng.shuffle(edges)
+        coloring = misra_gries_coloring(edges)
+        assert set(coloring) == set(edges)
+        degree = {}
+        seen = set()
+        for (a, b), c in coloring.items():
+            degree[a] = degree.get(a, 0) + 1
+            degree[b] = degree.get(b, 0) + 1
+            assert (a, c) not in seen and (b, c) not in seen
+            seen.update({(a, c), (b, c)})
+        assert max(coloring.values(), default=-1) <= max(degree.values(), default=0)
+
+
+def test_parallel_layers_cover_every_coupler_once() -> None:
+    mapping = parse_state_map(str(ROOT / "result/qubit_state_map.txt"))
+    couplings = load_candidates(str(ROOT / "result/coupling_candidates.json"))
+    lines, n_gates, n_layers = generate_parallel_qasm(couplings, mapping, None)
+
+    gates = [line for line in lines if line.startswith("CX")]
+    assert len(gates) == n_gates == sum(1 for c in couplings if c.get("coupled"))
+    assert lines.count("barrier q;") == n_layers - 1
+    assert n_layers < n_gates
+
+    layer_qubits = set()
+    for line in lines:
+        if line == "barrier q;":
+            layer_qubits = set()
+        elif line.startswith("CX"):
+            qs = {int(tok.strip("q[];, ")) for tok in line[3:].split(",")}
+            assert not qs & layer_qubits
+            layer_qubits |= qs
@@ -0,0 +1,47 @@
+from conftest import HAS_NUMPY
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not HAS_NUMPY, reason="NumPy が未インストールのためスキップ"
+)
+
+if HAS_NUMPY:
+    import numpy as np
+    from scipy.signal import lfilter
+    from src.ingest_raw_iq import DownConverter, ingest, open_capture, save_output
+
+
+@pytest.mark.parametrize("decimation,numtaps", [(1, 1), (3, 50), (16, 128)])
+def test_chunked_ddc_matches_whole_capture_reference(decimation, numtaps) -> None:
+    rng = np.random.default_rng(0)
+    fs, if_freq = 1e6, 123_456.7
+    raw = rng.integers(-2000, 2000, size=(20_003, 2)).astype(np.int16)
+    x = raw[:, 0] + 1j * raw[:, 1].astype(float)
+    mixed = x * np.exp(-2j * np.pi * if_freq / fs * np.arange(len(x)))
+    taps = DownConverter(fs, if_freq, decimation, numtaps).taps
+    ref = lfilter(taps, 1, mixed)[::decimation]
+    ref10 = ref[: ref.size // 10 * 10].reshape(-1, 10).mean(axis=1)
+    for chunk in (999, 1 << 14):
+        y = ingest(raw, fs, if_freq, decimation, numtaps=numtaps, chunk=chunk)
+        assert y.size == ref.size
+        np.testing.assert_allclose(y, ref, atol=1e-6 * np.abs(ref).max())
+        y10 = ingest(raw, fs, if_freq, decimation, integrate=10, numtaps=numtaps, chunk=chunk)
+        np.testing.assert_allclose(y10, ref10, atol=1e-6 * np.abs(ref).max())
+
+
+def test_if_tone_becomes_dc_and_sweep_file_loads(tmp_path) -> None:
+    from src.extract_quantum_metrics import load_iq
+
+    fs, if_freq, n = 1e6, 50e3, 40_000
+    tone = 1000 * np.exp(2j * np.pi * if_freq / fs * np.arange(n) + 0.3j)
+    path = tmp_path / "capture.bin"
+    np.column_stack([tone.real, tone.imag]).astype(np.float32).tofile(path)
+
+    samples = open_capture(str(path), "float32")
+    z = ingest(samples, fs, if_freq, decimation=10, integrate=100, scale=1e-3)
+    np.testing.assert_allclose(z[1:], np.exp(0.3j), rtol=1e-4)
+
+    save_output(str(tmp_path / "s21.csv"), z, 1e-3, freq_start=5.0, freq_step=1e-4)
+    freqs, iq = load_iq(str(tmp_path / "s21.csv"))
+    assert freqs.size == z.size and np.isclose(freqs[1], 5.0001)
+    np.testing.assert_allclose(iq, z, rtol=1e-6)
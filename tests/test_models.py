@@ -36,3 +36,191 @@ def test_compute_lorentz_curve():
     f = np.array([fc])
     curve = compute_lorentz_curve(fc, ql, f)
     assert curve[0] <= 1.0
+
+
+def test_lorentzian_jacobian_matches_finite_differences():
+    from src.extract_quantum_metrics import lorentzian_jacobian
+
+    f = np.linspace(4.99, 5.01, 201)
+    p = np.array([5.001, 2e4, 0.5, 1.0])
+    jac = lorentzian_jacobian(f, *p)
+    for k, h in enumerate([1e-9, 1e-2, 1e-7, 1e-7]):
+        dp = np.zeros(4)
+        dp[k] = h
+        num = (lorentzian(f, *(p + dp)) - lorentzian(f, *(p - dp))) / (2 * h)
+        assert np.allclose(jac[:, k], num, rtol=1e-5, atol=1e-6 * np.abs(num).max())
+
+
+def test_batch_fit_directory_and_long_sweep(tmp_path):
+    from src.batch_fit_resonance import batch_fit, load_traces
+
+    rng = np.random.default_rng(0)
+    f = np.linspace(4.99, 5.01, 801)
+    fcs = 5.0 + 0.003 * np.sin(np.linspace(0, 3, 12))
+    sweep_dir = tmp_path / "traces"
+    sweep_dir.mkdir()
+    lines = ["freq,flux,abs"]
+    for k, fc in enumerate(fcs):
+        amps = lorentzian(f, fc, 1.5e4, 0.4, 1.0) + rng.normal(0, 0.005, f.size)
+        rows = "\n".join(f"{x!r},{a!r}" for x, a in zip(f.tolist(), amps.tolist()))
+        (sweep_dir / f"trace_{k}.csv").write_text("freq,abs\n" + rows + "\n")
+        lines += [f"{x!r},{k * 0.1!r},{a!r}" for x, a in zip(f.tolist(), amps.tolist())]
+    (tmp_path / "sweep.csv").write_text("\n".join(lines) + "\n")
+
+    by_dir = batch_fit(load_traces(str(sweep_dir)), workers=2, chunk=5)
+    by_sweep = batch_fit(load_traces(str(tmp_path / "sweep.csv")), workers=1)
+    assert [r["trace"] for r in by_dir[:3]] == ["trace_0.csv", "trace_1.csv", "trace_2.csv"]
+    assert [r["sweep"] for r in by_sweep[:2]] == [0.0, 0.1]
+    for rows in (by_dir, by_sweep):
+        assert all(r["ok"] for r in rows)
+        assert np.allclose([r["fc_GHz"] for r in rows], fcs, atol=2e-6)
+        assert np.allclose([r["Q_loaded"] for r in rows], 1.5e4, rtol=0.05)
+    assert sum(r["warm_start"] for r in by_dir) >= len(fcs) - 3
+
+
+def _notch(f, fc, ql, qe, a=0.8 * np.exp(0.7j)):
+    return a * (1 - (ql / qe) / (1 + 2j * ql * (f - fc) / fc))
+
+
+def test_circle_fit_recovers_notch_parameters():
+    from src.extract_quantum_metrics import circle_fit, circle_seed
+
+    f = np.linspace(4.99, 5.01, 1001)
+    fc, ql, qe = 5.0013, 2e4, 3e4
+    fit = circle_fit(f, _notch(f, fc, ql, qe))
+    assert np.isclose(fit.fc, fc, rtol=1e-10)
+    assert np.isclose(fit.ql, ql, rtol=1e-6)
+    assert np.isclose(fit.qe, qe, rtol=1e-6)
+    assert np.isclose(fit.qi, 1 / (1 / ql - 1 / qe), rtol=1e-6)
+    assert np.isclose(abs(fit.background), 0.8)
+    assert np.isclose(circle_seed(fit)[2], 0.8 * ql / qe)
+
+    rng = np.random.default_rng(3)
+    noisy = _notch(f, fc, ql, qe) + 0.03 * (rng.normal(size=f.size) + 1j * rng.normal(size=f.size))
+    fit = circle_fit(f, noisy)
+    assert abs(fit.fc - fc) < 0.1 * fc / ql
+    assert np.isclose(fit.ql, ql, rtol=0.1)
+
+
+def test_batch_fit_iq_sweep_circle_method(tmp_path):
+    from src.batch_fit_resonance import batch_fit, load_traces
+
+    rng = np.random.default_rng(1)
+    f = np.linspace(4.99, 5.01, 801)
+    fcs = 5.0 + 0.003 * np.linspace(-1, 1, 6)
+    z = np.array([_notch(f, fc, 1.5e4, 2.5e4) for fc in fcs])
+    z += 0.005 * (rng.normal(size=z.shape) + 1j * rng.normal(size=z.shape))
+    np.savez(tmp_path / "sweep.npz", freq=f, I=z.real, Q=z.imag, sweep=np.arange(6) * 0.1)
+
+    traces = load_traces(str(tmp_path / "sweep.npz"))
+    assert np.iscomplexobj(traces[0][3])
+    circle = batch_fit(traces, method="circle")
+    seeded = batch_fit(traces)
+    assert all(r["ok"] and r["seed"] == "circle" for r in circle)
+    # the circle fit only seeds the first trace; the rest are warm-started
+    assert [r["seed"] for r in seeded] == ["circle"] + ["warm"] * 5 and all(r["ok"] for r in seeded)
+    cold = batch_fit(traces, warm_start=False)
+    assert all(r["seed"] == "circle" for r in cold)
+    assert np.allclose([r["fc_GHz"] for r in circle], fcs, atol=1e-6)
+    assert np.allclose([r["Q_loaded"] for r in circle], 1.5e4, rtol=0.02)
+    assert np.allclose([r["Q_external"] for r in circle], 2.5e4, rtol=0.02)
+    assert np.allclose([r["fc_GHz"] for r in seeded], fcs, atol=2e-6)
+
+
+def test_detect_resonances_in_wide_sweep():
+    from src.detect_resonances import detect, detection_signal, fit_resonators, remove_delay
+
+    rng = np.random.default_rng(2)
+    f = np.linspace(6.0, 6.2, 200_001)
+    fcs = np.array([6.021, 6.064, 6.1105, 6.172])
+    z = np.exp(-2j * np.pi * 3.0 * f)
+    for fc in fcs:
+        z = z * _notch(f, fc, 2e4, 4e4, a=1.0)
+    z += 0.01 * (rng.normal(size=f.size) + 1j * rng.normal(size=f.size))
+
+    for mode, values in (("magnitude", np.abs(z)), ("iq", z)):
+        found = detect(detection_signal(values, mode))
+        assert np.allclose(f[[d.index for d in found]], fcs, atol=fcs[0] / 2e4)
+    values, delay = remove_delay(f, z)
+    assert np.isclose(delay, 3.0, rtol=0.01)
+    rows = fit_resonators(f, values, detect(detection_signal(values, "iq")), method="circle")
+    assert all(r["ok"] for r in rows)
+    assert np.allclose([r["fc_GHz"] for r in rows], fcs, atol=1e-6)
+    assert np.allclose([r["Q_loaded"] for r in rows], 2e4, rtol=0.05)
+
+
+def test_streaming_welch_matches_scipy_and_log_bins():
+    from scipy.signal import welch
+    from src.compute_noise_spectrum import log_bin, welch_stream
+
+    x = np.random.default_rng(4).normal(size=100_003)
+    for nperseg, noverlap, window in ((1024, None, "hann"), (1000, 0, "boxcar")):
+        f_ref, p_ref = welch(x, fs=2e3, nperseg=nperseg, noverlap=noverlap, window=window)
+        chunks = (x[i : i + 7777] for i in range(0, x.size, 7777))
+        f, p, segments = welch_stream(chunks, 2e3, nperseg, noverlap, window)
+        assert segments == (x.size - nperseg) // (nperseg - (nperseg // 2 if noverlap is None else 0)) + 1
+        np.testing.assert_allclose(f, f_ref)
+        np.testing.assert_allclose(p[1:], p_ref[1:], rtol=1e-10)
+
+    fb, pb = log_bin(f, p, 5)
+    assert np.all(np.diff(np.log10(fb)) > 0) and fb[0] == f[1] and pb[0] == p[1]
+    assert fb.size <= 5 * np.ceil(np.log10(f[-1] / f[1]))
+    assert np.allclose(log_bin(f, np.full_like(f, 3.0), 5)[1], 3.0)
+
+
+def test_closed_form_noise_fit_matches_nnls_and_batches(tmp_path):
+    import json
+
+    from scipy.optimize import nnls
+    from src.compute_noise_spectrum import fit_noise, fit_noise_batch, main
+
+    f = np.logspace(0, 4, 200)
+    w = f  # the model is in the units of the frequency column
+    exact = fit_noise_batch(f, 3e-6 / w + 2e-9 + 5e-4 / w**2, ("A", "B", "C"))
+    np.testing.assert_allclose(exact.coef[0], [3e-6, 2e-9, 5e-4], rtol=1e-8)
+
+    rng = np.random.default_rng(5)
+    truth = np.column_stack([rng.uniform(0, 1e-5, 50), rng.uniform(0, 1e-8, 50)])
+    psd = (truth[:, :1] / w + truth[:, 1:]) * rng.exponential(size=(50, f.size))
+    psd[0] = 1e-8 - 1e-7 / w  # rising spectrum: A is clipped at zero
+    fit = fit_noise_batch(f, psd)
+    X = np.column_stack([1 / w, np.ones_like(w)])
+    for i in range(50):
+        ref = nnls(X, psd[i])[0]
+        cost = np.sum((X @ fit.coef[i] - psd[i]) ** 2)
+        assert np.all(fit.coef[i] >= 0) and cost <= np.sum((X @ ref - psd[i]) ** 2) * (1 + 1e-9)
+    assert fit.coef[0, 0] == 0 and fit.poor[0]
+    np.testing.assert_allclose(fit_noise(f, psd[1]), (*fit.params(1).values(), fit.residual[1]), rtol=1e-10)
+
+    log = fit_noise_batch(f, truth[:1, :1] / w + truth[:1, 1:], weighting="log")
+    np.testing.assert_allclose(log.coef[0], truth[0], rtol=1e-8)
+
+    np.savez(tmp_path / "spectra.npz", freq=f, psd=psd)
+    with pytest.warns(UserWarning, match="Poor fit"):
+        main(str(tmp_path / "spectra.npz"), str(tmp_path / "fit.json"))
+    result = json.loads((tmp_path / "fit.json").read_text())
+    assert result["terms"] == ["A", "B"] and len(result["fits"]) == 50
+    assert result["fits"][0]["poor_fit"] and result["fits"][3]["noise_model"]["A"] == fit.coef[3, 0]
+
+
+def test_noise_fit_skips_non_finite_points_and_log_bin_sorts():
+    from src.compute_noise_spectrum import fit_noise, fit_noise_batch, log_bin
+
+    f = np.logspace(0, 3, 50)
+    psd = 2e-6 / f + 1e-9 + 1e-10 * np.random.default_rng(6).normal(size=f.size)
+    ref = fit_noise(f, psd)
+    bad = psd.copy()
+    bad[[3, 20]] = np.nan
+    bad[40] = np.inf
+    keep = np.isfinite(bad)
+    np.testing.assert_allclose(fit_noise(f, bad), fit_noise(f[keep], psd[keep]), rtol=1e-10)
+    assert np.allclose(fit_noise(f, bad)[:2], ref[:2], rtol=0.05)
+    fit = fit_noise_batch(f, np.vstack([psd, np.full_like(psd, 1.0)]))
+    assert np.all(np.isfinite(fit.residual)) and not fit.poor.any()
+    with pytest.raises(ValueError, match="finite"):
+        fit_noise(f, np.full_like(f, np.nan))
+
+    shuffled = np.array([1.0, 100.0, 10.0, 1000.0])
+    fb, pb = log_bin(shuffled, shuffled * 2, 1)
+    np.testing.assert_allclose(fb, [1.0, 10.0, np.sqrt(1e5)])
+    np.testing.assert_allclose(pb, [2.0, 20.0, 1100.0])
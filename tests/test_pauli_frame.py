@@ -0,0 +1,57 @@
+from conftest import HAS_NUMPY
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not HAS_NUMPY, reason="NumPy が未インストールのためスキップ"
+)
+
+if HAS_NUMPY:
+    import numpy as np
+    from src.pauli_frame_noise import DephasingModel, PauliFrames, run_shots
+    from src.qasm_ops import Op
+    from src.schedule_qasm import schedule_ops
+
+
+def test_frames_propagate_through_cliffords() -> None:
+    frames = PauliFrames(3, 130, np.random.default_rng(0))
+    frames.x[0] = frames.mask(np.array([0, 5, 129]))
+    frames.cx(0, 1)
+    frames.swap(1, 2)
+    assert (frames.flips(2) == frames.flips(0)).all()
+    assert not frames.flips(1).any()
+    frames.h(0)
+    assert not frames.flips(0).any()
+    assert (frames.z[frames.rows[0]] == frames.mask(np.array([0, 5, 129]))).all()
+
+
+def test_dephasing_between_hadamards_flips_outcome() -> None:
+    ops = [Op("H", (0,)), Op("ID", (0,)), Op("H", (0,)), Op("MEASURE", (0,)), Op("X", (1,)), Op("MEASURE", (1,))]
+    durations = {"1Q": 100.0, "ID": 100.0, "MEASURE": 0.0}
+    sched = schedule_ops(ops, 2, durations)
+    model = DephasingModel(t2_ns=2000.0)
+    # Z errors after the second H commute with the measurement.
+    expected = model.probability(200.0)
+
+    failures, flips = run_shots(sched, 200_000, model, seed=3)
+    assert abs(failures / 200_000 - expected) < 5 * np.sqrt(expected / 200_000)
+    assert flips[1] == 0
+    assert run_shots(sched, 1000, DephasingModel(), seed=3)[0] == 0
+
+
+def test_idle_dephasing_is_applied_before_the_gate_ending_the_idle() -> None:
+    # qubit 0 waits for the long CX at the barrier, between its two H gates
+    ops = [Op("H", (0,)), Op("CX", (1, 2)), Op("BARRIER", (0, 1, 2)), Op("H", (0,)), Op("MEASURE", (0,))]
+    sched = schedule_ops(ops, 3, {"1Q": 20.0, "CX": 2000.0, "MEASURE": 0.0})
+    model = DephasingModel(t2_ns=2000.0)
+    expected = model.probability(2020.0)
+
+    failures, _ = run_shots(sched, 100_000, model, seed=5)
+    assert abs(failures / 100_000 - expected) < 5 * np.sqrt(expected / 100_000)
+
+
+def test_depolarizing_rate_matches_probability() -> None:
+    ops = [Op("CX", (0, 1)), Op("MEASURE", (0, 1))]
+    sched = schedule_ops(ops, 2, {"MEASURE": 0.0})
+    failures, _ = run_shots(sched, 300_000, DephasingModel(), p2=0.03, seed=4)
+    # 12 of the 15 two-qubit Paulis contain X or Y on at least one qubit
+    assert abs(failures / 300_000 - 0.03 * 12 / 15) < 0.002
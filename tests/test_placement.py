@@ -0,0 +1,51 @@
+import random
+from pathlib import Path
+
+from src.map_state_to_layout import (
+    coupling_graph,
+    hop_distances,
+    interaction_graph,
+    optimize_placement,
+    placement_cost,
+    read_layout,
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+STATES = [f"s{i}" for i in range(16)]
+
+
+def _chip():
+    layout = read_layout(str(ROOT / "result/qubit_layout_map.txt"))
+    adj = coupling_graph(layout, 1.5)
+    return adj, hop_distances(adj)
+
+
+def test_embeddable_interactions_are_placed_on_couplers() -> None:
+    adj, dist = _chip()
+    rng = random.Random(2)
+    perm = STATES[:]
+    rng.shuffle(perm)
+    gates = []
+    for i in range(16):
+        if i % 4 < 3:
+            gates.append({"gate": "CX", "q1": perm[i], "q2": perm[i + 1]})
+        if i < 12:
+            gates.append({"gate": "CX", "q1": perm[i], "q2": perm[i + 4]})
+    weights = interaction_graph(gates, STATES)
+    assert placement_cost(list(range(16)), weights, dist) > 0
+
+    place, method = optimize_placement(gates, STATES, adj)
+    assert method == "vf2"
+    assert sorted(place) == list(range(16))
+    assert placement_cost(place, weights, dist) == 0
+
+
+def test_annealing_fallback_reduces_cost() -> None:
+    adj, dist = _chip()
+    rng = random.Random(5)
+    gates = [dict(zip(("q1", "q2"), rng.sample(STATES, 2)), gate="CX") for _ in range(200)]
+    place, method = optimize_placement(gates, STATES, adj, seed=0)
+    weights = interaction_graph(gates, STATES)
+    assert method == "anneal"
+    assert sorted(place) == list(range(16))
+    assert placement_cost(place, weights, dist) < placement_cost(list(range(16)), weights, dist)
@@ -0,0 +1,143 @@
+from pathlib import Path
+import random
+
+from src.qasm_trace_bin import TraceReader, TraceWriter
+
+
+def _run(ops, n=16):
+    state = [0] * n
+    states = [state.copy()]
+    changes = []
+    for gate, i, j in ops:
+        changed = ()
+        if gate == "SWAP":
+            if state[i] != state[j]:
+                changed = (i, j)
+            state[i], state[j] = state[j], state[i]
+        elif gate == "X":
+            state[i] ^= 1
+            changed = (i,)
+        elif state[i]:
+            state[j] ^= 1
+            changed = (j,)
+        states.append(state.copy())
+        changes.append(changed)
+    return states, changes
+
+
+def _random_ops(count, n=16, seed=0):
+    rng = random.Random(seed)
+    ops = []
+    for _ in range(count):
+        gate = rng.choice(["SWAP", "CX", "CX", "X"])
+        i, j = rng.sample(range(n), 2)
+        ops.append((gate, i, j))
+    return ops
+
+
+def test_trace_random_access(tmp_path: Path) -> None:
+    ops = _random_ops(1000)
+    states, changes = _run(ops)
+    path = tmp_path / "trace.bin"
+    with TraceWriter(str(path), [0] * 16, block_steps=64) as writer:
+        writer.append("INIT")
+        for (gate, i, j), changed in zip(ops, changes):
+            writer.append(gate, (i, j) if gate != "X" else (i,), changed)
+
+    with TraceReader(str(path)) as reader:
+        assert len(reader) == len(states)
+        for step in [0, 1, 63, 64, 65, 500, 999, 1000]:
+            entry = reader[step]
+            assert entry["step"] == step
+            assert entry["qubits"] == states[step]
+        assert reader[0]["gate"] == "INIT"
+        assert reader[1]["gate"] == ops[0][0]
+        assert [e["qubits"] for e in reader] == states
+
+
+def test_trace_without_footer_is_readable(tmp_path: Path) -> None:
+    ops = _random_ops(300, seed=1)
+    states, changes = _run(ops)
+    path = tmp_path / "partial.bin"
+    writer = TraceWriter(str(path), [0] * 16, block_steps=32)
+    writer.append("INIT")
+    for (gate, i, j), changed in zip(ops, changes):
+        writer.append(gate, (i, j) if gate != "X" else (i,), changed)
+    # simulate an interrupted run: flush blocks but never write the index
+    writer._flush_block()
+    writer._fh.close()
+
+    with TraceReader(str(path)) as reader:
+        assert len(reader) == len(states)
+        assert reader[257]["qubits"] == states[257]
+
+
+def test_incremental_render_and_streamed_gif(tmp_path: Path) -> None:
+    import io
+    import json
+
+    import pytest
+
+    pytest.importorskip("PIL")
+    from PIL import Image, ImageChops
+
+    from src.render_qasm_trace import FrameRenderer, encode_gif_frame, load_font, render_trace
+
+    states, _ = _run(_random_ops(42, n=6, seed=5), n=6)
+    trace = [
+        {"step": i, "gate": "INIT" if i == 0 else "CX", "args": [] if i == 0 else [0, 1], "qubits": s}
+        for i, s in enumerate(states)
+    ]
+    font = load_font()
+    running = FrameRenderer(6, font)
+    for step in trace:
+        frame = running.render(step)
+    fresh = FrameRenderer(6, font).render(trace[-1])
+    assert ImageChops.difference(frame, fresh).getbbox() is None
+
+    path = tmp_path / "trace.json"
+    path.write_text(json.dumps(trace))
+    gif = tmp_path / "trace.gif"
+    count = render_trace(str(path), str(gif), png_dir=None, stride=4, chunk=3)
+    assert count == len(set(range(0, len(trace), 4)) | {len(trace) - 1})
+    with Image.open(gif) as im:
+        assert im.n_frames == count
+        im.seek(count - 1)
+        last = im.convert("RGB")
+    with Image.open(io.BytesIO(encode_gif_frame(fresh))) as single:
+        assert ImageChops.difference(last, single.convert("RGB")).getbbox() is None
+
+
+def test_render_closes_binary_trace(tmp_path: Path, monkeypatch) -> None:
+    import pytest
+
+    pytest.importorskip("PIL")
+    from src.render_qasm_trace import render_trace
+
+    states, changes = _run(_random_ops(20, n=4, seed=6), n=4)
+    path = tmp_path / "trace.bin"
+    with TraceWriter(str(path), [0] * 4, block_steps=8) as writer:
+        writer.append("INIT")
+        for k, changed in enumerate(changes):
+            if k % 2:
+                writer.append("CX", (0, 1), changed)
+            else:
+                writer.append("X", (2,), changed)  # single-qubit gates have one argument
+
+    opened, closed = [], []
+    init, close = TraceReader.__init__, TraceReader.close
+    monkeypatch.setattr(TraceReader, "__init__", lambda self, p: (opened.append(self), init(self, p))[1])
+    monkeypatch.setattr(TraceReader, "close", lambda self: (closed.append(self), close(self))[1])
+    assert render_trace(str(path), str(tmp_path / "trace.gif"), png_dir=None, stride=5) == 5
+    assert len(opened) == 2 and closed == opened
+
+
+def test_step_title_formats_any_number_of_qubits() -> None:
+    import pytest
+
+    pytest.importorskip("PIL")
+    from src.render_qasm_trace import step_title
+
+    assert step_title({"step": 3, "gate": "X", "args": [2]}) == "Step 3: X q[2]"
+    assert step_title({"step": 4, "gate": "CX", "args": [0, 1]}) == "Step 4: CX q[0], q[1]"
+    assert step_title({"step": 0, "gate": "INIT"}) == "Step 0: INIT"
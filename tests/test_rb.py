@@ -0,0 +1,60 @@
+from pathlib import Path
+
+from conftest import HAS_NUMPY
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not HAS_NUMPY, reason="NumPy が未インストールのためスキップ"
+)
+
+if HAS_NUMPY:
+    import numpy as np
+    from src.generate_rb_qasm import (
+        INTERLEAVE,
+        _gate_line,
+        _gate_matrix,
+        clifford_group,
+        sample_sequences,
+        sequence_qasm,
+    )
+    from src.qasm_ops import parse_qasm_file
+
+
+def _unitary(ops, n):
+    u = np.eye(2 ** n, dtype=complex)
+    for op in ops:
+        if op.name in ("BARRIER", "MEASURE"):
+            continue
+        gate = (op.name,) + tuple(str(q) for q in op.qubits)
+        u = _gate_matrix(gate, n) @ u
+    return u
+
+
+def test_clifford_tables() -> None:
+    g1, g2 = clifford_group(1), clifford_group(2)
+    assert (g1.size, g2.size) == (24, 11520)
+    idx = np.arange(g2.size)
+    assert (g2.compose(idx, g2.inverse) == g2.identity).all()
+    a, b, c = np.random.default_rng(0).integers(g2.size, size=(3, 500))
+    assert (g2.compose(g2.compose(a, b), c) == g2.compose(a, g2.compose(b, c))).all()
+    for i in (1, 77, 5000, 11519):
+        u = np.eye(4, dtype=complex)
+        for gate in g2.words[i]:
+            u = _gate_matrix(gate, 2) @ u
+        assert (g2.perm_of_unitary(u) == g2.perms[i]).all()
+
+
+@pytest.mark.parametrize("interleave", [None, "cx"])
+def test_rb_sequences_compose_to_identity(tmp_path: Path, interleave) -> None:
+    group = clifford_group(2)
+    snippets = group.snippets([0, 1])
+    target = group.index_of_gate(INTERLEAVE[interleave]) if interleave else None
+    text = _gate_line(INTERLEAVE[interleave], [0, 1]) if interleave else ""
+    seqs, recovery = sample_sequences(group, 4, 30, seed=1, interleave=target)
+    for k, (seq, rec) in enumerate(zip(seqs.tolist(), recovery.tolist())):
+        path = tmp_path / f"rb_{k}.qasm"
+        path.write_text(sequence_qasm(seq, rec, snippets, [0, 1], 2, text))
+        u = _unitary(parse_qasm_file(str(path)).ops, 2)
+        phase = u[0, 0]
+        assert abs(abs(phase) - 1) < 1e-9
+        assert np.allclose(u, phase * np.eye(4))
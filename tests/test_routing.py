@@ -0,0 +1,170 @@
+import json
+import random
+import re
+from pathlib import Path
+
+import pytest
+
+from src.resolve_swap_paths import (
+    batch_inputs,
+    batch_outputs,
+    circuit_stats,
+    load_path_matrix,
+    parse_state_map,
+    resolve_gates,
+    resolve_gates_lazy,
+    route_batch,
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+GATE = re.compile(r"^(SWAP|CX)\s+q\[(\d+)\],\s*q\[(\d+)\];")
+
+
+def _chip():
+    node_to_idx, _, _ = parse_state_map(str(ROOT / "result/qubit_state_map.txt"))
+    path_matrix = load_path_matrix(str(ROOT / "result/path_matrix.json"))
+    return node_to_idx, path_matrix
+
+
+def _random_gates(states, count, seed):
+    rng = random.Random(seed)
+    return [dict(zip(("q1", "q2"), rng.sample(states, 2)), gate="CX") for _ in range(count)]
+
+
+def _replay(lines, node_to_idx, adjacent):
+    """Return logical CX list and final mapping implied by routed QASM."""
+    at = {idx: state for state, idx in node_to_idx.items()}
+    logical = []
+    for line in lines:
+        m = GATE.match(line)
+        if not m:
+            continue
+        a, b = int(m.group(2)), int(m.group(3))
+        assert (a, b) in adjacent
+        if m.group(1) == "SWAP":
+            at[a], at[b] = at[b], at[a]
+        else:
+            logical.append((at[a], at[b]))
+    return logical, at
+
+
+def test_lazy_routing_preserves_gates_and_restores_mapping() -> None:
+    node_to_idx, path_matrix = _chip()
+    adjacent = {
+        (node_to_idx[u], node_to_idx[v])
+        for u, dests in path_matrix.items()
+        for v, path in dests.items()
+        if len(path) == 2
+    }
+    gates = _random_gates(sorted(node_to_idx), 200, seed=4)
+    expected = [(g["q1"], g["q2"]) for g in gates]
+
+    lazy = resolve_gates_lazy(gates, path_matrix, node_to_idx, restore=True)
+    logical, final = _replay(lazy, node_to_idx, adjacent)
+    assert logical == expected
+    assert final == {idx: state for state, idx in node_to_idx.items()}
+
+    baseline = resolve_gates(gates, path_matrix, node_to_idx)
+    assert circuit_stats(lazy)["SWAP"] < circuit_stats(baseline)["SWAP"]
+
+
+def test_sabre_preserves_per_qubit_order_and_beats_restore() -> None:
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("scipy")
+    from src.sabre_route import SabreRouter, gates_to_indices, routed_qasm
+
+    node_to_idx, path_matrix = _chip()
+    states = sorted(node_to_idx, key=lambda s: node_to_idx[s])
+    edges = sorted({tuple(sorted((node_to_idx[u], node_to_idx[v])))
+                    for u, dests in path_matrix.items()
+                    for v, path in dests.items() if len(path) == 2})
+    gates = _random_gates(states, 300, seed=9)
+    router = SabreRouter(len(states), edges, seed=0)
+    ops, layout, _ = router.route(gates_to_indices(gates, states), np.arange(len(states)))
+    lines = routed_qasm(ops, len(states), layout.tolist(), states)
+
+    start = {states[q]: int(p) for q, p in enumerate(layout)}
+    logical, _ = _replay(lines, start, set(edges) | {(b, a) for a, b in edges})
+
+    def per_qubit(pairs):
+        seq = {}
+        for a, b in pairs:
+            seq.setdefault(a, []).append((a, b))
+            seq.setdefault(b, []).append((a, b))
+        return seq
+
+    assert per_qubit(logical) == per_qubit([(g["q1"], g["q2"]) for g in gates])
+    baseline = resolve_gates(gates, path_matrix, node_to_idx)
+    assert circuit_stats(lines)["SWAP"] < circuit_stats(baseline)["SWAP"]
+
+
+def test_sabre_rejects_cx_on_a_single_qubit() -> None:
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("scipy")
+    from src.sabre_route import SabreRouter, gates_to_indices
+
+    with pytest.raises(ValueError, match="identical"):
+        gates_to_indices([{"gate": "CX", "q1": "a", "q2": "b"}, {"gate": "CX", "q1": "a", "q2": "a"}], ["a", "b"])
+    router = SabreRouter(3, [(0, 1), (1, 2)], seed=0)
+    with pytest.raises(ValueError, match="gate 1"):
+        router.route(np.array([[0, 2], [1, 1]]), np.arange(3))
+
+
+def test_batch_routing_matches_single_file(tmp_path: Path) -> None:
+    node_to_idx, path_matrix = _chip()
+    gate_dir = tmp_path / "gates"
+    gate_dir.mkdir()
+    for k in range(6):
+        gates = _random_gates(sorted(node_to_idx), 30, seed=k)
+        (gate_dir / f"g{k}.json").write_text(json.dumps(gates, ensure_ascii=False), encoding="utf-8")
+    files = batch_inputs(str(gate_dir))
+    assert len(files) == 6
+
+    results = route_batch(files, (node_to_idx, path_matrix), str(tmp_path / "out"), workers=2)
+    assert [r["file"] for r in results] == files
+    for res in results:
+        gates = json.loads(Path(res["file"]).read_text(encoding="utf-8"))
+        expected = resolve_gates(gates, path_matrix, node_to_idx)
+        assert Path(res["output"]).read_text(encoding="utf-8") == "\n".join(expected)
+        assert res["SWAP"] == circuit_stats(expected)["SWAP"]
+
+
+def test_batch_outputs_keep_inputs_with_the_same_basename_apart(tmp_path: Path) -> None:
+    files = [str(tmp_path / "runs" / run / "gates.json") for run in ("a", "b")]
+    out = tmp_path / "out"
+    assert batch_outputs(files, str(out)) == [str(out / "a" / "gates.qasm"), str(out / "b" / "gates.qasm")]
+    assert batch_outputs(files[:1], str(out)) == [str(out / "gates.qasm")]
+
+
+def test_verifier_accepts_commuting_reorders_only() -> None:
+    from src.verify_routing import canonical_form, first_difference, iter_physical_gates, logical_cx_sequence
+
+    node_to_idx, path_matrix = _chip()
+    gates = _random_gates(sorted(node_to_idx), 100, seed=11)
+    expected = [(g["q1"], g["q2"]) for g in gates]
+    lines = resolve_gates_lazy(gates, path_matrix, node_to_idx)
+    layout = {idx: state for state, idx in node_to_idx.items()}
+    routed, _ = logical_cx_sequence(iter_physical_gates(lines), layout)
+    assert first_difference(canonical_form(expected), canonical_form(routed)) is None
+
+    shared_control = [("a", "b"), ("a", "c"), ("c", "d")]
+    assert first_difference(
+        canonical_form(shared_control), canonical_form([("a", "c"), ("a", "b"), ("c", "d")])
+    ) is None
+    assert first_difference(
+        canonical_form(shared_control), canonical_form([("a", "b"), ("c", "d"), ("a", "c")])
+    ) is not None
+    assert first_difference(canonical_form(shared_control), canonical_form(shared_control[:2])) is not None
+
+
+def test_verifier_rejects_cx_on_unmapped_qubit() -> None:
+    from src.verify_routing import logical_cx_sequence
+
+    layout = {0: "a", 1: "b"}
+    # a SWAP may move a state onto a spare qubit; a CX on the emptied one is an error
+    logical, final = logical_cx_sequence([("SWAP", 1, 2), ("CX", 0, 2)], layout)
+    assert logical == [("a", "b")] and final[1] is None
+    with pytest.raises(ValueError, match="unmapped"):
+        logical_cx_sequence([("CX", 0, 5)], layout)
+    with pytest.raises(ValueError, match="unmapped"):
+        logical_cx_sequence([("SWAP", 1, 2), ("CX", 0, 1)], layout)
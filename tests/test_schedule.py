@@ -0,0 +1,31 @@
+from src.qasm_ops import Op
+from src.schedule_qasm import idle_windows, schedule_ops, summarize
+
+
+def test_asap_alap_layers_and_critical_path() -> None:
+    ops = [
+        Op("H", (0,)),
+        Op("CX", (0, 1)),
+        Op("H", (2,)),
+        Op("CX", (1, 2)),
+        Op("BARRIER", (0, 1, 2, 3)),
+        Op("X", (3,)),
+    ]
+    durations = {"1Q": 10.0, "2Q": 100.0}
+    sched = schedule_ops(ops, 4, durations)
+
+    assert list(sched.asap_layer) == [0, 1, 0, 2, 3, 3]
+    assert list(sched.alap_layer) == [0, 1, 1, 2, 3, 3]
+    assert sched.depth == 4
+    assert list(sched.asap_start) == [0.0, 10.0, 0.0, 110.0, 210.0, 210.0]
+    assert sched.makespan == 220.0
+    assert sched.alap_start[2] == 100.0
+    assert [ops[i].name for i in sched.critical_path] == ["H", "CX", "CX", "BARRIER", "X"]
+
+    windows = idle_windows(sched)
+    assert windows[0] == [[110.0, 220.0]]
+    assert windows[3] == [[0.0, 210.0]]
+    report = summarize(sched)
+    assert report["gates"] == 5
+    assert report["layer_sizes"]["asap"] == [2, 1, 1, 1]
+    assert report["critical_path"]["duration_ns"] == 220.0
@@ -0,0 +1,195 @@
+from conftest import HAS_NUMPY
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not HAS_NUMPY, reason="NumPy が未インストールのためスキップ"
+)
+
+if HAS_NUMPY:
+    import numpy as np
+    from src.simulate_semantic_spread import SpreadEngine, multiply, normalize_rows, simulate
+
+
+def _tensor(n, seed=0):
+    rng = np.random.default_rng(seed)
+    w = rng.random((n, n)) * (rng.random((n, n)) < 0.3)
+    w = w + w.T
+    w[3] = w[:, 3] = 0.0  # isolated state: zero row is kept as is
+    return w
+
+
+def test_history_matches_pure_python_reference() -> None:
+    w = _tensor(12)
+    states = [f"ψ{i}" for i in range(12)]
+    norm = normalize_rows(w.tolist())
+    vec = [1.0] + [0.0] * 11
+    history = simulate(states, w.tolist(), steps=6)
+    for n in range(1, 7):
+        vec = multiply(norm, vec)
+        assert np.allclose(history[n]["vector"], vec)
+
+
+@pytest.mark.parametrize("use_sparse", [False, True])
+def test_all_seed_spread_strategies_agree(use_sparse) -> None:
+    w = _tensor(20, seed=1)
+    engine = SpreadEngine(w, use_sparse=use_sparse)
+    stepped = engine.spread(37, method="step")
+    squared = engine.spread(37, method="square")
+    assert np.allclose(stepped, squared)
+    assert np.allclose(engine.spread(37, seeds=[5, 0]), stepped[:, [5, 0]])
+    assert np.allclose(engine.history(seed=5, steps=37)[-1], stepped[:, 5])
+    assert np.allclose(engine.power(0), np.eye(20))
+
+
+def test_steady_state_matches_long_run_and_degrees() -> None:
+    from src.semantic_steady_state import solve_steady_state
+
+    w = _tensor(20, seed=2)
+    w[0, 1] = w[1, 0] = 0.0
+    engine = SpreadEngine(w)
+    result = solve_steady_state(engine)
+    degrees = w.sum(axis=1)
+    for idx, pi in zip(result.classes, result.stationary):
+        # Symmetric weights: π is proportional to the weighted degree
+        assert np.allclose(pi, degrees[idx] / degrees[idx].sum(), atol=1e-9)
+    assert np.allclose(result.limit(5), engine.spread(4000, seeds=[5])[:, 0], atol=1e-8)
+    assert result.residual < 1e-10
+    assert 0 < result.lambda2 < 1 and result.mixing_time(0.25) > 0
+
+
+def test_steady_state_absorption_and_periodic_chain() -> None:
+    from src.semantic_steady_state import solve_steady_state
+
+    # 0 -> {1, 2}; 1 and 2 are absorbing; 3 <-> 4 is periodic
+    w = np.zeros((5, 5))
+    w[0, 1], w[0, 2], w[0, 0] = 1.0, 3.0, 4.0
+    w[1, 1] = w[2, 2] = 1.0
+    w[3, 4] = w[4, 3] = 1.0
+    result = solve_steady_state(SpreadEngine(w))
+    assert [list(c) for c in result.classes] == [[1], [2], [3, 4]]
+    assert np.allclose(result.absorption[0], [0.25, 0.75, 0.0])
+    assert np.allclose(result.limit(2), [0.75, 0.0, 1.0, 0.0, 0.0])
+    assert np.allclose(result.limit(3), [0.0, 0.0, 0.0, 0.5, 0.5])
+    assert result.lambda2 > 1 - 1e-9 and result.mixing_time(0.25) == float("inf")
+
+
+def test_sparse_tensor_storage_matches_dense_writers(tmp_path) -> None:
+    from src.gen_semantic_tensor import (
+        build_sparse_tensor, build_tensor, load_npz_mmap, save_csv, save_json, save_npz, stream_csv, stream_json,
+    )
+
+    states = [f"ψ{i}" for i in range(7)]
+    edges = [
+        {"q1": "ψ0", "q2": "ψ1", "semantic_weight": 0.5},
+        {"q1": "ψ2", "q2": "ψ5", "semantic_weight": 0.25},
+        {"q1": "ψ1", "q2": "ψ0", "semantic_weight": 0.125},  # overrides the first edge
+        {"q1": "ψ3", "q2": "ψ4", "semantic_weight": 0.75},
+        {"q1": "ψ4", "q2": "ψ3", "semantic_weight": 0.0},
+        {"q1": "ψ6", "q2": "ψ9", "semantic_weight": 1.0},  # unknown state
+    ]
+    dense = build_tensor(states, edges)
+    mat = build_sparse_tensor(states, edges)
+    assert mat.toarray().tolist() == dense and mat.nnz == 4
+
+    save_npz(mat, str(tmp_path / "t.npz"))
+    loaded = load_npz_mmap(str(tmp_path / "t.npz"))
+    assert loaded.toarray().tolist() == dense
+
+    save_json(dense, str(tmp_path / "a.json"))
+    stream_json(mat, str(tmp_path / "b.json"), chunk_rows=3)
+    assert (tmp_path / "a.json").read_text() == (tmp_path / "b.json").read_text()
+    save_csv(dense, str(tmp_path / "a.csv"))
+    stream_csv(mat, str(tmp_path / "b.csv"), chunk_rows=3)
+    assert (tmp_path / "a.csv").read_text() == (tmp_path / "b.csv").read_text()
+
+
+def test_weight_kernels_and_incremental_edge_store(tmp_path) -> None:
+    import math
+
+    from src.gen_semantic_tensor import build_sparse_tensor, build_tensor_from_store
+    from src.gen_semantic_weights import EdgeStore, apply_semantic_weights, compute_weights
+
+    states = [f"ψ{i}" for i in range(6)]
+    pairs = [
+        {"q1": states[i], "q2": states[j], "distance": float(abs(i - j)) * 0.7, "coupled": abs(i - j) < 3}
+        for i in range(6) for j in range(i + 1, 6)
+    ]
+    weighted = apply_semantic_weights([dict(p) for p in pairs])
+    for p, e in zip(pairs, weighted):
+        assert e["semantic_weight"] == (round(math.exp(-0.7 * p["distance"]), 4) if p["coupled"] else 0.0)
+
+    d = np.array([0.5, 1.0, 2.0, 3.0])
+    on = np.ones(4, dtype=bool)
+    assert np.allclose(compute_weights(d, on, "gaussian", {"sigma": 2.0}, None), np.exp(-0.5 * (d / 2.0) ** 2))
+    assert np.allclose(compute_weights(d, on, "power", {"p": 2.0}, None), [1.0, 1.0, 0.25, 1 / 9])
+    assert compute_weights(d, on, "cutoff", {"radius": 1.0}).tolist() == [1.0, 1.0, 0.0, 0.0]
+
+    store = EdgeStore.from_pairs(str(tmp_path / "edges"), pairs)
+    assert store.to_pairs() == weighted
+    changes = [{"q1": "ψ0", "q2": "ψ4", "coupled": True}, {"q1": "ψ1", "q2": "ψ2", "distance": 2.0}]
+    assert EdgeStore(str(tmp_path / "edges")).update_pairs(changes) == 2
+    for p in pairs:
+        if (p["q1"], p["q2"]) == ("ψ0", "ψ4"):
+            p["coupled"] = True
+        if (p["q1"], p["q2"]) == ("ψ1", "ψ2"):
+            p["distance"] = 2.0
+    expected = apply_semantic_weights([dict(p) for p in pairs])
+    assert EdgeStore(str(tmp_path / "edges")).to_pairs() == expected
+    tensor = build_tensor_from_store(states, str(tmp_path / "edges"))
+    assert (tensor != build_sparse_tensor(states, expected)).nnz == 0
+
+
+def test_edge_store_kernel_switch_resets_params(tmp_path) -> None:
+    import json
+
+    from src.gen_semantic_weights import EdgeStore, compute_weights
+
+    pairs = [{"q1": f"ψ{i}", "q2": f"ψ{i + 1}", "distance": 0.5 * i, "coupled": True} for i in range(5)]
+    path = str(tmp_path / "edges")
+    EdgeStore.from_pairs(path, pairs, kernel="gaussian", params={"sigma": 1.2})
+
+    store = EdgeStore(path)
+    store.reweight("exponential")
+    d = np.array([p["distance"] for p in pairs])
+    assert np.allclose(store.weight, compute_weights(d, np.ones(5, dtype=bool), "exponential"))
+    meta_path = tmp_path / "edges" / "meta.json"
+    assert json.loads(meta_path.read_text(encoding="utf-8"))["params"] == {}
+
+    before = meta_path.read_text(encoding="utf-8")
+    with pytest.raises(ValueError, match="sigma"):
+        EdgeStore(path).reweight(params={"sigma": 2.0})
+    assert meta_path.read_text(encoding="utf-8") == before
+    assert EdgeStore(path).update_pairs([{"q1": "ψ0", "q2": "ψ1", "distance": 1.0}]) == 1
+
+
+def test_lambda_spread_matches_network_simulation_update() -> None:
+    from src.simulate_lambda_spread import LambdaSpread, init_lambda
+
+    n, dt, r, c = 7, 0.1, 1.0, 0.05
+    lam = init_lambda(n, np.random.default_rng(4))
+    lam[2, 5] = -0.01  # negative strengths are not transition weights
+    mask = np.ones((n, n), dtype=bool)
+    mask[0, 1] = False
+    vec = np.zeros(n)
+    vec[3] = 1.0
+    ref = lam.tolist()
+    sim = LambdaSpread(lam, vec, dt, r, c, mask)
+    buffers = (id(sim._sq), id(sim._buf))
+
+    for _ in range(5):
+        kernel = np.maximum(np.array(ref), 0.0) * mask
+        sums = kernel.sum(axis=1)
+        vec = kernel @ vec / np.where(sums > 0, sums, 1.0)
+        # the pure-Python update of network_simulation.simulate_model_10_3
+        ref = [
+            [
+                ref[i][j] + dt * (r * ref[i][j] * (1 - ref[i][j])
+                                  - sum(c * ref[i][k] * ref[k][j] for k in range(n) if k != i and k != j))
+                for j in range(n)
+            ]
+            for i in range(n)
+        ]
+        sim.step()
+    assert sim.lam is lam and (id(sim._sq), id(sim._buf)) == buffers
+    assert np.allclose(sim.lam, ref)
+    assert np.allclose(sim.vecs, vec)
@@ -0,0 +1,154 @@
+from pathlib import Path
+
+from conftest import HAS_NUMPY
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    not HAS_NUMPY, reason="NumPy が未インストールのためスキップ"
+)
+
+if HAS_NUMPY:
+    import numpy as np
+    from src.qasm_ops import parse_qasm_file
+    from src.simulate_statevector import FIXED_1Q, StatevectorSimulator
+
+
+def _full_1q(n, q, mat):
+    ops = [np.eye(2)] * n
+    ops[q] = mat
+    out = ops[0]
+    for m in ops[1:]:
+        out = np.kron(out, m)
+    return out
+
+
+def _full_controlled(n, c, t, mat):
+    p0 = np.diag([1, 0])
+    p1 = np.diag([0, 1])
+    a = _full_1q(n, c, p0)
+    ops = [np.eye(2)] * n
+    ops[c] = p1
+    ops[t] = mat
+    b = ops[0]
+    for m in ops[1:]:
+        b = np.kron(b, m)
+    return a + b
+
+
+def _reference(n, ops):
+    psi = np.zeros(2 ** n, dtype=complex)
+    psi[0] = 1
+    for name, qs in ops:
+        if name == "SWAP":
+            a, b = qs
+            for c, t in ((a, b), (b, a), (a, b)):
+                psi = _full_controlled(n, c, t, FIXED_1Q["X"]) @ psi
+        elif name == "CX":
+            psi = _full_controlled(n, qs[0], qs[1], FIXED_1Q["X"]) @ psi
+        elif name == "CZ":
+            psi = _full_controlled(n, qs[0], qs[1], FIXED_1Q["Z"]) @ psi
+        else:
+            psi = _full_1q(n, qs[0], FIXED_1Q[name]) @ psi
+    return psi
+
+
+def _write_qasm(path, n, ops):
+    lines = ["OPENQASM 2.0;", 'include "qelib1.inc";', f"qreg q[{n}];"]
+    for name, qs in ops:
+        lines.append(f"{name.lower()} " + ", ".join(f"q[{q}]" for q in qs) + ";")
+    path.write_text("\n".join(lines) + "\n")
+
+
+def test_statevector_matches_dense_reference(tmp_path: Path) -> None:
+    rng = np.random.default_rng(3)
+    n = 5
+    ops = []
+    for _ in range(120):
+        kind = rng.choice(["H", "S", "T", "X", "Y", "SDG", "CX", "CZ", "SWAP"])
+        if kind in ("CX", "CZ", "SWAP"):
+            ops.append((kind, tuple(int(q) for q in rng.choice(n, 2, replace=False))))
+        else:
+            ops.append((kind, (int(rng.integers(n)),)))
+    qasm = tmp_path / "c.qasm"
+    _write_qasm(qasm, n, ops)
+    circuit = parse_qasm_file(str(qasm))
+    sim = StatevectorSimulator(circuit.n_qubits)
+    sim.run(circuit.ops)
+    ref = np.abs(_reference(n, ops)) ** 2
+    assert np.allclose(sim.probabilities(), ref)
+
+
+def test_statevector_sampling_uses_logical_order() -> None:
+    sim = StatevectorSimulator(3)
+    sim.apply_1q(0, FIXED_1Q["X"])
+    sim.swap(0, 2)
+    counts = sim.sample(50, seed=1)
+    assert counts == {"001": 50}
+
+
+def test_stabilizer_matches_statevector_support(tmp_path: Path) -> None:
+    from src.simulate_stabilizer import StabilizerTableau
+
+    rng = np.random.default_rng(7)
+    n = 5
+    ops = []
+    for _ in range(80):
+        kind = rng.choice(["H", "S", "SDG", "X", "Y", "Z", "CX", "CZ", "SWAP"])
+        if kind in ("CX", "CZ", "SWAP"):
+            ops.append((kind, tuple(int(q) for q in rng.choice(n, 2, replace=False))))
+        else:
+            ops.append((kind, (int(rng.integers(n)),)))
+    qasm = tmp_path / "clifford.qasm"
+    _write_qasm(qasm, n, ops)
+    circuit = parse_qasm_file(str(qasm))
+
+    sv = StatevectorSimulator(n)
+    sv.run(circuit.ops)
+    probs = sv.probabilities()
+    support = {format(i, f"0{n}b") for i in np.flatnonzero(probs > 1e-9)}
+
+    tab = StabilizerTableau(n)
+    tab.run(circuit.ops)
+    counts = tab.sample(400, seed=0)
+    assert set(counts) == support
+
+
+def test_stabilizer_ghz_on_many_qubits() -> None:
+    from src.qasm_ops import Op
+    from src.simulate_stabilizer import StabilizerTableau
+
+    n = 130
+    ops = [Op("H", (0,))] + [Op("CX", (q, q + 1)) for q in range(n - 1)]
+    tab = StabilizerTableau(n)
+    tab.run(ops)
+    counts = tab.sample(5, seed=2)
+    assert set(counts) <= {"0" * n, "1" * n}
+    assert sum(counts.values()) == 5
+
+
+def test_stabilizer_measurement_map_matches_statevector_probabilities() -> None:
+    from src.qasm_ops import Op
+    from src.simulate_stabilizer import StabilizerTableau
+
+    rng = np.random.default_rng(8)
+    n = 6
+    ops = []
+    for _ in range(60):
+        kind = str(rng.choice(["H", "S", "CX"]))
+        qubits = rng.choice(n, 2, replace=False) if kind == "CX" else [rng.integers(n)]
+        ops.append(Op(kind, tuple(int(q) for q in qubits)))
+    sv = StatevectorSimulator(n)
+    sv.run(ops)
+    tab = StabilizerTableau(n)
+    tab.run(ops)
+    before = tab.stabilizers()
+
+    base, masks = tab.measurement_map(range(n))
+    assert tab.stabilizers() == before
+    bits = (np.arange(1 << masks.shape[1])[:, None] >> np.arange(masks.shape[1])) & 1
+    outcomes = {"".join(map(str, row)) for row in (bits @ masks.T + base) % 2}
+    probs = sv.probabilities()
+    support = {format(i, f"0{n}b") for i in np.flatnonzero(probs > 1e-9)}
+    assert outcomes == support and np.allclose(probs[probs > 1e-9], 1 / len(support))
+    counts = tab.sample(2000, seed=1)
+    assert set(counts) == support and sum(counts.values()) == 2000